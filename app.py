@@ -1,12 +1,53 @@
 import os
+import sys
 import json
-from datetime import datetime, timedelta
-from flask import Flask, request, jsonify
+import atexit
+import logging
+import logging.handlers
+import queue
+import math
+import base64
+import gzip
+import hashlib
+import hmac
+import heapq
+import importlib
+import itertools
+import random
+import re
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import bisect
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from urllib.parse import parse_qsl, quote, urlencode, urlparse
+from zoneinfo import ZoneInfo
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
 from dotenv import load_dotenv
-from atlassian import Jira
-import msal
-import requests
+
+class LazyModule:
+    """Stand-in for a module that is only imported on first attribute access"""
+    
+    def __init__(self, name):
+        self.name = name
+        self.module = None
+    
+    def __getattr__(self, attr):
+        if self.module is None:
+            self.module = importlib.import_module(self.name)
+        return getattr(self.module, attr)
+
+# The HTTP and identity clients are slow to import and not needed until the first upstream call
+msal = LazyModule('msal')
+requests = LazyModule('requests')
 
 # Load environment variables
 load_dotenv()
@@ -27,22 +68,689 @@ JIRA_URL = os.getenv('JIRA_URL', 'https://your-domain.atlassian.net')
 MS_TENANT_ID = os.getenv('TENANT_ID')
 MS_CLIENT_ID = os.getenv('CLIENT_ID')
 MS_CLIENT_SECRET = os.getenv('CLIENT_SECRET')
-MS_USER_EMAIL = 'cory@wfpcc.com'  # Hardcoded to only allow this specific user
+MS_USER_EMAIL = 'cory@wfpcc.com'  # Default user, served when a request doesn't name one
+# Other users served by this deployment, as email or email=JIRA_PROJECT_KEY (comma separated)
+USERS = os.getenv('USERS', '')
+# X-API-Key values identifying a user, as key=email (comma separated). Only a caller
+# sending a user's key is served that user's data; others get MS_USER_EMAIL's
+USER_API_KEYS = os.getenv('USER_API_KEYS', '')
 MS_GRAPH_SCOPES = ['https://graph.microsoft.com/.default']
 
-# Initialize Jira client if credentials are available
-jira_client = None
-if JIRA_API_KEY and JIRA_EMAIL:
-    try:
-        jira_client = Jira(
-            url=JIRA_URL,
-            username=JIRA_EMAIL,
-            password=JIRA_API_KEY,
-            cloud=True
+# Admission control setup
+# Default token bucket per client and route: RATE_LIMIT_RPS tokens/second, up to RATE_LIMIT_BURST
+RATE_LIMIT_RPS = float(os.getenv('RATE_LIMIT_RPS', 10))
+RATE_LIMIT_BURST = float(os.getenv('RATE_LIMIT_BURST', 20))
+# X-API-Key values that get their own buckets; other callers are limited by remote address
+RATE_LIMIT_API_KEYS = os.getenv('RATE_LIMIT_API_KEYS', '')
+# Proxies in front of the app whose X-Forwarded-For/-Proto are trusted for the client address
+TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', 0))
+# Per-route overrides, e.g. "/events=2:5,/tasks=5:10" (rate:burst, rate 0 disables the limit)
+ROUTE_RATE_LIMITS = os.getenv('ROUTE_RATE_LIMITS', '')
+# Routes that are never rate limited or shed
+ADMISSION_EXEMPT_ROUTES = os.getenv('ADMISSION_EXEMPT_ROUTES', '/health,/webhooks/graph,/webhooks/jira')
+# Concurrency limit per worker process with a short bounded queue in front of it
+MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', 8))
+MAX_QUEUED_REQUESTS = int(os.getenv('MAX_QUEUED_REQUESTS', 16))
+QUEUE_TIMEOUT = float(os.getenv('QUEUE_TIMEOUT', 2))
+
+# Request profiling: ?__profile=1 or X-Profile: 1 with X-Admin-Token, plus 1 in N sampled requests
+PROFILE_ADMIN_TOKEN = os.getenv('PROFILE_ADMIN_TOKEN', '')  # On-demand profiling is off without it
+PROFILE_SAMPLE_RATE = int(os.getenv('PROFILE_SAMPLE_RATE', 0))  # 0 disables sampled profiling
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'daily-server-profiles'))
+PROFILE_FORMAT = os.getenv('PROFILE_FORMAT', 'speedscope')  # speedscope or collapsed
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', 0.005))  # Seconds between stack samples
+
+# Health checks: a background prober keeps dependency state for /health and /health/deep
+HEALTH_CHECK_INTERVAL = int(os.getenv('HEALTH_CHECK_INTERVAL', 60))  # 0 disables the prober
+HEALTH_CHECK_TIMEOUT = float(os.getenv('HEALTH_CHECK_TIMEOUT', 5))
+
+# Batch requests to POST /batch
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', 20))
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', 4))  # Sub-requests run at once, shared by all batches
+
+# Worker startup
+# Resolve upstream hosts and open the Graph token and Jira connections in the background when a worker starts
+PREWARM_CONNECTIONS = os.getenv('PREWARM_CONNECTIONS', 'false').lower() in ('true', 'yes', '1')
+PREWARM_TIMEOUT = float(os.getenv('PREWARM_TIMEOUT', 5))
+
+# Priority contacts
+# Optional file with one address or domain wildcard (*@example.com) per line, used by /important?vip=true
+PRIORITY_CONTACTS_FILE = os.getenv('PRIORITY_CONTACTS_FILE')
+# Contact lists larger than this are matched locally instead of in a Graph $filter
+PRIORITY_FILTER_MAX_CLAUSES = int(os.getenv('PRIORITY_FILTER_MAX_CLAUSES', 15))
+PRIORITY_FILTER_MAX_LENGTH = int(os.getenv('PRIORITY_FILTER_MAX_LENGTH', 1200))
+# How many pages of mail to scan when matching locally
+MAX_LOCAL_FILTER_PAGES = int(os.getenv('MAX_LOCAL_FILTER_PAGES', 10))
+
+# Importance scoring for /important?sort=score
+# Keyword rules matched against subject and body preview, as keyword=weight
+IMPORTANCE_KEYWORDS = os.getenv(
+    'IMPORTANCE_KEYWORDS',
+    'urgent=5,asap=4,action required=4,deadline=3,overdue=3,escalation=3,invoice=2,payment=2,approval=2,meeting=1'
+)
+IMPORTANCE_VIP_WEIGHT = float(os.getenv('IMPORTANCE_VIP_WEIGHT', 5))
+IMPORTANCE_INTERNAL_WEIGHT = float(os.getenv('IMPORTANCE_INTERNAL_WEIGHT', 2))
+IMPORTANCE_UNREAD_WEIGHT = float(os.getenv('IMPORTANCE_UNREAD_WEIGHT', 2))
+IMPORTANCE_RECENCY_WEIGHT = float(os.getenv('IMPORTANCE_RECENCY_WEIGHT', 3))
+# How many messages from the last 24 hours to score per request (Graph allows up to 1000 per page)
+IMPORTANCE_SCAN_LIMIT = min(int(os.getenv('IMPORTANCE_SCAN_LIMIT', 500)), 1000)
+
+# News feed ingestion
+# Feeds to poll as topic=url, comma separated. URLs may also be local file paths.
+NEWS_FEEDS = os.getenv('NEWS_FEEDS', '')
+NEWS_POLL_INTERVAL = int(os.getenv('NEWS_POLL_INTERVAL', 900))
+NEWS_MAX_ITEMS = int(os.getenv('NEWS_MAX_ITEMS', 5000))
+FEED_FETCH_WORKERS = int(os.getenv('FEED_FETCH_WORKERS', 8))
+FEED_FETCH_TIMEOUT = int(os.getenv('FEED_FETCH_TIMEOUT', 10))
+# Near-duplicate clustering: MinHash signatures split into LSH bands
+NEWS_MINHASH_SIZE = int(os.getenv('NEWS_MINHASH_SIZE', 32))
+NEWS_LSH_BANDS = int(os.getenv('NEWS_LSH_BANDS', 8))
+# Minimum estimated Jaccard similarity of title words to count as the same story
+NEWS_DUPLICATE_THRESHOLD = float(os.getenv('NEWS_DUPLICATE_THRESHOLD', 0.5))
+
+# YouTube channel feeds
+# Channels to poll as category=channel_id, comma separated, and/or one per line in a file
+YOUTUBE_CHANNELS = os.getenv('YOUTUBE_CHANNELS', '')
+YOUTUBE_CHANNELS_FILE = os.getenv('YOUTUBE_CHANNELS_FILE')
+YOUTUBE_FEED_URL = os.getenv('YOUTUBE_FEED_URL', 'https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}')
+YOUTUBE_POLL_INTERVAL = int(os.getenv('YOUTUBE_POLL_INTERVAL', 900))
+YOUTUBE_MAX_VIDEOS = int(os.getenv('YOUTUBE_MAX_VIDEOS', 20000))
+
+# Calendar occurrence cache: ranges are split into aligned chunks that are fetched and cached separately
+CALENDAR_CHUNK_DAYS = int(os.getenv('CALENDAR_CHUNK_DAYS', 7))
+CALENDAR_CACHE_TTL = int(os.getenv('CALENDAR_CACHE_TTL', 300))
+CALENDAR_FETCH_WORKERS = int(os.getenv('CALENDAR_FETCH_WORKERS', 4))
+# Page size requested from calendarView while following @odata.nextLink
+CALENDAR_PAGE_SIZE = int(os.getenv('CALENDAR_PAGE_SIZE', 250))
+# Widest range /events and /freebusy accept, which bounds the chunks one request can fetch
+CALENDAR_MAX_RANGE_DAYS = int(os.getenv('CALENDAR_MAX_RANGE_DAYS', 366))
+
+# Graph change notifications posted to /webhooks/graph
+GRAPH_WEBHOOK_URL = os.getenv('GRAPH_WEBHOOK_URL', '')  # Public URL of /webhooks/graph; subscriptions are off without it
+GRAPH_WEBHOOK_CLIENT_STATE = os.getenv('GRAPH_WEBHOOK_CLIENT_STATE', '')  # Shared secret echoed in every notification
+GRAPH_SUBSCRIPTION_MINUTES = int(os.getenv('GRAPH_SUBSCRIPTION_MINUTES', 4200))  # Graph allows up to 10080 for mail and events
+GRAPH_SUBSCRIPTION_CHECK_INTERVAL = int(os.getenv('GRAPH_SUBSCRIPTION_CHECK_INTERVAL', 3600))
+
+# Directory lookups naming /important senders and /events attendees
+DIRECTORY_ENRICHMENT = os.getenv('DIRECTORY_ENRICHMENT', 'true').lower() in ('true', 'yes', '1')
+DIRECTORY_CACHE_TTL = int(os.getenv('DIRECTORY_CACHE_TTL', 86400))
+DIRECTORY_NEGATIVE_TTL = int(os.getenv('DIRECTORY_NEGATIVE_TTL', 86400))  # Addresses not in the directory, e.g. external senders
+DIRECTORY_CACHE_MAX_ENTRIES = int(os.getenv('DIRECTORY_CACHE_MAX_ENTRIES', 20000))
+DIRECTORY_TIMEOUT = int(os.getenv('DIRECTORY_TIMEOUT', 10))
+
+# Free/busy computation for /freebusy
+WORKING_HOURS_START = os.getenv('WORKING_HOURS_START', '09:00')
+WORKING_HOURS_END = os.getenv('WORKING_HOURS_END', '17:00')
+WORKING_DAYS = os.getenv('WORKING_DAYS', '0,1,2,3,4')  # Monday is 0
+WORKING_TIMEZONE = os.getenv('WORKING_TIMEZONE', 'UTC')
+FREEBUSY_CACHE_TTL = int(os.getenv('FREEBUSY_CACHE_TTL', 60))
+
+# Full-text search over everything the providers return
+SEARCH_MAX_DOCUMENTS = int(os.getenv('SEARCH_MAX_DOCUMENTS', 200000))
+SEARCH_MAX_AGE_DAYS = float(os.getenv('SEARCH_MAX_AGE_DAYS', 30))
+
+# Cursor pagination page sizes
+PAGE_SIZE = int(os.getenv('PAGE_SIZE', 25))
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 100))
+
+# Precomputed daily digest snapshots for /digest
+DIGEST_DIR = os.getenv('DIGEST_DIR', os.path.join(tempfile.gettempdir(), 'daily-server-digests'))
+DIGEST_REFRESH_INTERVAL = int(os.getenv('DIGEST_REFRESH_INTERVAL', 300))  # 0 builds on demand only
+DIGEST_BUILD_WORKERS = int(os.getenv('DIGEST_BUILD_WORKERS', 4))  # Users whose digests are rebuilt at once
+DIGEST_MAX_AGE = int(os.getenv('DIGEST_MAX_AGE', 60))  # Cache-Control max-age for clients
+DIGEST_RETENTION_DAYS = int(os.getenv('DIGEST_RETENTION_DAYS', 7))
+
+# Shared cache: memory (per process), sqlite (per host) or redis (across nodes)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+CACHE_URL = os.getenv('CACHE_URL', '')  # SQLite path or redis://[:password@]host:port/db
+CACHE_NAMESPACE = os.getenv('CACHE_NAMESPACE', 'daily-server')
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 10000))
+CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', 256 * 1024 * 1024))  # Shared by all users; the largest user is trimmed first
+CACHE_TIMEOUT = float(os.getenv('CACHE_TIMEOUT', 2))  # Socket timeout for the redis backend
+CACHE_LOCK_TIMEOUT = float(os.getenv('CACHE_LOCK_TIMEOUT', 30))  # Longest wait for another node's computation
+JIRA_CACHE_TTL = int(os.getenv('JIRA_CACHE_TTL', 60))
+# /tasks?projects=A,B searches each project concurrently and merges the results
+JIRA_FETCH_WORKERS = int(os.getenv('JIRA_FETCH_WORKERS', 4))
+JIRA_MAX_PROJECTS = int(os.getenv('JIRA_MAX_PROJECTS', 10))
+
+# Jira issue events posted to /webhooks/jira
+JIRA_WEBHOOK_SECRET = os.getenv('JIRA_WEBHOOK_SECRET', '')  # Webhooks are rejected without it
+JIRA_RECONCILE_INTERVAL = int(os.getenv('JIRA_RECONCILE_INTERVAL', 900))  # Replaces JIRA_CACHE_TTL once webhooks are set up and the cache is shared
+
+# Logging: records are written as JSON lines by a background thread
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG' if DEBUG else 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # json or text
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+# Each distinct message is written at most LOG_SAMPLE_LIMIT times per LOG_SAMPLE_INTERVAL seconds
+LOG_SAMPLE_LIMIT = int(os.getenv('LOG_SAMPLE_LIMIT', 5))
+LOG_SAMPLE_INTERVAL = float(os.getenv('LOG_SAMPLE_INTERVAL', 60))
+
+# Logging
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects"""
+    
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName
+        }
+        if getattr(record, 'suppressed', 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Rate limit repeated messages, counting what was dropped
+    
+    Messages are keyed by their unformatted template, so "Error fetching %s"
+    is one key however many arguments it is logged with. The first record of
+    a new interval carries the number suppressed in the previous one.
+    """
+    
+    def __init__(self, limit, interval):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self.windows = {}
+        self.lock = threading.Lock()
+    
+    def filter(self, record):
+        if self.limit <= 0:
+            return True
+        key = (record.name, record.levelno, record.msg)
+        now = record.created
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self.windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if window[1] < self.limit:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """Hand records to the writer thread without formatting or blocking
+    
+    Formatting happens on the writer thread. When the queue is full the
+    record is dropped and counted instead of stalling the request.
+    """
+    
+    dropped = 0
+    
+    def prepare(self, record):
+        return record
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+log_listener = None
+
+def start_log_listener(log_queue, *handlers):
+    """Start the thread that writes queued records, from init_worker in each process"""
+    global log_listener
+    log_listener = logging.handlers.QueueListener(log_queue, *handlers)
+    log_listener.start()
+    # Flush what is still queued on shutdown
+    atexit.register(log_listener.stop)
+
+def configure_logging():
+    """Route the app logger through a bounded queue to a background stdout writer"""
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == 'text':
+        stream_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    else:
+        stream_handler.setFormatter(JsonFormatter())
+    
+    queue_handler = BackgroundQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    queue_handler.addFilter(SamplingFilter(LOG_SAMPLE_LIMIT, LOG_SAMPLE_INTERVAL))
+    # Records wait in the queue until init_worker starts the writer, so importing starts no thread
+    global log_listener
+    log_listener = logging.handlers.QueueListener(queue_handler.queue, stream_handler)
+    
+    app_logger = logging.getLogger('daily-server')
+    app_logger.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+    app_logger.addHandler(queue_handler)
+    app_logger.propagate = False
+    return app_logger
+
+logger = configure_logging()
+
+# Shared cache
+class Cache:
+    """Base class for cache backends
+    
+    Backends store JSON-compatible values under string keys with a TTL in
+    seconds and implement get, set, add (set only if absent), incr (count
+    up, keeping the TTL of the first increment) and delete.
+    get_or_compute builds on add so only one caller, across threads and
+    across nodes sharing the backend, computes a missing value.
+    """
+    
+    LOCK_STRIPES = 64
+    
+    def __init__(self):
+        self.key_locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+    
+    def lookup(self, key):
+        """get that treats an unreachable backend as a miss"""
+        try:
+            return self.get(key)
+        except (OSError, RedisError, sqlite3.Error) as e:
+            logger.warning("Cache unavailable, treating %s as a miss: %s", key, e)
+            return None
+    
+    def save(self, key, value, ttl):
+        """set that logs instead of raising when the backend is unreachable"""
+        try:
+            self.set(key, value, ttl)
+        except (OSError, RedisError, sqlite3.Error) as e:
+            logger.warning("Cache unavailable, not storing %s: %s", key, e)
+    
+    def reset(self):
+        """Forget connections inherited from a parent process, so a forked worker opens its own"""
+        self.local = threading.local()
+    
+    def get_or_compute(self, key, ttl, compute):
+        """Return the cached value, or compute, store and return it
+        
+        ttl may be a function of the computed value. None results are not
+        cached, so failed upstream calls are retried by the next caller. If
+        the backend is unreachable the value is computed without caching.
+        """
+        computed = []
+        def tracked_compute():
+            computed.append(compute())
+            return computed[0]
+        try:
+            return self.locked_get_or_compute(key, ttl, tracked_compute)
+        except (OSError, RedisError, sqlite3.Error) as e:
+            logger.warning("Cache unavailable, computing %s directly: %s", key, e)
+            return computed[0] if computed else compute()
+    
+    def locked_get_or_compute(self, key, ttl, compute):
+        value = self.get(key)
+        if value is not None:
+            return value
+        
+        # Threads of this process wait on a local lock, other nodes on the lock key
+        with self.key_locks[hash(key) % self.LOCK_STRIPES]:
+            value = self.get(key)
+            if value is not None:
+                return value
+            
+            lock_key = f"{key}:lock"
+            deadline = time.time() + CACHE_LOCK_TIMEOUT
+            while not self.add(lock_key, os.getpid(), CACHE_LOCK_TIMEOUT):
+                time.sleep(0.05)
+                value = self.get(key)
+                if value is not None:
+                    return value
+                if time.time() > deadline:
+                    # The node holding the lock is gone or stuck; compute anyway
+                    break
+            
+            try:
+                value = compute()
+                if value is not None:
+                    self.set(key, value, ttl(value) if callable(ttl) else ttl)
+                return value
+            finally:
+                self.delete(lock_key)
+
+class MemoryCache(Cache):
+    """In-process LRU cache, sharded per user
+    
+    Entries and bytes are bounded globally. When over budget, the least
+    recently used entry of the largest shard is evicted, so one heavy user
+    pushes out their own data before anyone else's.
+    """
+    
+    def __init__(self, max_entries, max_bytes=None):
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes or CACHE_MAX_BYTES
+        self.shards = {}  # shard -> OrderedDict of key -> (expires, value, size)
+        self.shard_bytes = {}
+        self.entry_count = 0
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        with self.lock:
+            entries = self.shards.get(cache_shard(key))
+            entry = entries.get(key) if entries else None
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                self.remove(key)
+                return None
+            entries.move_to_end(key)
+            return entry[1]
+    
+    def set(self, key, value, ttl):
+        # Sized by its JSON encoding, the same measure the shared backends store
+        size = len(json.dumps(value, default=str)) + len(key)
+        with self.lock:
+            self.store(key, value, ttl, size)
+            while self.entry_count > self.max_entries or self.total_bytes > self.max_bytes:
+                shard = max(self.shard_bytes, key=self.shard_bytes.get)
+                self.remove(next(iter(self.shards[shard])))
+    
+    def add(self, key, value, ttl):
+        with self.lock:
+            entries = self.shards.get(cache_shard(key))
+            entry = entries.get(key) if entries else None
+            if entry is not None and entry[0] > time.time():
+                return False
+            self.store(key, value, ttl, len(key) + 16)
+            return True
+    
+    def incr(self, key, ttl):
+        with self.lock:
+            entries = self.shards.get(cache_shard(key))
+            entry = entries.get(key) if entries else None
+            if entry is None or entry[0] <= time.time():
+                self.store(key, 1, ttl, len(key) + 16)
+                return 1
+            entries[key] = (entry[0], entry[1] + 1, entry[2])
+            return entry[1] + 1
+    
+    def delete(self, key):
+        with self.lock:
+            self.remove(key)
+    
+    def store(self, key, value, ttl, size):
+        """Insert an entry as most recently used (caller holds the lock)"""
+        self.remove(key)
+        shard = cache_shard(key)
+        self.shards.setdefault(shard, OrderedDict())[key] = (time.time() + ttl, value, size)
+        self.shard_bytes[shard] = self.shard_bytes.get(shard, 0) + size
+        self.entry_count += 1
+        self.total_bytes += size
+    
+    def remove(self, key):
+        """Drop an entry and its accounting (caller holds the lock)"""
+        shard = cache_shard(key)
+        entries = self.shards.get(shard)
+        entry = entries.pop(key, None) if entries else None
+        if entry is None:
+            return
+        self.entry_count -= 1
+        self.total_bytes -= entry[2]
+        self.shard_bytes[shard] -= entry[2]
+        if not entries:
+            del self.shards[shard]
+            del self.shard_bytes[shard]
+
+class SQLiteCache(Cache):
+    """Cache in a SQLite file shared by the processes on one host
+    
+    Point CACHE_URL at /dev/shm to keep it in shared memory. Eviction is
+    fair across user shards like MemoryCache, dropping the entries closest
+    to expiring from the largest shard.
+    """
+    
+    def __init__(self, path, max_entries, max_bytes=None):
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes or CACHE_MAX_BYTES
+        self.local = threading.local()
+        self.writes = 0
+        db = self.connection()
+        db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, expires REAL)")
+        columns = {row[1] for row in db.execute("PRAGMA table_info(cache)")}
+        if "shard" not in columns:
+            db.execute("ALTER TABLE cache ADD COLUMN shard TEXT NOT NULL DEFAULT ''")
+            db.execute("ALTER TABLE cache ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+        db.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)")
+        db.execute("CREATE INDEX IF NOT EXISTS cache_shard ON cache (shard, expires)")
+    
+    def connection(self):
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self.local.db = db
+        return db
+    
+    def get(self, key):
+        row = self.connection().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def set(self, key, value, ttl):
+        db = self.connection()
+        encoded = json.dumps(value)
+        db.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires, shard, size) VALUES (?, ?, ?, ?, ?)",
+            (key, encoded, time.time() + ttl, cache_shard(key), len(encoded) + len(key))
         )
-        print("Jira client initialized successfully")
-    except Exception as e:
-        print(f"Error initializing Jira client: {str(e)}")
+        self.writes += 1
+        if self.writes % 100 == 0:
+            self.evict(db)
+    
+    def add(self, key, value, ttl):
+        db = self.connection()
+        now = time.time()
+        db.execute("DELETE FROM cache WHERE key = ? AND expires <= ?", (key, now))
+        encoded = json.dumps(value)
+        cursor = db.execute(
+            "INSERT OR IGNORE INTO cache (key, value, expires, shard, size) VALUES (?, ?, ?, ?, ?)",
+            (key, encoded, now + ttl, cache_shard(key), len(encoded) + len(key))
+        )
+        return cursor.rowcount == 1
+    
+    def incr(self, key, ttl):
+        db = self.connection()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM cache WHERE key = ? AND expires <= ?", (key, now))
+            db.execute(
+                "INSERT OR IGNORE INTO cache (key, value, expires, shard, size) VALUES (?, '0', ?, ?, ?)",
+                (key, now + ttl, cache_shard(key), len(key) + 16)
+            )
+            db.execute("UPDATE cache SET value = CAST(CAST(value AS INTEGER) + 1 AS TEXT) WHERE key = ?", (key,))
+            count = int(db.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()[0])
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return count
+    
+    def delete(self, key):
+        self.connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+    
+    def evict(self, db):
+        """Drop expired entries, then trim the largest shards until within budget"""
+        db.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+        while True:
+            entries, total_bytes = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+            if entries <= self.max_entries and total_bytes <= self.max_bytes:
+                return
+            shard, shard_entries = db.execute(
+                "SELECT shard, COUNT(*) FROM cache GROUP BY shard ORDER BY SUM(size) DESC LIMIT 1"
+            ).fetchone()
+            # Trim a tenth of the shard at a time rather than one row per query
+            db.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache WHERE shard = ? ORDER BY expires LIMIT ?)",
+                (shard, max(1, shard_entries // 10))
+            )
+
+class RedisError(Exception):
+    pass
+
+class RedisCache(Cache):
+    """Cache on a server speaking the Redis protocol, shared by every node
+    
+    Uses a small RESP client over one socket per thread, so no Redis client
+    library is needed.
+    """
+    
+    def __init__(self, url):
+        super().__init__()
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.local = threading.local()
+    
+    def connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=CACHE_TIMEOUT)
+        self.local.sock = sock
+        self.local.reader = sock.makefile('rb')
+        if self.password:
+            self.call('AUTH', self.password)
+        if self.db:
+            self.call('SELECT', self.db)
+    
+    def call(self, *args):
+        if getattr(self.local, 'sock', None) is None:
+            self.connect()
+        parts = [str(arg).encode() for arg in args]
+        payload = b"*%d\r\n" % len(parts) + b"".join(b"$%d\r\n%s\r\n" % (len(part), part) for part in parts)
+        try:
+            self.local.sock.sendall(payload)
+            return self.read_reply()
+        except (OSError, RedisError):
+            # Reconnect on the next call rather than reuse a half-read socket
+            self.local.sock.close()
+            self.local.sock = None
+            raise
+    
+    def read_reply(self):
+        line = self.local.reader.readline()
+        if not line:
+            raise RedisError("Connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode()
+        if kind == b'-':
+            raise RedisError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length < 0:
+                return None
+            return self.local.reader.read(length + 2)[:-2]
+        if kind == b'*':
+            length = int(rest)
+            return None if length < 0 else [self.read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+    
+    def get(self, key):
+        value = self.call('GET', key)
+        return json.loads(value) if value is not None else None
+    
+    def set(self, key, value, ttl):
+        self.call('SET', key, json.dumps(value), 'PX', max(1, int(ttl * 1000)))
+    
+    def add(self, key, value, ttl):
+        return self.call('SET', key, json.dumps(value), 'PX', max(1, int(ttl * 1000)), 'NX') == 'OK'
+    
+    def incr(self, key, ttl):
+        # Creating the counter with its expiry first means INCR never leaves one without a TTL
+        self.call('SET', key, 0, 'PX', max(1, int(ttl * 1000)), 'NX')
+        return self.call('INCR', key)
+    
+    def delete(self, key):
+        self.call('DEL', key)
+
+def create_cache():
+    """Create the backend selected by CACHE_BACKEND"""
+    if CACHE_BACKEND == 'sqlite':
+        return SQLiteCache(CACHE_URL or os.path.join(tempfile.gettempdir(), 'daily-server-cache.db'), CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+    if CACHE_BACKEND == 'redis':
+        return RedisCache(CACHE_URL or 'redis://localhost:6379/0')
+    return MemoryCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+
+def cache_is_shared():
+    """Whether every worker process sees the same cache, so one can act for all of them"""
+    return CACHE_BACKEND in ('sqlite', 'redis')
+
+def cache_key(namespace, *parts):
+    """Namespaced cache key, so deployments and data types sharing a backend don't collide"""
+    return ":".join([CACHE_NAMESPACE, namespace, *(str(part) for part in parts)])
+
+def user_cache_key(user, namespace, *parts):
+    """Cache key in a user's shard"""
+    return cache_key(f"user={user}", namespace, *parts)
+
+def cache_shard(key):
+    """The user a key belongs to, or '' for shared entries"""
+    _, _, rest = key.partition(":")
+    return rest[5:rest.index(":")] if rest.startswith("user=") else ""
+
+cache = create_cache()
+
+# Users
+def parse_users(spec):
+    """Parse USERS into {email: Jira project key}, always including MS_USER_EMAIL"""
+    users = {MS_USER_EMAIL.lower(): JIRA_PROJECT_KEY}
+    for entry in spec.split(","):
+        email, _, project = entry.partition("=")
+        email = email.strip().lower()
+        if email:
+            users[email] = project.strip() or JIRA_PROJECT_KEY
+    return users
+
+users = parse_users(USERS)
+
+def parse_user_api_keys(spec):
+    """Parse USER_API_KEYS into {key: email}, skipping users that aren't served"""
+    keys = {}
+    for entry in spec.split(","):
+        key, _, email = entry.partition("=")
+        key, email = key.strip(), email.strip().lower()
+        if not key or not email:
+            continue
+        if email not in users:
+            logger.warning("Ignoring API key for %s, who isn't listed in USERS", email)
+            continue
+        keys[key] = email
+    return keys
+
+user_api_keys = parse_user_api_keys(USER_API_KEYS)
+
+# Jira client, constructed on first use so importing the app stays cheap
+jira_client = None
+jira_client_lock = threading.Lock()
+
+def get_jira_client():
+    """The Jira client, or None when Jira isn't configured"""
+    global jira_client
+    if jira_client is None and JIRA_API_KEY and JIRA_EMAIL:
+        with jira_client_lock:
+            if jira_client is None:
+                try:
+                    from atlassian import Jira
+                    jira_client = Jira(
+                        url=JIRA_URL,
+                        username=JIRA_EMAIL,
+                        password=JIRA_API_KEY,
+                        cloud=True
+                    )
+                    logger.info("Jira client initialized successfully")
+                except Exception as e:
+                    logger.error("Error initializing Jira client: %s", e)
+    return jira_client
 
 # Initialize Microsoft Graph access
 ms_graph_token = None
@@ -58,9 +766,21 @@ def get_ms_graph_token():
         return None
     
     # Check if we have a valid token
-    if ms_graph_token and datetime.now() < ms_graph_token['expires_at']:
+    if ms_graph_token and time.time() < ms_graph_token['expires_at']:
         return ms_graph_token['access_token']
     
+    # Nodes sharing the cache reuse one token instead of each acquiring their own
+    token = cache.get_or_compute(
+        cache_key('graph-token', MS_TENANT_ID, MS_CLIENT_ID),
+        lambda token: token['expires_at'] - time.time(),
+        acquire_ms_graph_token
+    )
+    ms_graph_token = token
+    ms_graph_configured = token is not None
+    return token['access_token'] if token else None
+
+def acquire_ms_graph_token():
+    """Acquire a token with the client credentials grant, or None on failure"""
     try:
         # Create an MSAL app
         app = msal.ConfidentialClientApplication(
@@ -73,199 +793,1299 @@ def get_ms_graph_token():
         result = app.acquire_token_for_client(scopes=MS_GRAPH_SCOPES)
         
         if "access_token" in result:
-            # Calculate expiration time (token expires_in is in seconds)
-            expires_at = datetime.now() + timedelta(seconds=result['expires_in'] - 300)  # 5 min buffer
-            
-            ms_graph_token = {
+            logger.info("Microsoft Graph API token acquired successfully")
+            return {
                 'access_token': result['access_token'],
-                'expires_at': expires_at
+                # Epoch seconds, renewed 5 minutes before the token expires
+                'expires_at': time.time() + result['expires_in'] - 300
             }
-            
-            ms_graph_configured = True
-            print("Microsoft Graph API token acquired successfully")
-            return result['access_token']
         else:
-            print(f"Error acquiring Microsoft Graph token: {result.get('error')}")
-            print(f"Error description: {result.get('error_description')}")
-            ms_graph_configured = False
+            logger.error("Error acquiring Microsoft Graph token: %s (%s)",
+                         result.get('error'), result.get('error_description'))
             return None
     
     except Exception as e:
-        print(f"Exception while acquiring Microsoft Graph token: {str(e)}")
-        ms_graph_configured = False
+        logger.error("Exception while acquiring Microsoft Graph token: %s", e)
         return None
 
-# Mock data providers
-def get_youtube_videos(channels=None, categories=None):
-    videos = [
-        {
-            "id": "video1",
-            "title": "Latest Tech Trends 2023",
-            "channel": "TechWorld",
-            "publishedAt": (datetime.now() - timedelta(hours=3)).isoformat(),
-            "url": "https://youtube.com/watch?v=abc123",
-            "thumbnail": "https://i.ytimg.com/vi/abc123/hqdefault.jpg",
-            "category": "tech"
-        },
-        {
-            "id": "video2",
-            "title": "Breaking News: Market Update",
-            "channel": "FinanceToday",
-            "publishedAt": (datetime.now() - timedelta(hours=5)).isoformat(),
-            "url": "https://youtube.com/watch?v=def456",
-            "thumbnail": "https://i.ytimg.com/vi/def456/hqdefault.jpg",
-            "category": "finance"
-        },
-        {
-            "id": "video3",
-            "title": "New Music Release Roundup",
-            "channel": "MusicTrends",
-            "publishedAt": (datetime.now() - timedelta(hours=8)).isoformat(),
-            "url": "https://youtube.com/watch?v=ghi789",
-            "thumbnail": "https://i.ytimg.com/vi/ghi789/hqdefault.jpg",
-            "category": "music"
-        }
-    ]
+# Records
+# Provider results are held as __slots__ records instead of dicts, which keeps cached and
+# indexed items small. Each timestamp is kept as the string the response has always
+# carried, alongside integer epoch seconds parsed once so filters and sorts compare ints.
+class Record:
+    """Base class for provider records
     
-    filtered_videos = videos
+    FIELDS maps each response field to the slot holding it. TIMES maps the slot
+    of each timestamp string to the slot holding its epoch seconds. Records
+    read like the dicts they replace (record["title"]), and to_dict builds the
+    response shape. Fields in OPTIONAL are left out of the response while they
+    are None.
+    """
     
-    if channels:
-        channel_list = [ch.strip() for ch in channels.split(",")]
-        filtered_videos = [v for v in filtered_videos if v["channel"] in channel_list]
+    __slots__ = ()
+    FIELDS = {}
+    TIMES = {}
+    OPTIONAL = frozenset()
+    NAIVE_UTC = False  # Whether naive timestamps are UTC rather than local time
     
-    if categories:
-        category_list = [cat.strip() for cat in categories.split(",")]
-        filtered_videos = [v for v in filtered_videos if v["category"] in category_list]
+    def __init_subclass__(cls):
+        super().__init_subclass__()
+        # (field, slot, optional) per response field, so to_dict does no lookups
+        cls.LAYOUT = {field: (field, slot, field in cls.OPTIONAL) for field, slot in cls.FIELDS.items()}
     
-    return filtered_videos
-
-def get_news_headlines(topics=None, hours=24):
-    news = [
-        {
-            "id": "news1",
-            "title": "New AI Breakthrough Announced",
-            "source": "Tech Times",
-            "publishedAt": (datetime.now() - timedelta(hours=2)).isoformat(),
-            "url": "https://techtimes.com/ai-breakthrough",
-            "topic": "technology"
-        },
-        {
-            "id": "news2",
-            "title": "Housing Market Shows Signs of Recovery",
-            "source": "Economy Daily",
-            "publishedAt": (datetime.now() - timedelta(hours=6)).isoformat(),
-            "url": "https://economydaily.com/housing-recovery",
-            "topic": "real estate"
-        },
-        {
-            "id": "news3",
-            "title": "Central Bank Announces New Interest Rates",
-            "source": "Financial Post",
-            "publishedAt": (datetime.now() - timedelta(hours=10)).isoformat(),
-            "url": "https://financialpost.com/interest-rates",
-            "topic": "economy"
-        }
-    ]
+    def __init__(self, **values):
+        for slot in self.__slots__:
+            setattr(self, slot, values.get(slot))
     
-    # Filter by publication time
-    cutoff_time = datetime.now() - timedelta(hours=int(hours))
-    filtered_news = [n for n in news if datetime.fromisoformat(n["publishedAt"]) > cutoff_time]
+    @classmethod
+    def from_dict(cls, item):
+        """Build a record from the response shape, e.g. mock data"""
+        values = {slot: item.get(field) for field, slot in cls.FIELDS.items()}
+        for text_slot, epoch_slot in cls.TIMES.items():
+            text = values[text_slot]
+            epoch = (utc_epoch(text) if cls.NAIVE_UTC else parse_timestamp(text)) if text is not None else None
+            values[epoch_slot] = int(epoch) if epoch is not None else None
+        return cls(**values)
     
-    # Filter by topics if provided
-    if topics:
-        topic_list = [t.strip() for t in topics.split(",")]
-        filtered_news = [n for n in filtered_news if n["topic"] in topic_list]
+    @classmethod
+    def from_row(cls, row):
+        """Rebuild a record from to_row, as stored in the shared cache"""
+        record = cls.__new__(cls)
+        # Slots added since a row was cached come back as None
+        for slot, value in itertools.zip_longest(cls.__slots__, row):
+            setattr(record, slot, value)
+        return record
     
-    return filtered_news
+    def to_row(self):
+        return [getattr(self, slot) for slot in self.__slots__]
+    
+    def replace(self, **changes):
+        record = self.from_row(self.to_row())
+        for slot, value in changes.items():
+            setattr(record, slot, value)
+        return record
+    
+    def to_dict(self, fields=None):
+        layout = self.LAYOUT
+        entries = layout.values() if not fields else [layout[f] for f in fields if f in layout]
+        result = {}
+        for field, slot, optional in entries:
+            value = getattr(self, slot)
+            if value is None and optional:
+                continue
+            result[field] = value
+        return result
+    
+    def epoch(self, field):
+        """Epoch seconds of a timestamp response field"""
+        return getattr(self, self.TIMES[self.FIELDS[field]])
+    
+    def get(self, field, default=None):
+        slot = self.FIELDS.get(field)
+        if slot is None:
+            return default
+        value = getattr(self, slot)
+        return default if value is None else value
+    
+    def __getitem__(self, field):
+        if field not in self.FIELDS:
+            raise KeyError(field)
+        return self.get(field)
+    
+    def __contains__(self, field):
+        return field in self.FIELDS and (field not in self.OPTIONAL or getattr(self, self.FIELDS[field]) is not None)
+    
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_row() == other.to_row()
+    
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class Task(Record):
+    __slots__ = ("id", "title", "status", "priority", "assignee", "updated_text", "updated")
+    FIELDS = {"id": "id", "title": "title", "status": "status", "priority": "priority",
+              "assignee": "assignee", "updated": "updated_text"}
+    TIMES = {"updated_text": "updated"}
+
+class Email(Record):
+    __slots__ = ("id", "subject", "sender", "received_text", "received", "read", "snippet", "score",
+                 "sender_name", "sender_title")
+    FIELDS = {"id": "id", "subject": "subject", "sender": "sender", "receivedAt": "received_text",
+              "read": "read", "snippet": "snippet", "score": "score", "senderName": "sender_name",
+              "senderTitle": "sender_title"}
+    TIMES = {"received_text": "received"}
+    # score is only set by rank_emails, the sender details only for senders found in the directory
+    OPTIONAL = frozenset({"score", "senderName", "senderTitle"})
+
+class Event(Record):
+    __slots__ = ("id", "title", "start_text", "start", "end_text", "end", "location", "attendees", "series_id",
+                 "attendee_details")
+    FIELDS = {"id": "id", "title": "title", "start": "start_text", "end": "end_text", "location": "location",
+              "attendees": "attendees", "seriesId": "series_id", "attendeeDetails": "attendee_details"}
+    TIMES = {"start_text": "start", "end_text": "end"}
+    OPTIONAL = frozenset({"attendeeDetails"})  # Set by enrich_events
+    NAIVE_UTC = True  # calendarView returns naive UTC times
 
-def get_jira_tasks(limit=5):
-    """Get Jira tasks that are To Do or In Progress"""
+class Headline(Record):
+    __slots__ = ("id", "title", "source", "published_text", "published", "url", "topic", "source_count", "sources",
+                 "signature", "members")
+    FIELDS = {"id": "id", "title": "title", "source": "source", "publishedAt": "published_text", "url": "url",
+              "topic": "topic", "sourceCount": "source_count", "sources": "sources"}
+    TIMES = {"published_text": "published"}
+    OPTIONAL = frozenset({"sourceCount", "sources"})  # Only kept for ingested feeds
+
+class Video(Record):
+    __slots__ = ("id", "title", "channel", "published_text", "published", "url", "thumbnail", "category", "channel_id")
+    FIELDS = {"id": "id", "title": "title", "channel": "channel", "publishedAt": "published_text", "url": "url",
+              "thumbnail": "thumbnail", "category": "category"}
+    TIMES = {"published_text": "published"}
+
+# Sparse fieldsets
+# Response fields for each endpoint, mapped to the upstream field that backs them
+VIDEO_FIELDS = {f: None for f in ("id", "title", "channel", "publishedAt", "url", "thumbnail", "category")}
+HEADLINE_FIELDS = {f: None for f in ("id", "title", "source", "publishedAt", "url", "topic", "sourceCount", "sources")}
+TASK_FIELDS = {
+    "id": None,  # The issue key is always returned by Jira
+    "title": "summary",
+    "status": "status",
+    "priority": "priority",
+    "assignee": "assignee",
+    "updated": "updated"
+}
+EMAIL_FIELDS = {
+    "id": "id",
+    "subject": "subject",
+    "sender": "from",
+    "receivedAt": "receivedDateTime",
+    "read": "isRead",
+    "snippet": "bodyPreview",
+    "score": None,  # Only present with sort=score
+    "senderName": "from",
+    "senderTitle": "from"
+}
+EVENT_FIELDS = {
+    "id": "id",
+    "title": "subject",
+    "start": "start",
+    "end": "end",
+    "location": "location",
+    "attendees": "attendees",
+    "seriesId": "seriesMasterId",  # Set on occurrences of recurring events
+    "attendeeDetails": "attendees"
+}
+
+def parse_fields(fields_param, allowed):
+    """Parse a fields= parameter into a list of response fields, or an error"""
+    if not fields_param:
+        return None, None
     
-    # If Jira client is not initialized, return mock data
-    if not jira_client:
-        if DEBUG:
-            print("Using mock Jira data as Jira client is not initialized")
-        tasks = [
-            {
-                "id": "PROJ-123",
-                "title": "Implement new user authentication flow",
-                "status": "In Progress",
-                "priority": "High",
-                "assignee": "John Smith",
-                "updated": (datetime.now() - timedelta(days=1)).isoformat()
-            },
-            {
-                "id": "PROJ-124",
-                "title": "Fix payment processing bug",
-                "status": "To Do",
-                "priority": "Critical",
-                "assignee": "John Smith",
-                "updated": (datetime.now() - timedelta(days=2)).isoformat()
-            },
-            {
-                "id": "PROJ-125",
-                "title": "Update documentation for API v2",
-                "status": "To Do",
-                "priority": "Medium",
-                "assignee": "John Smith",
-                "updated": (datetime.now() - timedelta(hours=12)).isoformat()
-            },
-            {
-                "id": "PROJ-126",
-                "title": "Optimize database queries",
-                "status": "In Progress",
-                "priority": "High",
-                "assignee": "John Smith",
-                "updated": (datetime.now() - timedelta(hours=6)).isoformat()
-            },
-            {
-                "id": "PROJ-127",
-                "title": "Implement dark mode for mobile app",
-                "status": "To Do",
-                "priority": "Low",
-                "assignee": "John Smith",
-                "updated": (datetime.now() - timedelta(days=3)).isoformat()
-            }
-        ]
-        
-        # Only return tasks that are To Do or In Progress
-        filtered_tasks = [t for t in tasks if t["status"] in ["To Do", "In Progress"]]
-        
-        # Limit the number of tasks returned
-        return filtered_tasks[:int(limit)]
+    fields = [f.strip() for f in fields_param.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        return None, {"error": f"Unknown fields: {', '.join(unknown)}. Valid fields: {', '.join(allowed)}."}
+    
+    # The id is always returned so clients can key the items
+    if "id" not in fields:
+        fields.insert(0, "id")
+    return fields, None
+
+def upstream_fields(fields, field_map):
+    """Translate response fields into the upstream fields needed to build them"""
+    if not fields:
+        fields = field_map
+    # Several response fields can be built from one upstream field
+    return list(dict.fromkeys(field_map[f] for f in fields if field_map.get(f)))
+
+def select_fields(items, fields):
+    """Serialize records to the response shape, trimmed to the requested fields"""
+    return [item.to_dict(fields) for item in items]
+
+# Cursor pagination
+def query_fingerprint(*parts):
+    """Short hash of the query a cursor belongs to, so it can't be reused with other filters"""
+    return hashlib.sha1(json.dumps(parts).encode()).hexdigest()[:12]
+
+def encode_cursor(state):
+    """Encode paging state into an opaque URL-safe cursor"""
+    raw = json.dumps(state, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor, fingerprint):
+    """Decode a cursor for this query; an empty cursor starts at the first page"""
+    if not cursor:
+        return {"o": 0, "t": int(time.time()), "q": fingerprint}, None
     
     try:
-        if DEBUG:
-            print("=== JIRA DIAGNOSTIC INFORMATION ===")
-            print(f"Jira URL: {JIRA_URL}")
-            print(f"Project Key: {JIRA_PROJECT_KEY}")
-            
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        state = json.loads(raw)
+        offset = int(state["o"])
+        as_of = int(state["t"])
+    except (ValueError, KeyError, TypeError):
+        return None, {"error": "Invalid cursor."}
+    
+    if state.get("q") != fingerprint or offset < 0:
+        return None, {"error": "Cursor does not match this query. Start again without a cursor."}
+    return {"o": offset, "t": as_of, "q": fingerprint}, None
+
+def parse_page_size(limit_param, default=PAGE_SIZE):
+    """Parse a limit= parameter, bounded to MAX_PAGE_SIZE"""
+    if limit_param is None:
+        return default, None
+    try:
+        limit = int(limit_param)
+    except ValueError:
+        return None, {"error": "limit must be an integer."}
+    return max(1, min(limit, MAX_PAGE_SIZE)), None
+
+def page_response(items, limit, page):
+    """Build a page from limit + 1 fetched items, adding a nextCursor if more remain"""
+    next_cursor = None
+    if len(items) > limit:
+        next_cursor = encode_cursor({"o": page["o"] + limit, "t": page["t"], "q": page["q"]})
+    return {"items": items[:limit], "nextCursor": next_cursor}
+
+# Priority contact index
+def build_contact_index(entries):
+    """Build a hashed index of exact addresses and wildcard domains"""
+    addresses = set()
+    domains = set()
+    for entry in entries:
+        entry = entry.strip().lower()
+        if not entry or entry.startswith('#'):
+            continue
+        # "*@example.com" and "@example.com" match the domain and its subdomains
+        if entry.startswith('*@') or entry.startswith('@'):
+            domains.add(entry.split('@', 1)[1])
+        else:
+            addresses.add(entry)
+    return {"addresses": frozenset(addresses), "domains": frozenset(domains)}
+
+def contact_matches(index, address):
+    """Check a sender against the index in O(1) per address (plus one lookup per domain label)"""
+    if not address:
+        return False
+    address = address.lower()
+    if address in index["addresses"]:
+        return True
+    if not index["domains"]:
+        return False
+    
+    # Try the domain and each parent domain, e.g. mail.example.com then example.com
+    domain = address.rpartition('@')[2]
+    while domain:
+        if domain in index["domains"]:
+            return True
+        domain = domain.partition('.')[2]
+    return False
+
+def merge_contact_indexes(first, second):
+    return {
+        "addresses": first["addresses"] | second["addresses"],
+        "domains": first["domains"] | second["domains"]
+    }
+
+# VIP list loaded from PRIORITY_CONTACTS_FILE, reloaded when the file changes
+vip_contacts = {"index": None, "mtime": None}
+vip_contacts_lock = threading.Lock()
+
+def get_vip_contact_index():
+    """Get the configured VIP contact index, or None if no file is configured"""
+    if not PRIORITY_CONTACTS_FILE:
+        return None
+    
+    try:
+        mtime = os.path.getmtime(PRIORITY_CONTACTS_FILE)
+    except OSError as e:
+        logger.error("Error reading priority contacts file: %s", e)
+        return vip_contacts["index"]
+    
+    with vip_contacts_lock:
+        if vip_contacts["mtime"] != mtime:
+            with open(PRIORITY_CONTACTS_FILE) as f:
+                vip_contacts["index"] = build_contact_index(f)
+            vip_contacts["mtime"] = mtime
+            logger.info("Loaded %s priority contacts and %s domains",
+                        len(vip_contacts['index']['addresses']), len(vip_contacts['index']['domains']))
+        return vip_contacts["index"]
+
+def get_contact_index(priority_contacts=None, vip=False):
+    """Combine the priorityContacts parameter and the VIP list into one index"""
+    index = None
+    if priority_contacts:
+        index = build_contact_index(priority_contacts.split(","))
+    if vip:
+        vip_index = get_vip_contact_index()
+        if vip_index:
+            index = merge_contact_indexes(index, vip_index) if index else vip_index
+    return index
+
+def contact_odata_filter(index):
+    """Build a Graph $filter for the index, or None when matching locally is cheaper"""
+    if index["domains"] or len(index["addresses"]) > PRIORITY_FILTER_MAX_CLAUSES:
+        return None
+    
+    contact_filter = " or ".join(
+        f"from/emailAddress/address eq '{address.replace(chr(39), chr(39) * 2)}'"
+        for address in sorted(index["addresses"])
+    )
+    if len(contact_filter) > PRIORITY_FILTER_MAX_LENGTH:
+        return None
+    return contact_filter
+
+# Importance scoring
+def parse_keyword_rules(spec):
+    """Parse IMPORTANCE_KEYWORDS into {keyword: weight}"""
+    rules = {}
+    for entry in spec.split(","):
+        keyword, _, weight = entry.partition("=")
+        keyword = keyword.strip().lower()
+        if not keyword:
+            continue
+        try:
+            rules[keyword] = float(weight) if weight else 1.0
+        except ValueError:
+            logger.warning("Ignoring invalid importance keyword weight: %s", entry)
+    return rules
+
+def build_keyword_matcher(rules):
+    """Precompile keyword rules into a single-pass multi-pattern matcher
+    
+    Keywords match whole words. Like Aho-Corasick, every keyword's output set
+    includes the keywords it contains, computed once here. The scan itself is a
+    single regex pass over the longest-first alternation, which keeps the
+    per-character loop in C rather than in Python.
+    """
+    keywords = sorted(rules, key=len, reverse=True)
+    if not keywords:
+        return None
+    
+    contained = {k: [o for o in keywords if f" {o} " in f" {k} "] for k in keywords}
+    outputs = {k: sum(rules[o] for o in contained[k]) for k in keywords}
+    
+    # If any of a keyword's trailing words can start another keyword, scan with a
+    # lookahead so overlapping matches are found too (slower, so only when needed)
+    tails = {" ".join(words[i:]) for words in (k.split(" ") for k in keywords) for i in range(1, len(words))}
+    overlapping = any(f"{other} ".startswith(f"{tail} ") for tail in tails for other in keywords)
+    alternation = r"\b(?:" + "|".join(re.escape(k) for k in keywords) + r")\b"
+    pattern = re.compile(f"(?=({alternation}))" if overlapping else alternation)
+    return {"pattern": pattern, "outputs": outputs, "contained": contained, "rules": rules}
+
+def keyword_score(matcher, text):
+    """Sum the weights of the distinct keywords found in the text"""
+    if not matcher or not text:
+        return 0.0
+    found = set(matcher["pattern"].findall(text.lower()))
+    if not found:
+        return 0.0
+    if len(found) == 1:
+        return matcher["outputs"][found.pop()]
+    
+    # Several matches: count each contained keyword once
+    keywords = set()
+    for match in found:
+        keywords.update(matcher["contained"][match])
+    rules = matcher["rules"]
+    return sum(rules[k] for k in keywords)
+
+keyword_matcher = build_keyword_matcher(parse_keyword_rules(IMPORTANCE_KEYWORDS))
+internal_domain = MS_USER_EMAIL.rpartition('@')[2].lower()
+
+def parse_timestamp(value):
+    """Parse an ISO 8601 timestamp into epoch seconds (naive values are local time)"""
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+def score_email(email, tier_index, now):
+    """Score one email by sender tier, unread state, recency and keywords"""
+    score = 0.0
+    
+    sender = email.sender
+    if tier_index and contact_matches(tier_index, sender):
+        score += IMPORTANCE_VIP_WEIGHT
+    elif sender and sender.rpartition('@')[2].lower() == internal_domain:
+        score += IMPORTANCE_INTERNAL_WEIGHT
+    
+    if not email.read:
+        score += IMPORTANCE_UNREAD_WEIGHT
+    
+    # Recency decays linearly to zero over the 24 hour window
+    if email.received is not None:
+        age_hours = max(0.0, (now - email.received) / 3600)
+        score += IMPORTANCE_RECENCY_WEIGHT * max(0.0, 1 - age_hours / 24)
+    
+    # One pass over subject and preview together
+    text = f"{email.subject or ''}\n{email.snippet or ''}"
+    score += keyword_score(keyword_matcher, text)
+    return score
+
+def rank_emails(emails, top_k, tier_index=None):
+    """Return the top_k highest scoring emails with their score, using a heap"""
+    now = time.time()
+    scored = ((score_email(email, tier_index, now), i, email) for i, email in enumerate(emails))
+    
+    # Ties go to the earlier (more recent) email
+    top = heapq.nlargest(top_k, scored, key=lambda item: (item[0], -item[1]))
+    return [email.replace(score=round(score, 2)) for score, _, email in top]
+
+# Feed fetching and parsing
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+
+def parse_feed_list(spec):
+    """Parse a topic=url list into [(topic, url)]"""
+    feeds = []
+    for entry in spec.split(","):
+        topic, sep, url = entry.partition("=")
+        if sep and topic.strip() and url.strip():
+            feeds.append((topic.strip(), url.strip()))
+    return feeds
+
+def fetch_feed(url, state):
+    """Fetch a feed with a conditional GET, returning its body or None if unchanged
+    
+    state holds the feed's ETag/Last-Modified (or file mtime) between polls.
+    """
+    if not url.startswith(('http://', 'https://')):
+        path = url[len('file://'):] if url.startswith('file://') else url
+        mtime = os.path.getmtime(path)
+        if state.get('mtime') == mtime:
+            return None
+        with open(path, 'rb') as f:
+            body = f.read()
+        state['mtime'] = mtime
+        return body
+    
+    headers = {}
+    if state.get('etag'):
+        headers['If-None-Match'] = state['etag']
+    if state.get('last_modified'):
+        headers['If-Modified-Since'] = state['last_modified']
+    
+    response = requests.get(url, headers=headers, timeout=FEED_FETCH_TIMEOUT)
+    if response.status_code == 304:
+        return None
+    response.raise_for_status()
+    
+    state['etag'] = response.headers.get('ETag')
+    state['last_modified'] = response.headers.get('Last-Modified')
+    return response.content
+
+def parse_feed_date(value):
+    """Parse an RSS (RFC 822) or Atom (ISO 8601) date into epoch seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def parse_feed(body, topic):
+    """Parse RSS 2.0 or Atom into headline items"""
+    root = ET.fromstring(body)
+    items = []
+    
+    if root.tag == f'{ATOM_NS}feed':
+        source = root.findtext(f'{ATOM_NS}title', '').strip()
+        for entry in root.iter(f'{ATOM_NS}entry'):
+            link = entry.find(f'{ATOM_NS}link[@rel="alternate"]')
+            if link is None:
+                link = entry.find(f'{ATOM_NS}link')
+            items.append({
+                "title": (entry.findtext(f'{ATOM_NS}title') or '').strip(),
+                "url": link.get('href') if link is not None else None,
+                "published": parse_feed_date(entry.findtext(f'{ATOM_NS}published') or entry.findtext(f'{ATOM_NS}updated')),
+                "source": source,
+                "topic": topic
+            })
+    else:
+        channel = root.find('channel')
+        source = channel.findtext('title', '').strip() if channel is not None else ''
+        for item in root.iter('item'):
+            items.append({
+                "title": (item.findtext('title') or '').strip(),
+                "url": (item.findtext('link') or item.findtext('guid') or '').strip() or None,
+                "published": parse_feed_date(item.findtext('pubDate')),
+                "source": source,
+                "topic": topic
+            })
+    
+    # Items without a link can't be deduplicated
+    return [item for item in items if item["url"]]
+
+# Headline store: items by URL hash plus time-sorted indexes, overall and per topic.
+# Each index is a pair of parallel lists (publish times, ids) kept in ascending order.
+# Near-duplicates are collapsed into the first headline of their cluster.
+news_items = {}
+news_index = ([], [])
+news_topic_index = {}
+news_url_owner = {}  # URL hash -> id of the headline that represents it
+news_lsh_buckets = {}  # (band, band values) -> ids of headlines in that bucket
+news_lock = threading.Lock()
+news_feeds = parse_feed_list(NEWS_FEEDS)
+news_feed_state = {url: {} for _, url in news_feeds}
+
+def url_hash(url):
+    return hashlib.sha1(url.encode()).hexdigest()[:16]
+
+# Near-duplicate detection
+MINHASH_PRIME = (1 << 61) - 1
+minhash_rng = random.Random(42)  # Fixed seed so signatures are stable across workers
+minhash_params = [
+    (minhash_rng.randrange(1, MINHASH_PRIME), minhash_rng.randrange(0, MINHASH_PRIME))
+    for _ in range(NEWS_MINHASH_SIZE)
+]
+NEWS_LSH_ROWS = max(1, NEWS_MINHASH_SIZE // NEWS_LSH_BANDS)
+TITLE_STOP_WORDS = frozenset("a an and are as at be by for from has in is it of on or that the to was with".split())
+
+def title_tokens(title):
+    """Normalized title words used as MinHash shingles"""
+    return {w for w in re.findall(r"[a-z0-9]+", title.lower()) if w not in TITLE_STOP_WORDS}
+
+@lru_cache(maxsize=65536)
+def token_minhashes(token):
+    """Hash a token under every permutation (cached, since title vocabulary repeats)"""
+    h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), 'big')
+    return tuple([(a * h + b) % MINHASH_PRIME for a, b in minhash_params])
+
+def minhash_signature(tokens):
+    """MinHash signature of a token set, one minimum per hash permutation"""
+    if not tokens:
+        return None
+    vectors = [token_minhashes(t) for t in tokens]
+    if len(vectors) == 1:
+        return vectors[0]
+    return tuple(map(min, *vectors))
+
+def lsh_keys(signature):
+    """Bucket keys for each band of the signature"""
+    return [
+        (band, signature[band * NEWS_LSH_ROWS:(band + 1) * NEWS_LSH_ROWS])
+        for band in range(NEWS_LSH_BANDS)
+    ]
+
+def find_duplicate(signature):
+    """Find a stored headline for the same story using the LSH buckets"""
+    candidates = set()
+    for key in lsh_keys(signature):
+        candidates.update(news_lsh_buckets.get(key, ()))
+    
+    best_id, best_similarity = None, NEWS_DUPLICATE_THRESHOLD
+    for candidate_id in candidates:
+        other = news_items[candidate_id].signature
+        similarity = sum(x == y for x, y in zip(signature, other)) / len(signature)
+        if similarity >= best_similarity:
+            best_id, best_similarity = candidate_id, similarity
+    return best_id
+
+def index_insert(index, published, item_id):
+    times, ids = index
+    position = bisect.bisect_right(times, published)
+    times.insert(position, published)
+    ids.insert(position, item_id)
+
+def index_remove(index, published, item_id):
+    times, ids = index
+    position = bisect.bisect_left(times, published)
+    while position < len(ids) and ids[position] != item_id:
+        position += 1
+    if position < len(ids):
+        del times[position]
+        del ids[position]
+
+def normalize_feed_item(item, item_id, source, signature):
+    """Build the Headline for a parsed feed item that starts a new cluster"""
+    # Undated items are treated as published when first seen
+    published = item["published"] if item["published"] is not None else time.time()
+    return Headline(
+        id=item_id,
+        title=item["title"],
+        source=source,
+        published_text=datetime.fromtimestamp(published, timezone.utc).isoformat(),
+        published=int(published),
+        url=item["url"],
+        topic=item["topic"],
+        source_count=1,
+        sources=[source],
+        signature=signature,
+        members=[item_id]
+    )
+
+def add_headlines(items):
+    """Add parsed items to the store, skipping duplicates and evicting the oldest past NEWS_MAX_ITEMS"""
+    added = 0
+    with news_lock:
+        for item in items:
+            item_id = url_hash(item["url"])
+            if item_id in news_url_owner:
+                continue
+            
+            source = item["source"] or urlparse(item["url"]).netloc
+            
+            # Collapse the same story from another source into its cluster
+            signature = minhash_signature(title_tokens(item["title"]))
+            duplicate_id = find_duplicate(signature) if signature else None
+            if duplicate_id:
+                cluster = news_items[duplicate_id]
+                cluster.source_count += 1
+                if source not in cluster.sources:
+                    cluster.sources.append(source)
+                cluster.members.append(item_id)
+                news_url_owner[item_id] = duplicate_id
+                continue
+            
+            headline = normalize_feed_item(item, item_id, source, signature)
+            news_items[item_id] = headline
+            news_url_owner[item_id] = item_id
+            index_insert(news_index, headline.published, item_id)
+            index_insert(news_topic_index.setdefault(headline.topic, ([], [])), headline.published, item_id)
+            if signature:
+                for key in lsh_keys(signature):
+                    news_lsh_buckets.setdefault(key, set()).add(item_id)
+            added += 1
+            index_documents("headline", [headline])
+        
+        # Evict the oldest headlines once the store is full
+        while len(news_items) > NEWS_MAX_ITEMS:
+            oldest_id = news_index[1][0]
+            oldest = news_items.pop(oldest_id)
+            del news_index[0][0]
+            del news_index[1][0]
+            index_remove(news_topic_index[oldest.topic], oldest.published, oldest_id)
+            for member_id in oldest.members:
+                news_url_owner.pop(member_id, None)
+            if oldest.signature:
+                for key in lsh_keys(oldest.signature):
+                    bucket = news_lsh_buckets.get(key)
+                    if bucket:
+                        bucket.discard(oldest_id)
+                        if not bucket:
+                            del news_lsh_buckets[key]
+    return added
+
+def poll_feed(topic, url):
+    """Fetch and parse one feed, returning its items (empty if unchanged or failing)"""
+    try:
+        body = fetch_feed(url, news_feed_state.setdefault(url, {}))
+        if body is None:
+            return []
+        return parse_feed(body, topic)
+    except Exception as e:
+        logger.error("Error polling feed %s: %s", url, e)
+        return []
+
+def poll_news_feeds(feeds=None):
+    """Poll all feeds concurrently and add their new items to the store"""
+    feeds = news_feeds if feeds is None else feeds
+    if not feeds:
+        return 0
+    with ThreadPoolExecutor(max_workers=min(FEED_FETCH_WORKERS, len(feeds))) as executor:
+        results = list(executor.map(lambda feed: poll_feed(*feed), feeds))
+    
+    added = 0
+    for items in results:
+        added += add_headlines(items)
+    if added:
+        invalidate_digests()
+    return added
+
+def news_ingestion_loop():
+    while True:
+        try:
+            added = poll_news_feeds()
+            logger.debug("News ingestion added %s headlines (%s stored)", added, len(news_items))
+        except Exception as e:
+            logger.error("Error in news ingestion: %s", e)
+        time.sleep(NEWS_POLL_INTERVAL)
+
+def query_headlines(topics=None, hours=24):
+    """Headlines newer than the cutoff, newest first: a bisect and a slice per index"""
+    cutoff = time.time() - float(hours) * 3600
+    
+    with news_lock:
+        if topics:
+            indexes = [news_topic_index[t] for t in dict.fromkeys(topics) if t in news_topic_index]
+        else:
+            indexes = [news_index]
+        
+        slices = []
+        for times, ids in indexes:
+            start = bisect.bisect_right(times, cutoff)
+            slices.append([(times[i], ids[i]) for i in range(len(ids) - 1, start - 1, -1)])
+        
+        # Topics are disjoint, so merging the newest-first slices keeps the order
+        merged = heapq.merge(*slices, reverse=True) if len(slices) > 1 else (slices[0] if slices else [])
+        # Copies, since ingestion keeps adding sources to the stored clusters
+        return [news_items[item_id].replace(sources=list(news_items[item_id].sources)) for _, item_id in merged]
+
+# YouTube video ingestion
+YT_NS = '{http://www.youtube.com/xml/schemas/2015}'
+MEDIA_NS = '{http://search.yahoo.com/mrss/}'
+
+def load_youtube_channels():
+    """Load [(category, channel_id)] from YOUTUBE_CHANNELS and YOUTUBE_CHANNELS_FILE"""
+    channels = parse_feed_list(YOUTUBE_CHANNELS)
+    if YOUTUBE_CHANNELS_FILE:
+        try:
+            with open(YOUTUBE_CHANNELS_FILE) as f:
+                channels.extend(parse_feed_list(",".join(
+                    line.strip() for line in f if line.strip() and not line.startswith('#')
+                )))
+        except OSError as e:
+            logger.error("Error reading YouTube channels file: %s", e)
+    return channels
+
+def parse_youtube_feed(body, category):
+    """Parse a YouTube channel Atom feed into videos, newest first"""
+    root = ET.fromstring(body)
+    videos = []
+    for entry in root.iter(f'{ATOM_NS}entry'):
+        video_id = entry.findtext(f'{YT_NS}videoId')
+        if not video_id:
+            continue
+        videos.append(normalize_youtube_entry(entry, video_id, category))
+    videos.sort(key=lambda v: v.published, reverse=True)
+    return videos
+
+def normalize_youtube_entry(entry, video_id, category):
+    """Build the Video for a YouTube feed entry"""
+    link = entry.find(f'{ATOM_NS}link')
+    thumbnail = entry.find(f'{MEDIA_NS}group/{MEDIA_NS}thumbnail')
+    published = parse_feed_date(entry.findtext(f'{ATOM_NS}published')) or time.time()
+    return Video(
+        id=video_id,
+        title=(entry.findtext(f'{ATOM_NS}title') or '').strip(),
+        channel=(entry.findtext(f'{ATOM_NS}author/{ATOM_NS}name') or '').strip(),
+        published_text=datetime.fromtimestamp(published, timezone.utc).isoformat(),
+        published=int(published),
+        url=link.get('href') if link is not None else f"https://youtube.com/watch?v={video_id}",
+        thumbnail=thumbnail.get('url') if thumbnail is not None else f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",
+        category=category,
+        channel_id=entry.findtext(f'{YT_NS}channelId')
+    )
+
+# Video store with a time-sorted index for eviction and inverted indexes for filtering.
+# Channel postings are keyed by both channel name and channel id, lowercased.
+video_store = {}
+video_index = ([], [])
+video_channel_postings = {}
+video_category_postings = {}
+video_lock = threading.Lock()
+youtube_channels = load_youtube_channels()
+youtube_feed_state = {}  # channel id -> conditional GET state and last seen video id
+
+def add_posting(postings, key, video_id):
+    if key:
+        postings.setdefault(key.lower(), set()).add(video_id)
+
+def remove_posting(postings, key, video_id):
+    if key:
+        posting = postings.get(key.lower())
+        if posting:
+            posting.discard(video_id)
+            if not posting:
+                del postings[key.lower()]
+
+def add_videos(videos):
+    """Add videos to the store and its indexes, evicting the oldest past YOUTUBE_MAX_VIDEOS"""
+    added = 0
+    with video_lock:
+        for video in videos:
+            if video.id in video_store:
+                continue
+            video_store[video.id] = video
+            index_insert(video_index, video.published, video.id)
+            add_posting(video_channel_postings, video.channel, video.id)
+            add_posting(video_channel_postings, video.channel_id, video.id)
+            add_posting(video_category_postings, video.category, video.id)
+            index_documents("video", [video])
+            added += 1
+        
+        while len(video_store) > YOUTUBE_MAX_VIDEOS:
+            oldest_id = video_index[1][0]
+            oldest = video_store.pop(oldest_id)
+            del video_index[0][0]
+            del video_index[1][0]
+            remove_posting(video_channel_postings, oldest.channel, oldest_id)
+            remove_posting(video_channel_postings, oldest.channel_id, oldest_id)
+            remove_posting(video_category_postings, oldest.category, oldest_id)
+    return added
+
+def poll_youtube_channel(category, channel_id):
+    """Fetch a channel feed, returning only videos newer than the last one seen"""
+    state = youtube_feed_state.setdefault(channel_id, {})
+    try:
+        url = channel_id if channel_id.startswith(('http://', 'https://', 'file://', '/')) else \
+            YOUTUBE_FEED_URL.format(channel_id=channel_id)
+        body = fetch_feed(url, state)
+        if body is None:
+            return []
+        videos = parse_youtube_feed(body, category)
+    except Exception as e:
+        logger.error("Error polling YouTube channel %s: %s", channel_id, e)
+        return []
+    
+    # The feed is newest first, so stop at the last video we already have
+    new_videos = []
+    for video in videos:
+        if video.id == state.get('last_seen'):
+            break
+        new_videos.append(video)
+    if videos:
+        state['last_seen'] = videos[0].id
+    return new_videos
+
+def poll_youtube_channels(channels=None):
+    """Poll all channel feeds concurrently and add their new videos"""
+    channels = youtube_channels if channels is None else channels
+    if not channels:
+        return 0
+    with ThreadPoolExecutor(max_workers=min(FEED_FETCH_WORKERS, len(channels))) as executor:
+        results = list(executor.map(lambda channel: poll_youtube_channel(*channel), channels))
+    return sum(add_videos(videos) for videos in results)
+
+def youtube_ingestion_loop():
+    while True:
+        try:
+            added = poll_youtube_channels()
+            logger.debug("YouTube ingestion added %s videos (%s stored)", added, len(video_store))
+        except Exception as e:
+            logger.error("Error in YouTube ingestion: %s", e)
+        time.sleep(YOUTUBE_POLL_INTERVAL)
+
+def query_videos(channels=None, categories=None):
+    """Filter videos by intersecting the channel and category postings, newest first"""
+    with video_lock:
+        matches = None
+        for names, postings in ((channels, video_channel_postings), (categories, video_category_postings)):
+            if not names:
+                continue
+            # Union of postings within a filter, intersection across filters
+            selected = set()
+            for name in names:
+                selected |= postings.get(name.lower(), set())
+            matches = selected if matches is None else matches & selected
+        
+        if matches is None:
+            video_ids = reversed(video_index[1])
+        else:
+            video_ids = sorted(matches, key=lambda vid: video_store[vid].published, reverse=True)
+        
+        # Stored videos are never modified, so they are returned as they are
+        return [video_store[vid] for vid in video_ids]
+
+# Full-text search index
+# Text fields and timestamp field indexed for each document type
+SEARCH_DOCUMENT_TYPES = {
+    "email": (("subject", "snippet", "sender"), "receivedAt"),
+    "task": (("id", "title", "status", "assignee"), "updated"),
+    "event": (("title", "location", "attendees"), "start"),
+    "headline": (("title", "source", "topic"), "publishedAt"),
+    "video": (("title", "channel", "category"), "publishedAt")
+}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Inverted index: term -> {document key: term frequency}, plus per-document
+# metadata and a time-sorted index used to evict the oldest documents
+search_postings = {}
+search_documents = {}
+search_time_index = ([], [])
+search_lengths = {}  # document key -> token count, kept apart for fast scoring
+search_stats = {"total_length": 0}
+search_lock = threading.Lock()
+
+def search_tokens(text):
+    return [t for t in re.findall(r"\w+", text.lower()) if t not in TITLE_STOP_WORDS]
+
+def document_text(item, text_fields):
+    parts = []
+    for field in text_fields:
+        value = item.get(field)
+        if isinstance(value, list):
+            parts.extend(str(v) for v in value)
+        elif value:
+            parts.append(str(value))
+    return " ".join(parts)
+
+def remove_document(key):
+    """Remove a document from the postings and indexes (caller holds search_lock)"""
+    document = search_documents.pop(key)
+    for term in document["terms"]:
+        posting = search_postings[term]
+        del posting[key]
+        if not posting:
+            del search_postings[term]
+    index_remove(search_time_index, document["time"], key)
+    del search_lengths[key]
+    search_stats["total_length"] -= document["length"]
+
+def search_document_key(doc_type, item_id, user=None):
+    """Documents from a user's mailbox, calendar or project are keyed and searched per user"""
+    return f"{user}/{doc_type}:{item_id}" if user else f"{doc_type}:{item_id}"
+
+def index_documents(doc_type, items, user=None):
+    """Add or refresh provider results in the search index, visible only to user when given"""
+    text_fields, time_field = SEARCH_DOCUMENT_TYPES[doc_type]
+    cutoff = time.time() - SEARCH_MAX_AGE_DAYS * 86400
+    
+    # Unchanged items are skipped and the rest tokenized before taking the lock,
+    # so re-indexing a page that is already indexed doesn't block searches
+    pending = []
+    for item in items:
+        if not item.id:
+            continue
+        key = search_document_key(doc_type, item.id, user)
+        existing = search_documents.get(key)
+        if existing and existing["item"] == item:
+            continue
+        timestamp = item.epoch(time_field) or time.time()
+        if timestamp >= cutoff:
+            pending.append((key, item, timestamp, search_tokens(document_text(item, text_fields))))
+    if not pending:
+        return
+    
+    with search_lock:
+        for key, item, timestamp, tokens in pending:
+            if key in search_documents:
+                remove_document(key)
+            
+            frequencies = {}
+            for token in tokens:
+                frequencies[token] = frequencies.get(token, 0) + 1
+            for term, frequency in frequencies.items():
+                search_postings.setdefault(term, {})[key] = frequency
+            
+            search_documents[key] = {
+                "type": doc_type,
+                "user": user,
+                "item": item,
+                "terms": tuple(frequencies),
+                "length": len(tokens),
+                "time": timestamp
+            }
+            index_insert(search_time_index, timestamp, key)
+            search_lengths[key] = len(tokens)
+            search_stats["total_length"] += len(tokens)
+        
+        # Evict documents past the age limit, then the oldest past the size limit
+        times, keys = search_time_index
+        while keys and (times[0] < cutoff or len(search_documents) > SEARCH_MAX_DOCUMENTS):
+            remove_document(keys[0])
+
+def search_index(query, types=None, limit=10, user=None):
+    """Rank the shared documents and the user's own for the query with BM25, returning the top matches"""
+    terms = set(search_tokens(query))
+    with search_lock:
+        document_count = len(search_documents)
+        if not terms or not document_count:
+            return []
+        average_length = search_stats["total_length"] / document_count or 1
+        
+        documents = search_documents
+        lengths = search_lengths
+        weighted = []
+        for term in terms:
+            posting = search_postings.get(term)
+            if posting:
+                weighted.append((posting, math.log(1 + (document_count - len(posting) + 0.5) / (len(posting) + 0.5))))
+        
+        # MaxScore: a term adds less than idf * (k1 + 1) to any document. Scoring rare terms
+        # first, once the top `limit` scores reach what the remaining terms could add at most,
+        # unscored documents can't enter the top and common postings are only probed for
+        # documents already scored
+        weighted.sort(key=lambda entry: len(entry[0]))
+        remaining = sum(idf for _, idf in weighted) * (BM25_K1 + 1)
+        scores = {}
+        for posting, idf in weighted:
+            if len(scores) >= limit > 0 and len(posting) > len(scores) and \
+                    heapq.nlargest(limit, scores.values())[-1] >= remaining:
+                entries = [(key, posting[key]) for key in scores if key in posting]
+            else:
+                entries = [
+                    (key, frequency) for key, frequency in posting.items()
+                    if documents[key]["user"] in (None, user) and (not types or documents[key]["type"] in types)
+                ]
+            remaining -= idf * (BM25_K1 + 1)
+            
+            for key, frequency in entries:
+                length_norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[key] / average_length)
+                scores[key] = scores.get(key, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + length_norm)
+        
+        top = heapq.nlargest(limit, scores.items(), key=lambda entry: entry[1])
+        return [
+            {"type": documents[key]["type"], "score": round(score, 3), "item": documents[key]["item"]}
+            for key, score in top
+        ]
+
+# Mock data providers
+def get_youtube_videos(channels=None, categories=None):
+    # Serve from the polled channel feeds when they are configured
+    if youtube_channels:
+        channel_list = [ch.strip() for ch in channels.split(",")] if channels else None
+        category_list = [cat.strip() for cat in categories.split(",")] if categories else None
+        return query_videos(channel_list, category_list)
+    
+    videos = [
+        {
+            "id": "video1",
+            "title": "Latest Tech Trends 2023",
+            "channel": "TechWorld",
+            "publishedAt": (datetime.now() - timedelta(hours=3)).isoformat(),
+            "url": "https://youtube.com/watch?v=abc123",
+            "thumbnail": "https://i.ytimg.com/vi/abc123/hqdefault.jpg",
+            "category": "tech"
+        },
+        {
+            "id": "video2",
+            "title": "Breaking News: Market Update",
+            "channel": "FinanceToday",
+            "publishedAt": (datetime.now() - timedelta(hours=5)).isoformat(),
+            "url": "https://youtube.com/watch?v=def456",
+            "thumbnail": "https://i.ytimg.com/vi/def456/hqdefault.jpg",
+            "category": "finance"
+        },
+        {
+            "id": "video3",
+            "title": "New Music Release Roundup",
+            "channel": "MusicTrends",
+            "publishedAt": (datetime.now() - timedelta(hours=8)).isoformat(),
+            "url": "https://youtube.com/watch?v=ghi789",
+            "thumbnail": "https://i.ytimg.com/vi/ghi789/hqdefault.jpg",
+            "category": "music"
+        }
+    ]
+    
+    filtered_videos = [Video.from_dict(v) for v in videos]
+    
+    if channels:
+        channel_list = [ch.strip() for ch in channels.split(",")]
+        filtered_videos = [v for v in filtered_videos if v.channel in channel_list]
+    
+    if categories:
+        category_list = [cat.strip() for cat in categories.split(",")]
+        filtered_videos = [v for v in filtered_videos if v.category in category_list]
+    
+    return filtered_videos
+
+def get_news_headlines(topics=None, hours=24):
+    # Serve from the ingested feeds when they are configured
+    if news_feeds:
+        topic_list = [t.strip() for t in topics.split(",")] if topics else None
+        return query_headlines(topic_list, hours)
+    
+    news = [
+        {
+            "id": "news1",
+            "title": "New AI Breakthrough Announced",
+            "source": "Tech Times",
+            "publishedAt": (datetime.now() - timedelta(hours=2)).isoformat(),
+            "url": "https://techtimes.com/ai-breakthrough",
+            "topic": "technology"
+        },
+        {
+            "id": "news2",
+            "title": "Housing Market Shows Signs of Recovery",
+            "source": "Economy Daily",
+            "publishedAt": (datetime.now() - timedelta(hours=6)).isoformat(),
+            "url": "https://economydaily.com/housing-recovery",
+            "topic": "real estate"
+        },
+        {
+            "id": "news3",
+            "title": "Central Bank Announces New Interest Rates",
+            "source": "Financial Post",
+            "publishedAt": (datetime.now() - timedelta(hours=10)).isoformat(),
+            "url": "https://financialpost.com/interest-rates",
+            "topic": "economy"
+        }
+    ]
+    
+    # Filter by publication time
+    cutoff = time.time() - int(hours) * 3600
+    filtered_news = [n for n in map(Headline.from_dict, news) if n.published > cutoff]
+    
+    # Filter by topics if provided
+    if topics:
+        topic_list = [t.strip() for t in topics.split(",")]
+        filtered_news = [n for n in filtered_news if n.topic in topic_list]
+    
+    return filtered_news
+
+def jira_generation(project_key):
+    """Current Jira cache generation; bumping it retires every cached JQL result for the project"""
+    # A missing generation starts a new one, so an evicted key can't revive old results
+    return cache.get_or_compute(cache_key('jira-generation', project_key), 30 * 86400, time.time_ns)
+
+def bump_jira_generation(project_key):
+    cache.save(cache_key('jira-generation', project_key), time.time_ns(), 30 * 86400)
+
+JIRA_PROJECT_KEY_PATTERN = re.compile(r'^[A-Z][A-Z0-9_]{0,49}$')
+jira_executor = ThreadPoolExecutor(max_workers=JIRA_FETCH_WORKERS, thread_name_prefix="jira-fetch")
+
+def parse_project_keys(projects_param):
+    """Parse a projects= parameter into a list of Jira project keys, or an error"""
+    if not projects_param:
+        return None, None
+    keys = list(dict.fromkeys(p.strip().upper() for p in projects_param.split(",") if p.strip()))
+    # Keys are written into JQL, so only plain project keys are accepted
+    invalid = [k for k in keys if not JIRA_PROJECT_KEY_PATTERN.match(k)]
+    if invalid:
+        return None, {"error": f"Invalid project keys: {', '.join(invalid)}"}
+    if len(keys) > JIRA_MAX_PROJECTS:
+        return None, {"error": f"At most {JIRA_MAX_PROJECTS} projects per request"}
+    return keys or None, None
+
+def task_jql(project_key):
+    return f"project = {project_key} AND status in ('TO DO', 'IN PROGRESS') ORDER BY updated DESC"
+
+def search_project_issues(jira_client, project_key, jira_fields, offset, limit):
+    """One page of a project's open issues, shared with other nodes through the cache"""
+    jql = task_jql(project_key)
+    logger.debug("Executing Jira JQL query: %s", jql)
+    # With webhooks and a shared cache, issue events retire cached results on every worker and the
+    # TTL is only a slow reconciliation sweep. A per-process cache only hears about the events it receives.
+    return cache.get_or_compute(
+        cache_key('jira', project_key, jira_generation(project_key), query_fingerprint(jql, jira_fields, offset, int(limit))),
+        JIRA_RECONCILE_INTERVAL if JIRA_WEBHOOK_SECRET and cache_is_shared() else JIRA_CACHE_TTL,
+        lambda: jira_client.jql(jql, fields=jira_fields, start=offset, limit=int(limit))
+    )
+
+def issue_recency(issue):
+    """Merge key matching ORDER BY updated DESC"""
+    return -(parse_timestamp((issue.get('fields') or {}).get('updated')) or 0)
+
+def merge_project_tasks(jira_client, project_keys, jira_fields, offset, limit):
+    """Search the projects concurrently and k-way merge their newest-first results
+    
+    Each project only needs its first offset + limit issues. The merge is lazy,
+    so it stops after the page and only those issues are turned into Tasks.
+    """
+    wanted = offset + int(limit)
+    # The merge orders by updated, so it's fetched even when the response leaves it out
+    if 'updated' not in jira_fields:
+        jira_fields = jira_fields + ['updated']
+    futures = {
+        project_key: jira_executor.submit(search_project_issues, jira_client, project_key, jira_fields, 0, wanted)
+        for project_key in project_keys
+    }
+    
+    streams = []
+    for project_key, future in futures.items():
+        try:
+            streams.append((future.result() or {}).get('issues', []))
+        except Exception as e:
+            # One unreachable project shouldn't hide the others
+            logger.error("Error fetching Jira tasks for %s: %s", project_key, e)
+    
+    merged = heapq.merge(*streams, key=issue_recency)
+    return [normalize_jira_issue(issue) for issue in itertools.islice(merged, offset, wanted)]
+
+def get_jira_tasks(limit=5, fields=None, offset=0, user=None, projects=None):
+    """Get Jira tasks that are To Do or In Progress in the user's project, or across projects"""
+    project_key = projects[0] if projects else users.get(user or MS_USER_EMAIL, JIRA_PROJECT_KEY)
+    jira_client = get_jira_client()
+    
+    # If Jira client is not initialized, return mock data
+    if not jira_client:
+        logger.debug("Using mock Jira data as Jira client is not initialized")
+        tasks = [
+            {
+                "id": "PROJ-123",
+                "title": "Implement new user authentication flow",
+                "status": "In Progress",
+                "priority": "High",
+                "assignee": "John Smith",
+                "updated": (datetime.now() - timedelta(days=1)).isoformat()
+            },
+            {
+                "id": "PROJ-124",
+                "title": "Fix payment processing bug",
+                "status": "To Do",
+                "priority": "Critical",
+                "assignee": "John Smith",
+                "updated": (datetime.now() - timedelta(days=2)).isoformat()
+            },
+            {
+                "id": "PROJ-125",
+                "title": "Update documentation for API v2",
+                "status": "To Do",
+                "priority": "Medium",
+                "assignee": "John Smith",
+                "updated": (datetime.now() - timedelta(hours=12)).isoformat()
+            },
+            {
+                "id": "PROJ-126",
+                "title": "Optimize database queries",
+                "status": "In Progress",
+                "priority": "High",
+                "assignee": "John Smith",
+                "updated": (datetime.now() - timedelta(hours=6)).isoformat()
+            },
+            {
+                "id": "PROJ-127",
+                "title": "Implement dark mode for mobile app",
+                "status": "To Do",
+                "priority": "Low",
+                "assignee": "John Smith",
+                "updated": (datetime.now() - timedelta(days=3)).isoformat()
+            }
+        ]
+        
+        # Only return tasks that are To Do or In Progress
+        filtered_tasks = [t for t in map(Task.from_dict, tasks) if t.status in ["To Do", "In Progress"]]
+        
+        # Limit the number of tasks returned
+        return filtered_tasks[offset:offset + int(limit)]
+    
+    try:
+        # Only fetch the fields needed for the response
+        jira_fields = upstream_fields(fields, TASK_FIELDS)
+        
+        if projects and len(projects) > 1:
+            return merge_project_tasks(jira_client, projects, jira_fields, offset, limit)
+        
+        # The diagnostics call Jira several times, so only run them in debug mode
+        if DEBUG:
+            logger.debug("=== JIRA DIAGNOSTIC INFORMATION ===")
+            logger.debug("Jira URL: %s", JIRA_URL)
+            logger.debug("Project Key: %s", project_key)
+            
             # Check if we can get a simple list of projects
             try:
-                print("\nChecking accessible projects...")
+                logger.debug("Checking accessible projects...")
                 projects = jira_client.projects()
-                print(f"Number of accessible projects: {len(projects)}")
+                logger.debug("Number of accessible projects: %s", len(projects))
                 for proj in projects:
-                    print(f"  - {proj.get('key', 'Unknown')} ({proj.get('name', 'Unknown')})")
+                    logger.debug("- %s (%s)", proj.get('key', 'Unknown'), proj.get('name', 'Unknown'))
             except Exception as e:
-                print(f"Error getting projects: {str(e)}")
+                logger.debug("Error getting projects: %s", e)
             
             # Get all issues with simplest query to verify basic access
             try:
-                print("\nTrying to get any issues from the project...")
-                simple_jql = f"project = {JIRA_PROJECT_KEY}"
-                print(f"Query: {simple_jql}")
+                logger.debug("Trying to get any issues from the project...")
+                simple_jql = f"project = {project_key}"
+                logger.debug("Query: %s", simple_jql)
                 simple_issues = jira_client.jql(simple_jql, limit=5)
-                print(f"Number of issues found: {len(simple_issues.get('issues', []))}")
+                logger.debug("Number of issues found: %s", len(simple_issues.get('issues', [])))
                 
                 if len(simple_issues.get('issues', [])) > 0:
-                    print("First issue details:")
+                    logger.debug("First issue details:")
                     first_issue = simple_issues['issues'][0]
-                    print(f"  Key: {first_issue.get('key')}")
+                    logger.debug("Key: %s", first_issue.get('key'))
                     fields = first_issue.get('fields', {})
-                    print(f"  Summary: {fields.get('summary', 'No summary')}")
+                    logger.debug("Summary: %s", fields.get('summary', 'No summary'))
                     if fields.get('status'):
-                        print(f"  Status: {fields['status'].get('name', 'Unknown')}")
+                        logger.debug("Status: %s", fields['status'].get('name', 'Unknown'))
                     
                     # Collect all statuses from returned issues
                     statuses = set()
@@ -274,20 +2094,20 @@ def get_jira_tasks(limit=5):
                         if fields.get('status') and fields['status'].get('name'):
                             statuses.add(fields['status'].get('name'))
                     
-                    print(f"Statuses found in results: {', '.join(statuses)}")
+                    logger.debug("Statuses found in results: %s", ', '.join(statuses))
                 else:
-                    print("No issues found with simple query - there might be an access issue.")
+                    logger.debug("No issues found with simple query - there might be an access issue.")
             except Exception as e:
-                print(f"Error with simple query: {str(e)}")
+                logger.debug("Error with simple query: %s", e)
             
             # Get all statuses from the instance
             try:
                 statuses = jira_client.get_all_statuses()
-                print("\nAll available statuses in Jira:")
+                logger.debug("All available statuses in Jira:")
                 for status in statuses:
-                    print(f"  - {status.get('name')} (id: {status.get('id')})")
+                    logger.debug("- %s (id: %s)", status.get('name'), status.get('id'))
             except Exception as e:
-                print(f"Error getting statuses: {str(e)}")
+                logger.debug("Error getting statuses: %s", e)
             
             # Try different capitalization and variations on status names
             status_variations = [
@@ -298,62 +2118,55 @@ def get_jira_tasks(limit=5):
                 "('ToDo', 'InProgress')"
             ]
             
-            print("\nTrying different status name variations...")
+            logger.debug("Trying different status name variations...")
             for status_var in status_variations:
-                test_jql = f"project = {JIRA_PROJECT_KEY} AND status in {status_var} ORDER BY updated DESC"
-                print(f"Testing: {test_jql}")
+                test_jql = f"project = {project_key} AND status in {status_var} ORDER BY updated DESC"
+                logger.debug("Testing: %s", test_jql)
                 try:
                     test_issues = jira_client.jql(test_jql, limit=5)
                     count = len(test_issues.get('issues', []))
-                    print(f"  Results: {count} issues found")
+                    logger.debug("Results: %s issues found", count)
                     if count > 0:
-                        print("  SUCCESS! Found issues with this variation.")
-                        print(f"  First issue: {test_issues['issues'][0].get('key')}")
+                        logger.debug("SUCCESS! Found issues with this variation.")
+                        logger.debug("First issue: %s", test_issues['issues'][0].get('key'))
                         # Use this variation for our actual query
                         jql = test_jql
                         break
                 except Exception as e:
-                    print(f"  Error: {str(e)}")
+                    logger.debug("Error: %s", e)
             
-            print("\n=== END DIAGNOSTIC INFORMATION ===\n")
-        
-        # JQL to get all tasks in the project that are To Do or In Progress
-        jql = f"project = {JIRA_PROJECT_KEY} AND status in ('TO DO', 'IN PROGRESS') ORDER BY updated DESC"
-        
-        if DEBUG:
-            print(f"Executing Jira JQL query: {jql}")
+            logger.debug("=== END DIAGNOSTIC INFORMATION ===")
         
-        # Get issues from Jira
-        issues = jira_client.jql(jql, limit=int(limit))
+        # Get the tasks in the project that are To Do or In Progress
+        issues = search_project_issues(jira_client, project_key, jira_fields, offset, limit)
         
-        if DEBUG:
-            print(f"Jira returned {len(issues.get('issues', []))} issues")
+        logger.debug("Jira returned %s issues", len(issues.get('issues', [])))
         
         # If no issues found, try with a more permissive query
         if len(issues.get('issues', [])) == 0 and DEBUG:
-            print("No issues found. Checking Jira project and status names...")
+            logger.debug("No issues found. Checking Jira project and status names...")
             
             # Check if the project exists
             try:
-                project_data = jira_client.project(JIRA_PROJECT_KEY)
-                print(f"Project {JIRA_PROJECT_KEY} exists: {project_data.get('name', 'Unknown')}")
+                project_data = jira_client.project(project_key)
+                logger.debug("Project %s exists: %s", project_key, project_data.get('name', 'Unknown'))
             except Exception as e:
-                print(f"Error getting project: {str(e)}")
+                logger.debug("Error getting project: %s", e)
             
             # Get available statuses
             try:
                 statuses = jira_client.get_all_statuses()
-                print("Available statuses in Jira:")
+                logger.debug("Available statuses in Jira:")
                 for status in statuses:
-                    print(f"  - {status.get('name')} (id: {status.get('id')})")
+                    logger.debug("- %s (id: %s)", status.get('name'), status.get('id'))
                 
                 # Try more permissive query
-                jql_permissive = f"project = {JIRA_PROJECT_KEY}"
-                print(f"Trying more permissive query: {jql_permissive}")
+                jql_permissive = f"project = {project_key}"
+                logger.debug("Trying more permissive query: %s", jql_permissive)
                 issues_permissive = jira_client.jql(jql_permissive, limit=10)
                 
                 if len(issues_permissive.get('issues', [])) > 0:
-                    print(f"Found {len(issues_permissive.get('issues', []))} issues with permissive query")
+                    logger.debug("Found %s issues with permissive query", len(issues_permissive.get('issues', [])))
                     # Extract status names from actual issues
                     statuses_in_project = set()
                     for issue in issues_permissive.get('issues', []):
@@ -361,82 +2174,68 @@ def get_jira_tasks(limit=5):
                         if fields.get('status') and fields['status'].get('name'):
                             statuses_in_project.add(fields['status']['name'])
                     
-                    print(f"Statuses used in this project: {', '.join(statuses_in_project)}")
+                    logger.debug("Statuses used in this project: %s", ', '.join(statuses_in_project))
                     
                     # Try with exact status names found
                     if statuses_in_project:
                         status_clause = " OR ".join([f"status = '{status}'" for status in statuses_in_project 
                                                  if "do" in status.lower() or "progress" in status.lower()])
                         if status_clause:
-                            jql_fixed = f"project = {JIRA_PROJECT_KEY} AND ({status_clause}) ORDER BY updated DESC"
-                            print(f"Trying with exact status names: {jql_fixed}")
-                            issues = jira_client.jql(jql_fixed, limit=int(limit))
-                            print(f"Found {len(issues.get('issues', []))} issues with fixed status query")
+                            jql_fixed = f"project = {project_key} AND ({status_clause}) ORDER BY updated DESC"
+                            logger.debug("Trying with exact status names: %s", jql_fixed)
+                            issues = jira_client.jql(jql_fixed, fields=jira_fields, start=offset, limit=int(limit))
+                            logger.debug("Found %s issues with fixed status query", len(issues.get('issues', [])))
             except Exception as e:
-                print(f"Error getting statuses: {str(e)}")
+                logger.debug("Error getting statuses: %s", e)
         
         # Transform Jira issues to our response format
-        tasks = []
-        for issue in issues.get('issues', []):
-            # Extract fields from the Jira issue
-            issue_key = issue.get('key')
-            fields = issue.get('fields', {})
-            
-            # Get priority
-            priority = "Medium"
-            if fields.get('priority'):
-                priority = fields['priority'].get('name', "Medium")
-            
-            # Get assignee
-            assignee = "Unassigned"
-            if fields.get('assignee'):
-                assignee = fields['assignee'].get('displayName', "Unassigned")
-            
-            # Get status
-            status = "To Do"
-            if fields.get('status'):
-                status = fields['status'].get('name', "To Do")
-            
-            # Get updated date - handle date format
-            updated = datetime.now().isoformat()
-            if fields.get('updated'):
-                try:
-                    # Jira uses format like "2023-10-23T15:23:30.123+0000"
-                    updated_str = fields['updated']
-                    # Convert to datetime and back to ISO format
-                    updated = datetime.fromisoformat(updated_str.replace('Z', '+00:00')).isoformat()
-                except:
-                    pass
-            
-            # Create task object
-            task = {
-                "id": issue_key,
-                "title": fields.get('summary', 'No Title'),
-                "status": status,
-                "priority": priority,
-                "assignee": assignee,
-                "updated": updated
-            }
-            
-            tasks.append(task)
-        
-        return tasks
+        return [normalize_jira_issue(issue) for issue in issues.get('issues', [])]
     
     except Exception as e:
-        if DEBUG:
-            print(f"Error fetching Jira tasks: {str(e)}")
+        logger.error("Error fetching Jira tasks: %s", e)
         # Return empty list if there's an error
         return []
 
-def get_important_emails(priority_contacts=None):
-    """Get important emails using Microsoft Graph API"""
+def normalize_jira_issue(issue):
+    """Build the Task for a Jira search result issue"""
+    fields = issue.get('fields', {})
+    
+    # Jira uses a format like "2023-10-23T15:23:30.123+0000"
+    updated_text = datetime.now().isoformat()
+    if fields.get('updated'):
+        try:
+            updated_text = datetime.fromisoformat(fields['updated'].replace('Z', '+00:00')).isoformat()
+        except ValueError:
+            pass
+    updated = parse_timestamp(updated_text) or time.time()
+    
+    return Task(
+        id=issue.get('key'),
+        title=fields.get('summary', 'No Title'),
+        status=(fields.get('status') or {}).get('name', "To Do"),
+        priority=(fields.get('priority') or {}).get('name', "Medium"),
+        assignee=(fields.get('assignee') or {}).get('displayName', "Unassigned"),
+        updated_text=updated_text,
+        updated=int(updated)
+    )
+
+def get_important_emails(priority_contacts=None, fields=None, offset=None, limit=None, as_of=None, vip=False, user=None):
+    """Get important emails using Microsoft Graph API
+    
+    When offset and limit are given, returns that page of the 24 hours up to
+    as_of (epoch seconds), so later pages are not shifted by newly arrived mail.
+    With vip=True, senders on the PRIORITY_CONTACTS_FILE list are included.
+    user selects the mailbox, MS_USER_EMAIL by default.
+    """
+    
+    contact_index = get_contact_index(priority_contacts, vip)
     
     # Get access token for Microsoft Graph API
     access_token = get_ms_graph_token()
     
     # If no token, return mock data
     if not access_token:
-        print("Using mock email data as Microsoft Graph is not configured")
+        logger.info("Using mock email data as Microsoft Graph is not configured")
         emails = [
             {
                 "id": "email1",
@@ -465,14 +2264,15 @@ def get_important_emails(priority_contacts=None):
         ]
         
         # Only show emails from the last 24 hours
-        cutoff_time = datetime.now() - timedelta(hours=24)
-        filtered_emails = [e for e in emails if datetime.fromisoformat(e["receivedAt"]) > cutoff_time]
+        cutoff = time.time() - 24 * 3600
+        filtered_emails = [e for e in map(Email.from_dict, emails) if e.received > cutoff]
         
         # Filter by priority contacts if provided
-        if priority_contacts:
-            contact_list = [contact.strip() for contact in priority_contacts.split(",")]
-            filtered_emails = [e for e in filtered_emails if e["sender"] in contact_list]
+        if contact_index:
+            filtered_emails = [e for e in filtered_emails if contact_matches(contact_index, e.sender)]
         
+        if offset is not None:
+            return filtered_emails[offset:offset + limit]
         return filtered_emails
     
     try:
@@ -483,7 +2283,7 @@ def get_important_emails(priority_contacts=None):
         }
         
         # Calculate date filter for last 24 hours
-        now = datetime.utcnow()
+        now = datetime.utcfromtimestamp(as_of) if as_of else datetime.utcnow()
         yesterday = (now - timedelta(hours=24)).strftime('%Y-%m-%dT%H:%M:%SZ')
         
         # Build the query
@@ -491,208 +2291,1517 @@ def get_important_emails(priority_contacts=None):
             '$top': 50,  # Limit to 50 emails
             '$orderby': 'receivedDateTime desc',
             '$filter': f"receivedDateTime ge {yesterday}",
-            '$select': 'id,subject,receivedDateTime,isRead,bodyPreview,from'
+            '$select': ','.join(upstream_fields(fields, EMAIL_FIELDS))
         }
         
+        # Page through the window with $skip, pinned to as_of
+        if offset is not None:
+            query_params['$top'] = limit
+            query_params['$skip'] = offset
+            query_params['$filter'] += f" and receivedDateTime le {now.strftime('%Y-%m-%dT%H:%M:%SZ')}"
+        
+        messages_url = f'https://graph.microsoft.com/v1.0/users/{user or MS_USER_EMAIL}/messages'
+        
         # Handle priority contacts filter if provided
-        if priority_contacts:
-            contact_list = [contact.strip() for contact in priority_contacts.split(",")]
-            contact_filters = []
-            for contact in contact_list:
-                contact_filters.append(f"from/emailAddress/address eq '{contact}'")
-            
-            if contact_filters:
-                contact_filter = " or ".join(contact_filters)
+        if contact_index:
+            contact_filter = contact_odata_filter(contact_index)
+            if contact_filter:
                 query_params['$filter'] = f"({query_params['$filter']}) and ({contact_filter})"
+            else:
+                # Too many contacts or wildcards for Graph: scan the window and match senders locally
+                return filter_messages_locally(messages_url, headers, query_params, contact_index, offset, limit)
         
         # Make the request to MS Graph API
         response = requests.get(
-            f'https://graph.microsoft.com/v1.0/users/{MS_USER_EMAIL}/messages',
+            messages_url,
             headers=headers,
             params=query_params
         )
         
-        if response.status_code == 200:
-            data = response.json()
-            emails = []
-            
-            for msg in data.get('value', []):
-                # Get sender email
-                sender_email = None
-                if msg.get('from') and msg['from'].get('emailAddress'):
-                    sender_email = msg['from']['emailAddress'].get('address')
-                
-                # Create email object
-                email = {
-                    "id": msg.get('id'),
-                    "subject": msg.get('subject', '(No Subject)'),
-                    "sender": sender_email,
-                    "receivedAt": msg.get('receivedDateTime'),
-                    "read": msg.get('isRead', False),
-                    "snippet": msg.get('bodyPreview', '')
-                }
-                
-                emails.append(email)
-            
-            return emails
+        if response.status_code == 200:
+            data = response.json()
+            return [normalize_graph_message(msg) for msg in data.get('value', [])]
+        else:
+            logger.error("Error fetching emails: %s %s", response.status_code, response.text)
+            return []
+    
+    except Exception as e:
+        logger.error("Exception while fetching emails: %s", e)
+        return []
+
+def normalize_graph_message(msg):
+    """Build the Email for a Graph message"""
+    # Get sender email
+    sender_email = None
+    if msg.get('from') and msg['from'].get('emailAddress'):
+        sender_email = msg['from']['emailAddress'].get('address')
+    
+    received = parse_timestamp(msg.get('receivedDateTime'))
+    return Email(
+        id=msg.get('id'),
+        subject=msg.get('subject', '(No Subject)'),
+        sender=sender_email,
+        received_text=msg.get('receivedDateTime'),
+        received=int(received) if received is not None else None,
+        read=msg.get('isRead', False),
+        snippet=msg.get('bodyPreview', '')
+    )
+
+def filter_messages_locally(url, headers, query_params, contact_index, offset=None, limit=None):
+    """Page through messages following @odata.nextLink, keeping those from priority contacts"""
+    # Skip offset matches and stop as soon as the page (or the default 50) is full
+    wanted = (offset or 0) + (limit or query_params['$top'])
+    params = dict(query_params)
+    params.pop('$skip', None)
+    params['$top'] = 100
+    if '$select' in params and 'from' not in params['$select'].split(','):
+        params['$select'] += ',from'
+    
+    matched = []
+    pages = 0
+    while url and pages < MAX_LOCAL_FILTER_PAGES and len(matched) < wanted:
+        response = requests.get(url, headers=headers, params=params)
+        if response.status_code != 200:
+            logger.error("Error fetching emails: %s %s", response.status_code, response.text)
+            break
+        
+        data = response.json()
+        for msg in data.get('value', []):
+            sender = (msg.get('from') or {}).get('emailAddress', {}).get('address')
+            if contact_matches(contact_index, sender):
+                matched.append(normalize_graph_message(msg))
+                if len(matched) >= wanted:
+                    break
+        
+        # The next link already carries the query parameters
+        url = data.get('@odata.nextLink')
+        params = None
+        pages += 1
+    
+    return matched[offset or 0:wanted]
+
+def get_calendar_events(start_date, end_date, fields=None, offset=None, limit=None, user=None, strict=False):
+    """Get calendar events from the user's calendar (MS_USER_EMAIL by default) using Microsoft Graph API
+    
+    With strict=True, returns None instead of an empty list when Graph can't be
+    read, for callers that must not mistake a failure for a free calendar.
+    """
+    
+    # Parse input dates
+    try:
+        start = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
+        end = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+    except ValueError:
+        # Try parsing as date only format (YYYY-MM-DD)
+        try:
+            start = datetime.strptime(start_date, "%Y-%m-%d")
+            end = datetime.strptime(end_date, "%Y-%m-%d")
+        except ValueError:
+            return {"error": "Invalid date format. Use ISO 8601 format (e.g., 2023-12-25 or 2023-12-25T14:30:00)."}
+    
+    if utc_epoch(end) - utc_epoch(start) > CALENDAR_MAX_RANGE_DAYS * 86400:
+        return {"error": f"The date range can span at most {CALENDAR_MAX_RANGE_DAYS} days."}
+    
+    # Get access token for Microsoft Graph API
+    access_token = get_ms_graph_token()
+    
+    # If no token, return mock data
+    if not access_token:
+        logger.info("Using mock calendar data as Microsoft Graph is not configured")
+        events = [
+            {
+                "id": "event1",
+                "title": "Team Stand-up",
+                "start": datetime(start.year, start.month, start.day, 10, 0).isoformat(),
+                "end": datetime(start.year, start.month, start.day, 10, 30).isoformat(),
+                "location": "Conference Room A",
+                "attendees": ["john@company.com", "mary@company.com"]
+            },
+            {
+                "id": "event2",
+                "title": "Client Meeting",
+                "start": datetime(start.year, start.month, start.day, 14, 0).isoformat(),
+                "end": datetime(start.year, start.month, start.day, 15, 30).isoformat(),
+                "location": "Virtual",
+                "attendees": ["client@example.com", "manager@company.com"]
+            },
+            {
+                "id": "event3",
+                "title": "Project Review",
+                "start": datetime(end.year, end.month, end.day, 11, 0).isoformat(),
+                "end": datetime(end.year, end.month, end.day, 12, 0).isoformat(),
+                "location": "Conference Room B",
+                "attendees": ["team@company.com"]
+            }
+        ]
+        
+        # Filter events within the date range
+        window_start, window_end = utc_epoch(start), utc_epoch(end)
+        filtered_events = [
+            e for e in map(Event.from_dict, events) if
+            e.start >= window_start and
+            e.end <= window_end
+        ]
+        
+        if offset is not None:
+            return filtered_events[offset:offset + limit]
+        return filtered_events
+    
+    try:
+        headers = {
+            'Authorization': f'Bearer {access_token}',
+            'Content-Type': 'application/json'
+        }
+        
+        select = upstream_fields(fields, EVENT_FIELDS)
+        window_start, window_end = utc_epoch(start), utc_epoch(end)
+        
+        # Fetch missing chunks of the range and stitch them with the cached ones
+        events = get_calendar_occurrences(headers, window_start, window_end, select, user or MS_USER_EMAIL)
+        if events is None:
+            return None if strict else []
+        
+        # Page through the expanded range
+        if offset is not None:
+            return events[offset:offset + limit]
+        return events
+    
+    except Exception as e:
+        logger.error("Exception while fetching calendar events: %s", e)
+        return None if strict else []
+
+def normalize_graph_event(event):
+    """Build the Event for a Graph event"""
+    # Get attendees
+    attendee_emails = []
+    for attendee in event.get('attendees', []):
+        if attendee.get('emailAddress') and attendee['emailAddress'].get('address'):
+            attendee_emails.append(attendee['emailAddress']['address'])
+    
+    # Get location
+    location = "No location"
+    if event.get('location') and event['location'].get('displayName'):
+        location = event['location']['displayName']
+    
+    # calendarView returns times in UTC
+    start_text = event.get('start', {}).get('dateTime')
+    end_text = event.get('end', {}).get('dateTime')
+    event_start = utc_epoch(start_text)
+    event_end = utc_epoch(end_text)
+    if event_end is None:
+        event_end = event_start
+    
+    return Event(
+        id=event.get('id'),
+        title=event.get('subject', '(No Title)'),
+        start_text=start_text,
+        start=int(event_start) if event_start is not None else None,
+        end_text=end_text,
+        end=int(event_end) if event_end is not None else None,
+        location=location,
+        attendees=attendee_emails,
+        series_id=event.get('seriesMasterId')
+    )
+
+def utc_epoch(value):
+    """Epoch seconds for a datetime or ISO string, treating naive values as UTC"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def fetch_graph_pages(url, headers, params, description):
+    """Get every item from a Graph collection, following @odata.nextLink"""
+    items = []
+    while url:
+        response = requests.get(url, headers=headers, params=params)
+        if response.status_code != 200:
+            logger.error("Error fetching %s: %s %s", description, response.status_code, response.text)
+            return None
+        
+        data = response.json()
+        items.extend(data.get('value', []))
+        
+        # The next link already carries the query parameters
+        url = data.get('@odata.nextLink')
+        params = None
+    return items
+
+# Expanded calendar chunks live in the shared cache, keyed by chunk start and $select.
+# Chunks are aligned to Mondays so overlapping and sliding ranges share them.
+CALENDAR_CHUNK_ORIGIN = 4 * 86400  # 1970-01-05, a Monday
+CALENDAR_FULL_SELECT = sorted(upstream_fields(None, EVENT_FIELDS))
+calendar_executor = ThreadPoolExecutor(max_workers=CALENDAR_FETCH_WORKERS, thread_name_prefix="calendar-fetch")
+
+def chunk_starts(window_start, window_end):
+    """Start times of the aligned chunks covering the window"""
+    size = CALENDAR_CHUNK_DAYS * 86400
+    chunk = math.floor((window_start - CALENDAR_CHUNK_ORIGIN) / size) * size + CALENDAR_CHUNK_ORIGIN
+    starts = []
+    while chunk < window_end:
+        starts.append(chunk)
+        chunk += size
+    return starts
+
+def fetch_calendar_chunk(headers, chunk_start, select, user):
+    """Expand one chunk with calendarView, returning occurrences as Event rows or None"""
+    chunk_end = chunk_start + CALENDAR_CHUNK_DAYS * 86400
+    query_params = {
+        'startDateTime': datetime.fromtimestamp(chunk_start, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'endDateTime': datetime.fromtimestamp(chunk_end, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        '$select': ','.join(sorted(select)),
+        '$orderby': 'start/dateTime',
+        '$top': CALENDAR_PAGE_SIZE
+    }
+    # calendarView expands recurring series into their individual occurrences
+    events = fetch_graph_pages(
+        f'https://graph.microsoft.com/v1.0/users/{user}/calendarView',
+        headers,
+        query_params,
+        "calendar events"
+    )
+    if events is None:
+        return None
+    return [normalize_graph_event(event).to_row() for event in events]
+
+def calendar_generation(user):
+    """Current calendar cache generation for a user; bumping it orphans every cached chunk"""
+    # A missing generation starts a new one, so an evicted key can't revive old chunks
+    return cache.get_or_compute(user_cache_key(user, 'calendar-generation'), 30 * 86400, time.time_ns)
+
+def bump_calendar_generation(user):
+    # A timestamp rather than a counter, so nodes bumping at once never need a read-modify-write
+    cache.save(user_cache_key(user, 'calendar-generation'), time.time_ns(), 30 * 86400)
+
+def calendar_chunk_key(user, chunk_start, select, generation):
+    return user_cache_key(user, 'calendar-records', generation, chunk_start, ','.join(select))
+
+def get_calendar_occurrences(headers, window_start, window_end, select, user):
+    """Events in the window, fetching missing or expired chunks concurrently"""
+    starts = chunk_starts(window_start, window_end)
+    select = sorted(select)
+    # Change notifications bump the generation, which retires every cached chunk
+    generation = calendar_generation(user)
+    
+    chunks = {}
+    for chunk_start in starts:
+        # A chunk fetched with every field also serves narrower requests
+        occurrences = cache.lookup(calendar_chunk_key(user, chunk_start, CALENDAR_FULL_SELECT, generation))
+        if occurrences is None and select != CALENDAR_FULL_SELECT:
+            occurrences = cache.lookup(calendar_chunk_key(user, chunk_start, select, generation))
+        if occurrences is not None:
+            chunks[chunk_start] = occurrences
+    
+    futures = {
+        chunk_start: calendar_executor.submit(
+            cache.get_or_compute,
+            calendar_chunk_key(user, chunk_start, select, generation),
+            CALENDAR_CACHE_TTL,
+            lambda chunk_start=chunk_start: fetch_calendar_chunk(headers, chunk_start, select, user)
+        )
+        for chunk_start in starts if chunk_start not in chunks
+    }
+    for chunk_start, future in futures.items():
+        chunks[chunk_start] = future.result()
+        if chunks[chunk_start] is None:
+            return None
+    
+    # Stitch chunks in order; events crossing a chunk boundary appear in both
+    events = []
+    seen = set()
+    for chunk_start in starts:
+        for row in chunks[chunk_start]:
+            event = Event.from_row(row)
+            if event.id in seen or event.start is None or event.start >= window_end or event.end <= window_start:
+                continue
+            seen.add(event.id)
+            events.append(event)
+    return events
+
+# Free/busy computation
+working_timezone = ZoneInfo(WORKING_TIMEZONE)
+working_days = {int(d) for d in WORKING_DAYS.split(",") if d.strip()}
+
+def parse_clock(value):
+    hours, _, minutes = value.partition(':')
+    return int(hours), int(minutes or 0)
+
+def merge_busy_intervals(intervals):
+    """Sort intervals once and sweep them into non-overlapping busy blocks"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+def working_windows(range_start, range_end):
+    """Working hour windows (epoch pairs) that fall inside the range"""
+    start_hour, start_minute = parse_clock(WORKING_HOURS_START)
+    end_hour, end_minute = parse_clock(WORKING_HOURS_END)
+    
+    windows = []
+    day = datetime.fromtimestamp(range_start, working_timezone).date()
+    last_day = datetime.fromtimestamp(range_end, working_timezone).date()
+    while day <= last_day:
+        if day.weekday() in working_days:
+            opens = datetime(day.year, day.month, day.day, start_hour, start_minute, tzinfo=working_timezone).timestamp()
+            closes = datetime(day.year, day.month, day.day, end_hour, end_minute, tzinfo=working_timezone).timestamp()
+            opens, closes = max(opens, range_start), min(closes, range_end)
+            if opens < closes:
+                windows.append((opens, closes))
+        day += timedelta(days=1)
+    return windows
+
+def free_slots(windows, busy, min_seconds):
+    """Subtract busy blocks from working windows in one linear pass"""
+    slots = []
+    i = 0
+    for opens, closes in windows:
+        cursor = opens
+        # Skip busy blocks that end before this window
+        while i < len(busy) and busy[i][1] <= opens:
+            i += 1
+        j = i
+        while j < len(busy) and busy[j][0] < closes:
+            if busy[j][0] - cursor >= min_seconds:
+                slots.append((cursor, busy[j][0]))
+            cursor = max(cursor, busy[j][1])
+            j += 1
+        if closes - cursor >= min_seconds:
+            slots.append((cursor, closes))
+    return slots
+
+def format_interval(start, end):
+    return {
+        "start": datetime.fromtimestamp(start, working_timezone).isoformat(),
+        "end": datetime.fromtimestamp(end, working_timezone).isoformat(),
+        "minutes": int((end - start) // 60)
+    }
+
+def compute_freebusy(start_date, end_date, min_minutes=30, user=None):
+    """Busy blocks and free working-hour slots for the range, cached per user and range
+    
+    Returns None when the calendar can't be read, which is never cached.
+    """
+    user = user or MS_USER_EMAIL
+    key = user_cache_key(user, 'freebusy', calendar_generation(user), start_date, end_date, min_minutes)
+    cached = cache.lookup(key)
+    if cached is not None:
+        return cached
+    
+    events = get_calendar_events(start_date, end_date, ["id", "start", "end"], user=user, strict=True)
+    if events is None:
+        return None
+    if "error" in events:
+        return events
+    
+    range_start = utc_epoch(start_date)
+    range_end = utc_epoch(end_date)
+    intervals = []
+    for event in events:
+        event_start, event_end = event.start, event.end
+        if event_start is None or event_end is None:
+            continue
+        # Clip events to the requested range
+        event_start, event_end = max(event_start, range_start), min(event_end, range_end)
+        if event_start < event_end:
+            intervals.append((event_start, event_end))
+    
+    busy = merge_busy_intervals(intervals)
+    free = free_slots(working_windows(range_start, range_end), busy, min_minutes * 60)
+    result = {
+        "busy": [format_interval(start, end) for start, end in busy],
+        "free": [format_interval(start, end) for start, end in free]
+    }
+    
+    cache.save(key, result, FREEBUSY_CACHE_TTL)
+    return result
+
+# Daily digest snapshots
+# Current snapshot per (user, day): {"path", "etag", "stale"}. Snapshot files are
+# written once and never modified; a rebuild writes a new file and swaps the entry.
+# A "<prefix>.current" file next to them names the latest one for the other processes on the host.
+digest_snapshots = {}
+digest_lock = threading.Lock()
+digest_build_locks = {}  # (user, day) -> lock held while that snapshot is rebuilt
+digest_executor = ThreadPoolExecutor(max_workers=DIGEST_BUILD_WORKERS, thread_name_prefix="digest-build")
+digest_wakeup = threading.Event()
+
+def digest_day():
+    """Today's date in the working timezone"""
+    return datetime.now(working_timezone).date().isoformat()
+
+def build_digest(user, day):
+    """Run the providers for a user's briefing"""
+    next_day = (datetime.strptime(day, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+    return {
+        "date": day,
+        "user": user,
+        "tasks": select_fields(get_jira_tasks(user=user), None),
+        "important": select_fields(get_important_emails(user=user), None),
+        "events": select_fields(get_calendar_events(day, next_day, user=user), None),
+        "headlines": select_fields(get_news_headlines(), None)
+    }
+
+def digest_prefix(user, day):
+    return os.path.join(DIGEST_DIR, f"{hashlib.sha256(user.encode()).hexdigest()[:12]}-{day}")
+
+def write_atomically(path, data):
+    partial = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(partial, 'wb') as f:
+        f.write(data)
+    os.replace(partial, path)
+
+def read_digest_pointer(user, day):
+    """The snapshot another process on this host last built for a user and day, if any"""
+    try:
+        with open(f"{digest_prefix(user, day)}.current") as f:
+            return dict(json.load(f), stale=False)
+    except (OSError, ValueError):
+        return None
+
+def write_digest_snapshot(user, day):
+    """Build the digest and store it as a gzipped snapshot named after its content hash"""
+    digest = build_digest(user, day)
+    body = json.dumps(digest, separators=(',', ':'), sort_keys=True).encode()
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    prefix = digest_prefix(user, day)
+    path = f"{prefix}-{etag}.json.gz"
+    
+    # Identical content keeps its file and ETag, so clients revalidate with a 304
+    if not os.path.exists(path):
+        os.makedirs(DIGEST_DIR, exist_ok=True)
+        # mtime=0 keeps the compressed bytes stable for the same content
+        write_atomically(path, gzip.compress(body, compresslevel=9, mtime=0))
+    # Point the other workers on this host at the new snapshot
+    write_atomically(f"{prefix}.current", json.dumps({"path": path, "etag": etag}).encode())
+    
+    # The previous file is left for prune_digest_snapshots: other workers sharing DIGEST_DIR may still serve it
+    with digest_lock:
+        digest_snapshots[(user, day)] = {"path": path, "etag": etag, "stale": False}
+        return digest_snapshots[(user, day)]
+
+def digest_build_lock(user, day):
+    with digest_lock:
+        return digest_build_locks.setdefault((user, day), threading.Lock())
+
+def rebuild_digest_snapshot(user, day):
+    with digest_build_lock(user, day):
+        return write_digest_snapshot(user, day)
+
+def get_digest_snapshot(user, day):
+    """The current snapshot for a user and day, rebuilding it when missing or stale"""
+    with digest_lock:
+        snapshot = digest_snapshots.get((user, day))
+    if snapshot and not snapshot["stale"]:
+        return snapshot
+    
+    # Concurrent requests for a stale digest wait for a single rebuild, without queueing behind other users
+    with digest_build_lock(user, day):
+        with digest_lock:
+            snapshot = digest_snapshots.get((user, day))
+        if snapshot and not snapshot["stale"]:
+            return snapshot
+        # The host's builder may have written it already
+        current = None if snapshot else read_digest_pointer(user, day)
+        if current:
+            with digest_lock:
+                digest_snapshots[(user, day)] = current
+            return current
+        return write_digest_snapshot(user, day)
+
+def invalidate_digests(affected_users=None):
+    """Mark snapshots stale after a source changed and wake the builder
+    
+    Without affected_users (shared sources such as headlines) every user's
+    snapshot is marked.
+    """
+    with digest_lock:
+        for (user, _), snapshot in digest_snapshots.items():
+            if affected_users is None or user in affected_users:
+                snapshot["stale"] = True
+    # Removing the pointer tells the host's builder, which may be another process, to rebuild
+    day = digest_day()
+    for user in (users if affected_users is None else affected_users):
+        try:
+            os.unlink(f"{digest_prefix(user, day)}.current")
+        except OSError:
+            pass
+    digest_wakeup.set()
+
+def prune_digest_snapshots():
+    """Delete snapshot files older than DIGEST_RETENTION_DAYS"""
+    cutoff = time.time() - DIGEST_RETENTION_DAYS * 86400
+    with digest_lock:
+        current = {snapshot["path"] for snapshot in digest_snapshots.values()}
+        for key in [key for key in digest_snapshots if key[1] < digest_day()]:
+            del digest_snapshots[key]
+        for key in [key for key in digest_build_locks if key[1] < digest_day()]:
+            del digest_build_locks[key]
+    try:
+        names = os.listdir(DIGEST_DIR)
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(DIGEST_DIR, name)
+        try:
+            if path not in current and os.path.getmtime(path) < cutoff:
+                os.unlink(path)
+        except OSError:
+            pass
+
+def refresh_digests():
+    """Rebuild today's snapshots that are missing or stale, so requests don't run the providers"""
+    day = digest_day()
+    with digest_lock:
+        fresh = {user for (user, built), snapshot in digest_snapshots.items() if built == day and not snapshot["stale"]}
+    due = [user for user in users if user not in fresh or not os.path.exists(f"{digest_prefix(user, day)}.current")]
+    futures = {user: digest_executor.submit(rebuild_digest_snapshot, user, day) for user in due}
+    for user, future in futures.items():
+        try:
+            future.result()
+        except Exception as e:
+            logger.error("Error building digest snapshot for %s: %s", user, e)
+
+def digest_builder_loop():
+    while True:
+        refresh_digests()
+        try:
+            prune_digest_snapshots()
+        except Exception as e:
+            logger.error("Error pruning digest snapshots: %s", e)
+        # Rebuild on schedule, or sooner when a source invalidates the snapshots
+        digest_wakeup.wait(DIGEST_REFRESH_INTERVAL)
+        digest_wakeup.clear()
+
+# Directory enrichment
+# Display names and job titles per lowercased address, in a bounded in-process LRU.
+# Addresses the directory doesn't know, such as external senders, are cached as {}
+# so they aren't looked up again until DIRECTORY_NEGATIVE_TTL passes.
+DIRECTORY_FILTER_SIZE = 15  # Values Graph allows in one "in" filter
+GRAPH_BATCH_SIZE = 20  # Requests Graph allows in one $batch
+directory_cache = MemoryCache(DIRECTORY_CACHE_MAX_ENTRIES)
+
+def directory_query(addresses):
+    """Relative /users URL matching a group of addresses, for use inside $batch"""
+    quoted = ",".join("'" + address.replace("'", "''") + "'" for address in addresses)
+    return "/users?" + urlencode({
+        '$filter': f"mail in ({quoted})",
+        '$select': 'mail,displayName,jobTitle'
+    }, quote_via=quote)
+
+def fetch_directory_entries(addresses, access_token):
+    """Look addresses up in bulk, returning {address: entry} for every group Graph answered
+    
+    Each $batch carries up to GRAPH_BATCH_SIZE /users queries of DIRECTORY_FILTER_SIZE
+    addresses each. Addresses missing from an answered query map to {}.
+    """
+    groups = [addresses[i:i + DIRECTORY_FILTER_SIZE] for i in range(0, len(addresses), DIRECTORY_FILTER_SIZE)]
+    entries = {}
+    for start in range(0, len(groups), GRAPH_BATCH_SIZE):
+        batch = groups[start:start + GRAPH_BATCH_SIZE]
+        response = requests.post(
+            'https://graph.microsoft.com/v1.0/$batch',
+            headers={'Authorization': f'Bearer {access_token}', 'Content-Type': 'application/json'},
+            json={"requests": [
+                {"id": str(i), "method": "GET", "url": directory_query(group)} for i, group in enumerate(batch)
+            ]},
+            timeout=DIRECTORY_TIMEOUT
+        )
+        if response.status_code != 200:
+            logger.error("Error looking up directory entries: %s %s", response.status_code, response.text)
+            continue
+        
+        for reply in response.json().get('responses', []):
+            # Failed queries are left uncached and retried on the next request
+            if reply.get('status') != 200:
+                logger.warning("Directory lookup failed: %s", reply.get('status'))
+                continue
+            found = {}
+            for user in (reply.get('body') or {}).get('value', []):
+                if user.get('mail'):
+                    found[user['mail'].lower()] = {"name": user.get('displayName'), "title": user.get('jobTitle')}
+            for address in batch[int(reply['id'])]:
+                entries[address] = found.get(address, {})
+    return entries
+
+def lookup_directory(addresses):
+    """Directory entries for the addresses, keyed by lowercased address
+    
+    Cached addresses are answered locally and the rest resolved in bulk, so each
+    address costs about one lookup per DIRECTORY_CACHE_TTL. Addresses that couldn't
+    be resolved are missing from the result.
+    """
+    entries = {}
+    missing = []
+    for address in {address.lower() for address in addresses if address}:
+        entry = directory_cache.get(cache_key('directory', address))
+        if entry is None:
+            missing.append(address)
         else:
-            print(f"Error fetching emails: {response.status_code}")
-            print(f"Response: {response.text}")
-            return []
+            entries[address] = entry
+    if not missing:
+        return entries
     
+    access_token = get_ms_graph_token()
+    if not access_token:
+        return entries
+    try:
+        fetched = fetch_directory_entries(sorted(missing), access_token)
     except Exception as e:
-        print(f"Exception while fetching emails: {str(e)}")
-        return []
+        logger.error("Error looking up directory entries: %s", e)
+        return entries
+    for address, entry in fetched.items():
+        directory_cache.set(cache_key('directory', address), entry, DIRECTORY_CACHE_TTL if entry else DIRECTORY_NEGATIVE_TTL)
+    entries.update(fetched)
+    return entries
+
+def wants_enrichment(fields, enriched_fields):
+    return DIRECTORY_ENRICHMENT and (not fields or any(f in enriched_fields for f in fields))
+
+def enrich_emails(emails, fields=None):
+    """Set senderName and senderTitle on emails from known senders"""
+    if not wants_enrichment(fields, ("senderName", "senderTitle")):
+        return emails
+    directory = lookup_directory(email.sender for email in emails)
+    for email in emails:
+        entry = directory.get((email.sender or '').lower()) or {}
+        email.sender_name = entry.get("name")
+        email.sender_title = entry.get("title")
+    return emails
+
+def enrich_events(events, fields=None):
+    """Set attendeeDetails on events, one {address, name, title} per attendee"""
+    if not wants_enrichment(fields, ("attendeeDetails",)):
+        return events
+    directory = lookup_directory(address for event in events for address in event.attendees or ())
+    if not directory:
+        return events
+    for event in events:
+        details = []
+        for address in event.attendees or ():
+            entry = directory.get(address.lower()) or {}
+            details.append({"address": address, "name": entry.get("name"), "title": entry.get("title")})
+        event.attendee_details = details
+    return events
 
-def get_calendar_events(start_date, end_date):
-    """Get calendar events using Microsoft Graph API"""
+# Graph change notifications
+GRAPH_SUBSCRIPTION_RESOURCES = {
+    "mail": "users/{user}/messages",
+    "calendar": "users/{user}/events"
+}
+
+def unindex_document(doc_type, item_id, user=None):
+    """Drop a deleted item from the search index"""
+    key = search_document_key(doc_type, item_id, user)
+    with search_lock:
+        if key in search_documents:
+            remove_document(key)
+
+def apply_graph_notification(notification):
+    """Invalidate or patch what a change notification affects; False if it isn't ours"""
+    client_state = notification.get("clientState") or ""
+    if not GRAPH_WEBHOOK_CLIENT_STATE or not hmac.compare_digest(client_state.encode(), GRAPH_WEBHOOK_CLIENT_STATE.encode()):
+        return False
     
-    # Parse input dates
-    try:
-        start = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-        end = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-    except ValueError:
-        # Try parsing as date only format (YYYY-MM-DD)
-        try:
-            start = datetime.strptime(start_date, "%Y-%m-%d")
-            end = datetime.strptime(end_date, "%Y-%m-%d")
-        except ValueError:
-            return {"error": "Invalid date format. Use ISO 8601 format (e.g., 2023-12-25 or 2023-12-25T14:30:00)."}
+    resource = (notification.get("resource") or "").lower()
+    change_type = notification.get("changeType", "")
+    item_id = (notification.get("resourceData") or {}).get("id")
+    # Notifications name the mailbox by object id, so map the subscription back to its user
+    user = cache.lookup(cache_key('graph-subscription-user', notification.get("subscriptionId")))
+    affected = [user] if user else list(users)
     
-    # Get access token for Microsoft Graph API
-    access_token = get_ms_graph_token()
+    if notification.get("lifecycleEvent"):
+        # Notifications may have been missed, so drop everything derived from Graph
+        logger.info("Graph subscription %s lifecycle event: %s",
+                    notification.get("subscriptionId"), notification["lifecycleEvent"])
+        for user in affected:
+            bump_calendar_generation(user)
+        if notification["lifecycleEvent"] in ("subscriptionRemoved", "reauthorizationRequired"):
+            if cache_is_shared() or graph_subscription_state["managed_here"]:
+                restore_graph_subscription(notification.get("subscriptionId"), notification["lifecycleEvent"], affected)
+            else:
+                # The subscriptions are in the managing worker's memory cache; hand it the event
+                spool_graph_lifecycle_event(notification.get("subscriptionId"), notification["lifecycleEvent"])
+    elif "/events" in resource:
+        for user in affected:
+            bump_calendar_generation(user)
+            if change_type == "deleted" and item_id:
+                unindex_document("event", item_id, user)
+    elif "/messages" in resource:
+        if change_type == "deleted" and item_id:
+            for user in affected:
+                unindex_document("email", item_id, user)
+    else:
+        return False
     
-    # If no token, return mock data
+    invalidate_digests(affected)
+    return True
+
+def graph_subscription_request(method, url, body):
+    """Call the subscriptions API, returning the subscription or None"""
+    access_token = get_ms_graph_token()
     if not access_token:
-        print("Using mock calendar data as Microsoft Graph is not configured")
-        events = [
-            {
-                "id": "event1",
-                "title": "Team Stand-up",
-                "start": datetime(start.year, start.month, start.day, 10, 0).isoformat(),
-                "end": datetime(start.year, start.month, start.day, 10, 30).isoformat(),
-                "location": "Conference Room A",
-                "attendees": ["john@company.com", "mary@company.com"]
-            },
-            {
-                "id": "event2",
-                "title": "Client Meeting",
-                "start": datetime(start.year, start.month, start.day, 14, 0).isoformat(),
-                "end": datetime(start.year, start.month, start.day, 15, 30).isoformat(),
-                "location": "Virtual",
-                "attendees": ["client@example.com", "manager@company.com"]
-            },
-            {
-                "id": "event3",
-                "title": "Project Review",
-                "start": datetime(end.year, end.month, end.day, 11, 0).isoformat(),
-                "end": datetime(end.year, end.month, end.day, 12, 0).isoformat(),
-                "location": "Conference Room B",
-                "attendees": ["team@company.com"]
-            }
-        ]
-        
-        # Filter events within the date range
-        filtered_events = [
-            e for e in events if 
-            datetime.fromisoformat(e["start"]) >= start and 
-            datetime.fromisoformat(e["end"]) <= end
-        ]
-        
-        return filtered_events
+        return None
+    response = requests.request(
+        method,
+        url,
+        headers={'Authorization': f'Bearer {access_token}', 'Content-Type': 'application/json'},
+        json=body,
+        timeout=30
+    )
+    if response.status_code not in (200, 201):
+        logger.error("Error %s Graph subscription: %s %s", "renewing" if method == 'PATCH' else "creating",
+                     response.status_code, response.text)
+        return None
+    return response.json()
+
+def ensure_graph_subscription(name, user):
+    """Create a user's mail or calendar subscription, or renew it when it is close to expiring"""
+    key = cache_key('graph-subscription', user, name)
+    resource = GRAPH_SUBSCRIPTION_RESOURCES[name].format(user=user)
+    subscription = cache.lookup(key)
+    expiration = datetime.now(timezone.utc) + timedelta(minutes=GRAPH_SUBSCRIPTION_MINUTES)
+    expiration_str = expiration.strftime('%Y-%m-%dT%H:%M:%S.0000000Z')
+    
+    renewed = None
+    if subscription:
+        if subscription["expires"] - time.time() > GRAPH_SUBSCRIPTION_MINUTES * 60 / 4:
+            return subscription
+        renewed = graph_subscription_request(
+            'PATCH',
+            f"https://graph.microsoft.com/v1.0/subscriptions/{subscription['id']}",
+            {"expirationDateTime": expiration_str}
+        )
+    if not renewed:
+        renewed = graph_subscription_request('POST', "https://graph.microsoft.com/v1.0/subscriptions", {
+            "changeType": "created,updated,deleted",
+            "notificationUrl": GRAPH_WEBHOOK_URL,
+            "lifecycleNotificationUrl": GRAPH_WEBHOOK_URL,
+            "resource": resource,
+            "expirationDateTime": expiration_str,
+            "clientState": GRAPH_WEBHOOK_CLIENT_STATE
+        })
+        if not renewed:
+            return None
+        # Changes made before the subscription existed were never notified
+        if name == "calendar":
+            bump_calendar_generation(user)
     
+    subscription = {"id": renewed["id"], "expires": expiration.timestamp()}
+    cache.set(key, subscription, GRAPH_SUBSCRIPTION_MINUTES * 60)
+    cache.set(cache_key('graph-subscription-user', renewed["id"]), user, GRAPH_SUBSCRIPTION_MINUTES * 60)
+    logger.info("Graph subscription for %s active until %s", resource, expiration_str)
+    return subscription
+
+graph_subscription_wakeup = threading.Event()
+graph_subscription_state = {"managed_here": False}  # Whether this process runs the subscription loop
+# Lifecycle events received by other workers on this host, for the managing worker without a shared cache
+GRAPH_LIFECYCLE_DIR = os.path.join(tempfile.gettempdir(), f"{CACHE_NAMESPACE}-graph-lifecycle")
+GRAPH_LIFECYCLE_POLL_INTERVAL = 5
+
+def spool_graph_lifecycle_event(subscription_id, lifecycle_event):
+    os.makedirs(GRAPH_LIFECYCLE_DIR, exist_ok=True)
+    event = {"subscriptionId": subscription_id, "lifecycleEvent": lifecycle_event}
+    write_atomically(os.path.join(GRAPH_LIFECYCLE_DIR, f"{time.time_ns()}-{os.getpid()}.json"), json.dumps(event).encode())
+
+def take_spooled_lifecycle_events():
+    """Act on lifecycle events other workers on this host received"""
     try:
-        # Format dates for MS Graph API
-        start_str = start.strftime('%Y-%m-%dT%H:%M:%SZ')
-        end_str = end.strftime('%Y-%m-%dT%H:%M:%SZ')
-        
-        headers = {
-            'Authorization': f'Bearer {access_token}',
-            'Content-Type': 'application/json'
-        }
+        names = sorted(name for name in os.listdir(GRAPH_LIFECYCLE_DIR) if name.endswith(".json"))
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(GRAPH_LIFECYCLE_DIR, name)
+        try:
+            with open(path) as f:
+                event = json.load(f)
+            os.unlink(path)
+        except (OSError, ValueError) as e:
+            logger.warning("Skipping spooled Graph lifecycle event %s: %s", name, e)
+            continue
+        # Only this worker's cache maps the subscription back to its user
+        user = cache.lookup(cache_key('graph-subscription-user', event.get("subscriptionId")))
+        restore_graph_subscription(event.get("subscriptionId"), event.get("lifecycleEvent"), [user] if user else list(users))
+
+def restore_graph_subscription(subscription_id, lifecycle_event, affected):
+    """Have the next round recreate a removed subscription or renew one that needs reauthorizing"""
+    for user in affected:
+        for name in GRAPH_SUBSCRIPTION_RESOURCES:
+            key = cache_key('graph-subscription', user, name)
+            subscription = cache.lookup(key)
+            if not subscription or subscription["id"] != subscription_id:
+                continue
+            if lifecycle_event == "subscriptionRemoved":
+                cache.delete(key)
+            else:
+                # Renewing a subscription also reauthorizes it, so mark it as expiring
+                cache.set(key, dict(subscription, expires=0), GRAPH_SUBSCRIPTION_MINUTES * 60)
+    # Run a round now instead of waiting for the last round's lock to expire
+    cache.delete(cache_key('graph-subscription-lock'))
+    graph_subscription_wakeup.set()
+
+def graph_subscription_loop():
+    while True:
+        try:
+            # One node per round manages the subscriptions shared through the cache
+            if cache.add(cache_key('graph-subscription-lock'), os.getpid(), GRAPH_SUBSCRIPTION_CHECK_INTERVAL):
+                for user in users:
+                    for name in GRAPH_SUBSCRIPTION_RESOURCES:
+                        ensure_graph_subscription(name, user)
+        except Exception as e:
+            logger.error("Error managing Graph subscriptions: %s", e)
+        wait_for_graph_subscription_round()
+
+def wait_for_graph_subscription_round():
+    """Sleep until the next round, or until a lifecycle event reaches this or another worker"""
+    deadline = time.monotonic() + GRAPH_SUBSCRIPTION_CHECK_INTERVAL
+    while not graph_subscription_wakeup.wait(max(0, min(GRAPH_LIFECYCLE_POLL_INTERVAL, deadline - time.monotonic()))):
+        if time.monotonic() >= deadline:
+            break
+        if not cache_is_shared():
+            try:
+                take_spooled_lifecycle_events()
+            except Exception as e:
+                logger.error("Error handling spooled Graph lifecycle events: %s", e)
+    graph_subscription_wakeup.clear()
+
+# Jira issue events
+JIRA_ISSUE_EVENTS = ('jira:issue_created', 'jira:issue_updated', 'jira:issue_deleted')
+
+def verify_jira_webhook(body, signature, secret_param):
+    """Check the HMAC-SHA256 X-Hub-Signature, or a secret query parameter for older webhooks"""
+    if not JIRA_WEBHOOK_SECRET:
+        return False
+    if signature:
+        expected = "sha256=" + hmac.new(JIRA_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(signature.encode(), expected.encode())
+    return hmac.compare_digest((secret_param or "").encode(), JIRA_WEBHOOK_SECRET.encode())
+
+def apply_jira_event(event):
+    """Retire cached JQL results affected by an issue event; False if it isn't an issue event"""
+    if event.get("webhookEvent") not in JIRA_ISSUE_EVENTS:
+        return False
+    issue = event.get("issue") or {}
+    project = ((issue.get("fields") or {}).get("project") or {}).get("key")
+    # Any project can be read through /tasks?projects=, so its results are retired even
+    # when no user's digest uses it
+    for project_key in ({project} if project else set(users.values())):
+        bump_jira_generation(project_key)
+    if event["webhookEvent"] == 'jira:issue_deleted' and issue.get("key"):
+        # Tasks are indexed for whoever listed them, whichever project they came from
+        for user in users:
+            unindex_document("task", issue["key"], user)
+    digest_users = [user for user, project_key in users.items() if not project or project_key == project]
+    if digest_users:
+        invalidate_digests(digest_users)
+    return True
+
+# Health checks
+health_state = {"checkedAt": None, "checks": {}}
+
+def timed_check(check):
+    """Run one dependency check, returning its status, latency and timestamp"""
+    start = time.perf_counter()
+    try:
+        result = check()
+        status, error = ("ok", None) if result else ("not configured", None)
+    except Exception as e:
+        status, error = "error", str(e)
+    outcome = {
+        "status": status,
+        "latencyMs": round((time.perf_counter() - start) * 1000, 1),
+        "checkedAt": datetime.now(timezone.utc).isoformat()
+    }
+    if error:
+        outcome["error"] = error
+    return outcome
+
+def check_graph_token():
+    if not all([MS_TENANT_ID, MS_CLIENT_ID, MS_CLIENT_SECRET]):
+        return False
+    if not get_ms_graph_token():
+        raise RuntimeError("Token acquisition failed")
+    return True
+
+def check_graph():
+    access_token = get_ms_graph_token()
+    if not access_token:
+        return False
+    response = requests.get(
+        f'https://graph.microsoft.com/v1.0/users/{MS_USER_EMAIL}',
+        headers={'Authorization': f'Bearer {access_token}'},
+        params={'$select': 'id'},
+        timeout=HEALTH_CHECK_TIMEOUT
+    )
+    response.raise_for_status()
+    return True
+
+def check_jira():
+    client = get_jira_client()
+    if not client:
+        return False
+    client.myself()
+    return True
+
+def run_health_checks():
+    """Check the token, Graph and Jira; the token runs first since Graph needs it"""
+    checks = {"token": timed_check(check_graph_token)}
+    checks["microsoft_graph"] = timed_check(check_graph)
+    checks["jira"] = timed_check(check_jira)
+    return {"checkedAt": datetime.now(timezone.utc).isoformat(), "checks": checks}
+
+def refresh_health():
+    # One node per interval probes upstream; the others read its results from the cache.
+    # Not get_or_compute: its key lock would be held while the token check takes another one.
+    key = cache_key('health')
+    state = cache.lookup(key)
+    if state is None:
+        try:
+            probe = cache.add(f"{key}:lock", os.getpid(), HEALTH_CHECK_INTERVAL)
+        except (OSError, RedisError, sqlite3.Error) as e:
+            logger.warning("Cache unavailable, probing without it: %s", e)
+            probe = True
+        if probe:
+            state = run_health_checks()
+            cache.save(key, state, HEALTH_CHECK_INTERVAL)
+    if state:
+        health_state.update(state)
+    return health_state
+
+def health_prober_loop():
+    while True:
+        try:
+            refresh_health()
+        except Exception as e:
+            logger.error("Error running health checks: %s", e)
+        time.sleep(HEALTH_CHECK_INTERVAL)
+
+# Worker startup
+# The process that imported the app. With gunicorn --preload, workers are forked from it after import.
+import_pid = os.getpid()
+worker_state = {"pid": None}
+worker_lock = threading.Lock()
+
+host_locks = {}  # name -> open lock file, held for the life of the process
+
+def claim_host_lock(name):
+    """Take an exclusive lock shared by the processes on this host; False if another process holds it"""
+    if name in host_locks:
+        return True
+    try:
+        import fcntl
+    except ImportError:
+        return True  # No flock outside POSIX, where the server runs as one process
+    handle = open(os.path.join(tempfile.gettempdir(), f"{CACHE_NAMESPACE}-{name}.lock"), "w")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    host_locks[name] = handle
+    return True
+
+def prewarm_jira():
+    client = get_jira_client()
+    if client:
+        client.session.head(JIRA_URL, timeout=PREWARM_TIMEOUT)
+
+def prewarm_connections():
+    """Resolve upstream hosts, acquire the Graph token and open the Jira session in parallel"""
+    hosts = {'graph.microsoft.com', 'login.microsoftonline.com', urlparse(JIRA_URL).hostname}
+    tasks = [lambda host=host: socket.getaddrinfo(host, 443) for host in hosts if host]
+    tasks += [get_ms_graph_token, prewarm_jira]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="prewarm") as executor:
+        for future in [executor.submit(task) for task in tasks]:
+            try:
+                future.result()
+            except Exception as e:
+                logger.warning("Prewarm step failed: %s", e)
+    logger.info("Prewarmed upstream connections in %.0f ms", (time.perf_counter() - start) * 1000)
+
+def init_worker():
+    """Per-process startup: background threads, fresh connections after a fork, optional prewarm
+    
+    Runs once per process. gunicorn calls it from the post_fork hook in
+    gunicorn.conf.py, create_app and python app.py call it directly.
+    """
+    global jira_client, ms_graph_token
+    with worker_lock:
+        if worker_state["pid"] == os.getpid():
+            return
+        worker_state["pid"] = os.getpid()
+    
+    start_log_listener(log_listener.queue, *log_listener.handlers)
+    if os.getpid() != import_pid:
+        # Sockets and SQLite handles don't survive a fork
+        cache.reset()
+        jira_client = None
+        ms_graph_token = None
+    
+    if news_feeds:
+        threading.Thread(target=news_ingestion_loop, name="news-ingestion", daemon=True).start()
+    if youtube_channels:
+        threading.Thread(target=youtube_ingestion_loop, name="youtube-ingestion", daemon=True).start()
+    # Snapshot files are shared by the processes on a host, so one of them builds them
+    if DIGEST_REFRESH_INTERVAL > 0 and claim_host_lock('digest-builder'):
+        threading.Thread(target=digest_builder_loop, name="digest-builder", daemon=True).start()
+    # Without a shared cache each process would keep its own subscriptions, so one per host does
+    if GRAPH_WEBHOOK_URL and GRAPH_WEBHOOK_CLIENT_STATE and (cache_is_shared() or claim_host_lock('graph-subscriptions')):
+        graph_subscription_state["managed_here"] = True
+        threading.Thread(target=graph_subscription_loop, name="graph-subscriptions", daemon=True).start()
+    if HEALTH_CHECK_INTERVAL > 0:
+        threading.Thread(target=health_prober_loop, name="health-prober", daemon=True).start()
+    if PREWARM_CONNECTIONS:
+        threading.Thread(target=prewarm_connections, name="prewarm", daemon=True).start()
+
+def create_app():
+    """Application factory: gunicorn 'app:create_app()', flask --app 'app:create_app()' run"""
+    init_worker()
+    return app
+
+# Admission control
+def parse_route_limits(spec):
+    """Parse ROUTE_RATE_LIMITS into {route: (rate, burst)}"""
+    limits = {}
+    for entry in spec.split(","):
+        if "=" not in entry:
+            continue
+        route, value = entry.split("=", 1)
+        rate, _, burst = value.partition(":")
+        try:
+            rate = float(rate)
+            burst = float(burst) if burst else max(rate, 1.0)
+        except ValueError:
+            logger.warning("Ignoring invalid rate limit for %s: %s", route.strip(), value)
+            continue
+        limits[route.strip()] = (rate, burst)
+    return limits
+
+route_limits = parse_route_limits(ROUTE_RATE_LIMITS)
+# /health/deep only reads the prober's results, but is kept to a trickle unless ROUTE_RATE_LIMITS says otherwise
+route_limits.setdefault('/health/deep', (1, 5))
+exempt_routes = {r.strip() for r in ADMISSION_EXEMPT_ROUTES.split(",") if r.strip()}
+
+# Keys identifying a user are known too, so they get their own buckets as well
+rate_limit_api_keys = {k.strip() for k in RATE_LIMIT_API_KEYS.split(",") if k.strip()} | set(user_api_keys)
+
+# Behind a load balancer remote_addr is the balancer's; take the client from the trusted hops instead
+if TRUSTED_PROXY_HOPS:
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS, x_proto=TRUSTED_PROXY_HOPS)
+
+# Token buckets keyed by (route, client): [tokens, last refill time], least recently used first.
+# Used with the memory backend; a shared cache counts requests for every worker and node.
+rate_buckets = OrderedDict()
+rate_buckets_lock = threading.Lock()
+MAX_RATE_BUCKETS = 10000
+
+# Concurrency slots and the bounded queue waiting for them
+admission_condition = threading.Condition()
+admission_state = {"active": 0, "waiting": 0}
+
+def get_client_id():
+    """Identify the caller by a configured API key, falling back to the remote address
+    
+    Unknown keys are ignored, so a client can't escape its limit by sending a new key per request.
+    """
+    api_key = request.headers.get('X-API-Key')
+    if api_key in rate_limit_api_keys:
+        return f"key:{api_key}"
+    return f"ip:{request.remote_addr}"
+
+def take_shared_token(route, client, rate, burst):
+    """Count the request in a window of burst / rate seconds kept in the shared cache"""
+    window = burst / rate
+    now = time.time()
+    count = cache.incr(cache_key('rate', route, client, int(now // window)), window)
+    if count <= burst:
+        return 0
+    return max(window - now % window, 0.001)
+
+def take_token(route, client):
+    """Take one token from the client's bucket, returning seconds to wait if empty"""
+    rate, burst = route_limits.get(route, (RATE_LIMIT_RPS, RATE_LIMIT_BURST))
+    if rate <= 0:
+        return 0
+    if cache_is_shared():
+        try:
+            return take_shared_token(route, client, rate, burst)
+        except (OSError, RedisError, sqlite3.Error) as e:
+            logger.warning("Cache unavailable, rate limiting in this process: %s", e)
+    
+    now = time.monotonic()
+    key = (route, client)
+    with rate_buckets_lock:
+        bucket = rate_buckets.get(key)
+        if bucket is None:
+            # Evict the least recently used bucket; a client returning after that starts full
+            if len(rate_buckets) >= MAX_RATE_BUCKETS:
+                rate_buckets.popitem(last=False)
+            bucket = rate_buckets[key] = [burst, now]
+        else:
+            rate_buckets.move_to_end(key)
         
-        # Query parameters
-        query_params = {
-            '$select': 'id,subject,start,end,location,attendees',
-            '$orderby': 'start/dateTime',
-            '$filter': f"start/dateTime ge '{start_str}' and end/dateTime le '{end_str}'"
-        }
+        # Refill based on time since the last request
+        bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
         
-        # Make the request to MS Graph API
-        response = requests.get(
-            f'https://graph.microsoft.com/v1.0/users/{MS_USER_EMAIL}/calendar/events',
-            headers=headers,
-            params=query_params
-        )
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0
+        return (1 - bucket[0]) / rate
+
+def acquire_request_slot():
+    """Wait briefly for a concurrency slot; False if the queue is full or the wait times out"""
+    with admission_condition:
+        if admission_state["active"] < MAX_CONCURRENT_REQUESTS:
+            admission_state["active"] += 1
+            return True
+        if admission_state["waiting"] >= MAX_QUEUED_REQUESTS:
+            return False
         
-        if response.status_code == 200:
-            data = response.json()
-            events = []
-            
-            for event in data.get('value', []):
-                # Get attendees
-                attendee_emails = []
-                for attendee in event.get('attendees', []):
-                    if attendee.get('emailAddress') and attendee['emailAddress'].get('address'):
-                        attendee_emails.append(attendee['emailAddress']['address'])
-                
-                # Get location
-                location = "No location"
-                if event.get('location') and event['location'].get('displayName'):
-                    location = event['location']['displayName']
-                
-                # Create event object
-                calendar_event = {
-                    "id": event.get('id'),
-                    "title": event.get('subject', '(No Title)'),
-                    "start": event.get('start', {}).get('dateTime'),
-                    "end": event.get('end', {}).get('dateTime'),
-                    "location": location,
-                    "attendees": attendee_emails
-                }
-                
-                events.append(calendar_event)
-            
-            return events
-        else:
-            print(f"Error fetching calendar events: {response.status_code}")
-            print(f"Response: {response.text}")
-            return []
+        admission_state["waiting"] += 1
+        try:
+            deadline = time.monotonic() + QUEUE_TIMEOUT
+            while admission_state["active"] >= MAX_CONCURRENT_REQUESTS:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                admission_condition.wait(remaining)
+            admission_state["active"] += 1
+            return True
+        finally:
+            admission_state["waiting"] -= 1
+
+def release_request_slot():
+    with admission_condition:
+        admission_state["active"] -= 1
+        admission_condition.notify()
+
+@app.before_request
+def admission_control():
+    """Rate limit per client and shed load before the request reaches a provider"""
+    route = request.path
+    if route in exempt_routes:
+        return None
     
-    except Exception as e:
-        print(f"Exception while fetching calendar events: {str(e)}")
-        return []
+    retry_after = take_token(route, get_client_id())
+    if retry_after:
+        response = jsonify({"error": "Rate limit exceeded. Retry later."})
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response, 429
+    
+    # Batch sub-requests run inside the slot their /batch request already holds
+    if request.environ.get('batch.item'):
+        return None
+    
+    if not acquire_request_slot():
+        response = jsonify({"error": "Server is overloaded. Retry later."})
+        response.headers['Retry-After'] = str(max(1, math.ceil(QUEUE_TIMEOUT)))
+        return response, 503
+    
+    g.admission_slot = True
+    return None
+
+@app.teardown_request
+def release_admission_slot(exc=None):
+    if g.pop('admission_slot', False):
+        release_request_slot()
+
+# Request profiling
+class StackSampler:
+    """Sample one thread's Python stack on a background thread
+    
+    Stacks are counted root first as (function, file, first line) frames,
+    which is what both collapsed stacks and speedscope need.
+    """
+    
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}
+        self.stopped = threading.Event()
+        self.started = time.perf_counter()
+        self.duration = 0
+        self.thread = threading.Thread(target=self.run, name="profile-sampler", daemon=True)
+        self.thread.start()
+    
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                stack = tuple(reversed(stack))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+    
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.duration = time.perf_counter() - self.started
+        return self.stacks
+
+def collapsed_stacks(stacks):
+    """Render stack counts in the collapsed format used by flame graph tools"""
+    return "".join(
+        ";".join(f"{name} ({os.path.basename(filename)}:{line})" for name, filename, line in stack) + f" {count}\n"
+        for stack, count in sorted(stacks.items())
+    )
+
+def speedscope_profile(stacks, name, interval, duration):
+    """Render stack counts as a speedscope sampled profile"""
+    frames = {}
+    samples = []
+    weights = []
+    for stack, count in stacks.items():
+        samples.append([frames.setdefault(frame, len(frames)) for frame in stack])
+        weights.append(count * interval)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "exporter": "daily-server",
+        "name": name,
+        "shared": {
+            "frames": [{"name": fn, "file": filename, "line": line} for fn, filename, line in frames]
+        },
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": duration,
+            "samples": samples,
+            "weights": weights
+        }]
+    }
+
+def profile_requested():
+    """Whether this request asked to be profiled with a valid admin token"""
+    if not PROFILE_ADMIN_TOKEN:
+        return False
+    if request.args.get('__profile') != '1' and request.headers.get('X-Profile') != '1':
+        return False
+    token = request.headers.get('X-Admin-Token', '')
+    return hmac.compare_digest(token.encode(), PROFILE_ADMIN_TOKEN.encode())
+
+def write_profile(sampler):
+    """Save the request's profile to PROFILE_DIR and return the file name"""
+    stacks = sampler.stop()
+    label = f"{request.method} {request.path}"
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-') or 'root'
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    if PROFILE_FORMAT == 'collapsed':
+        filename = f"{stamp}-{slug}.txt"
+        content = collapsed_stacks(stacks)
+    else:
+        filename = f"{stamp}-{slug}.speedscope.json"
+        content = json.dumps(speedscope_profile(stacks, label, PROFILE_INTERVAL, sampler.duration))
+    with open(os.path.join(PROFILE_DIR, filename), 'w') as f:
+        f.write(content)
+    logger.info("Saved profile of %s to %s", label, filename)
+    return filename
+
+@app.before_request
+def start_profiling():
+    """Profile requests that ask for it, and 1 in PROFILE_SAMPLE_RATE of the rest"""
+    on_demand = profile_requested()
+    if on_demand or (PROFILE_SAMPLE_RATE > 0 and random.random() * PROFILE_SAMPLE_RATE < 1):
+        g.profiler = StackSampler(threading.get_ident(), PROFILE_INTERVAL)
+        g.profile_on_demand = on_demand
+
+@app.after_request
+def finish_profiling(response):
+    sampler = g.pop('profiler', None)
+    if sampler:
+        try:
+            filename = write_profile(sampler)
+        except OSError as e:
+            logger.error("Error saving profile: %s", e)
+            return response
+        # Only the caller who asked for the profile is told where it went
+        if g.pop('profile_on_demand', False):
+            response.headers['X-Profile-File'] = filename
+    return response
+
+@app.teardown_request
+def stop_profiling(exc=None):
+    # after_request is skipped when a view raises, so stop the sampler here
+    sampler = g.pop('profiler', None)
+    if sampler:
+        sampler.stop()
+
+# Batch requests
+# Headers passed from the batch request to each sub-request, so they count against the same
+# client's rate limits and default to the same user
+BATCH_FORWARDED_HEADERS = ('X-API-Key', 'X-User-Email')
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="batch")
+
+def parse_batch_item(item):
+    """Normalize one sub-request into (path, query string, headers), or an error message"""
+    if not isinstance(item, dict) or not isinstance(item.get("path"), str):
+        return None, "Each request needs a path"
+    if item.get("method", "GET").upper() != "GET":
+        return None, "Only GET sub-requests are supported"
+    
+    parsed = urlparse(item["path"])
+    if not parsed.path.startswith("/") or parsed.path.startswith("/batch") or parsed.path.startswith("/webhooks"):
+        return None, f"Cannot batch {parsed.path or item['path']}"
+    params = parse_qsl(parsed.query, keep_blank_values=True)
+    params += [(k, str(v)) for k, v in (item.get("params") or {}).items()]
+    
+    headers = {h: request.headers[h] for h in BATCH_FORWARDED_HEADERS if h in request.headers}
+    headers.update({k: str(v) for k, v in (item.get("headers") or {}).items()})
+    # Sorted so identical sub-requests written differently share one execution
+    return (parsed.path, urlencode(sorted(params)), tuple(sorted(headers.items()))), None
+
+def run_batch_item(path, query_string, headers, remote_addr):
+    """Dispatch one sub-request through the app, hooks included, and return (status, body)"""
+    with app.test_request_context(path, query_string=query_string, headers=list(headers),
+                                  environ_base={'REMOTE_ADDR': remote_addr, 'batch.item': True}):
+        response = app.full_dispatch_request()
+        body = response.get_json(silent=True)
+        if body is None:
+            body = response.get_data(as_text=True)
+        return response.status_code, body
 
 # API Routes
+def get_request_user():
+    """The user the caller acts for: the owner of its X-API-Key, MS_USER_EMAIL without one
+    
+    The user parameter or X-User-Email header may name that same user, and
+    naming anyone else is refused, so reading a user's data takes their key.
+    """
+    caller = user_api_keys.get(request.headers.get('X-API-Key'), MS_USER_EMAIL.lower())
+    user = (request.args.get('user') or request.headers.get('X-User-Email') or caller).strip().lower()
+    if user not in users:
+        return None, {"error": f"Unknown user: {user}"}
+    if user != caller:
+        return None, {"error": f"Acting for {user} requires their API key"}
+    return user, None
+
 @app.route('/videos', methods=['GET'])
 def youtube_videos():
     channels = request.args.get('channels')
     categories = request.args.get('categories')
     
+    fields, error = parse_fields(request.args.get('fields'), VIDEO_FIELDS)
+    if error:
+        return jsonify(error), 400
+    
     videos = get_youtube_videos(channels, categories)
-    return jsonify(videos)
+    # Polled videos were indexed as they were stored
+    if not youtube_channels:
+        index_documents("video", videos)
+    return jsonify(select_fields(videos, fields))
 
 @app.route('/headlines', methods=['GET'])
 def news_headlines():
     topics = request.args.get('topics')
     hours = request.args.get('hours', 24)
     
+    fields, error = parse_fields(request.args.get('fields'), HEADLINE_FIELDS)
+    if error:
+        return jsonify(error), 400
+    
     headlines = get_news_headlines(topics, hours)
-    return jsonify(headlines)
+    # Ingested headlines were indexed as they were stored
+    if not news_feeds:
+        index_documents("headline", headlines)
+    return jsonify(select_fields(headlines, fields))
 
 @app.route('/tasks', methods=['GET'])
 def jira_tasks():
     limit = request.args.get('limit', 5)
     
-    tasks = get_jira_tasks(limit)
-    return jsonify(tasks)
+    user, error = get_request_user()
+    if error:
+        return jsonify(error), 403
+    
+    fields, error = parse_fields(request.args.get('fields'), TASK_FIELDS)
+    if error:
+        return jsonify(error), 400
+    
+    projects, error = parse_project_keys(request.args.get('projects'))
+    if error:
+        return jsonify(error), 400
+    
+    # Cursor pagination: an empty cursor= requests the first page
+    if 'cursor' in request.args:
+        limit, error = parse_page_size(request.args.get('limit'))
+        if not error:
+            page, error = decode_cursor(request.args['cursor'], query_fingerprint('tasks', user, fields, projects))
+        if error:
+            return jsonify(error), 400
+        
+        # Fetch one extra task to know whether another page exists
+        tasks = get_jira_tasks(limit + 1, fields, offset=page["o"], user=user, projects=projects)
+        if not fields:
+            index_documents("task", tasks, user)
+        return jsonify(page_response(select_fields(tasks, fields), limit, page))
+    
+    tasks = get_jira_tasks(limit, fields, user=user, projects=projects)
+    if not fields:
+        index_documents("task", tasks, user)
+    return jsonify(select_fields(tasks, fields))
 
 @app.route('/important', methods=['GET'])
 def important_emails():
     priority_contacts = request.args.get('priorityContacts')
+    vip = request.args.get('vip', 'false').lower() in ('true', 'yes', '1')
+    
+    user, error = get_request_user()
+    if error:
+        return jsonify(error), 403
+    
+    fields, error = parse_fields(request.args.get('fields'), EMAIL_FIELDS)
+    if error:
+        return jsonify(error), 400
+    
+    # Rank the window by importance and return the top emails
+    if request.args.get('sort') == 'score':
+        if 'cursor' in request.args:
+            return jsonify({"error": "cursor can't be combined with sort=score. Use top instead."}), 400
+        top, error = parse_page_size(request.args.get('top'), default=10)
+        if error:
+            return jsonify({"error": "top must be an integer."}), 400
+        
+        # Scoring needs the full email, so fields only trims the response
+        emails = get_important_emails(priority_contacts, offset=0, limit=IMPORTANCE_SCAN_LIMIT, vip=vip, user=user)
+        index_documents("email", emails, user)
+        tier_index = get_contact_index(priority_contacts, vip=True)
+        return jsonify(select_fields(enrich_emails(rank_emails(emails, top, tier_index), fields), fields))
+    
+    # Cursor pagination: an empty cursor= requests the first page
+    if 'cursor' in request.args:
+        limit, error = parse_page_size(request.args.get('limit'))
+        if not error:
+            page, error = decode_cursor(request.args['cursor'], query_fingerprint('important', user, priority_contacts, vip, fields))
+        if error:
+            return jsonify(error), 400
+        
+        emails = get_important_emails(priority_contacts, fields, offset=page["o"], limit=limit + 1, as_of=page["t"], vip=vip, user=user)
+        if not fields:
+            index_documents("email", emails, user)
+        return jsonify(page_response(select_fields(enrich_emails(emails, fields), fields), limit, page))
     
-    emails = get_important_emails(priority_contacts)
-    return jsonify(emails)
+    emails = get_important_emails(priority_contacts, fields, vip=vip, user=user)
+    if not fields:
+        index_documents("email", emails, user)
+    return jsonify(select_fields(enrich_emails(emails, fields), fields))
 
 @app.route('/events', methods=['GET'])
 def calendar_events():
@@ -702,37 +3811,222 @@ def calendar_events():
     if not start_date or not end_date:
         return jsonify({"error": "startDate and endDate parameters are required"}), 400
     
-    events = get_calendar_events(start_date, end_date)
+    user, error = get_request_user()
+    if error:
+        return jsonify(error), 403
+    
+    fields, error = parse_fields(request.args.get('fields'), EVENT_FIELDS)
+    if error:
+        return jsonify(error), 400
+    
+    # Cursor pagination: an empty cursor= requests the first page
+    if 'cursor' in request.args:
+        limit, error = parse_page_size(request.args.get('limit'))
+        if not error:
+            page, error = decode_cursor(request.args['cursor'], query_fingerprint('events', user, start_date, end_date, fields))
+        if error:
+            return jsonify(error), 400
+        
+        events = get_calendar_events(start_date, end_date, fields, offset=page["o"], limit=limit + 1, user=user)
+        if "error" in events:
+            return jsonify(events), 400
+        if not fields:
+            index_documents("event", events, user)
+        return jsonify(page_response(select_fields(enrich_events(events, fields), fields), limit, page))
+    
+    events = get_calendar_events(start_date, end_date, fields, user=user)
     
     if "error" in events:
         return jsonify(events), 400
     
-    return jsonify(events)
+    if not fields:
+        index_documents("event", events, user)
+    return jsonify(select_fields(enrich_events(events, fields), fields))
+
+@app.route('/freebusy', methods=['GET'])
+def freebusy():
+    start_date = request.args.get('startDate')
+    end_date = request.args.get('endDate')
+    
+    if not start_date or not end_date:
+        return jsonify({"error": "startDate and endDate parameters are required"}), 400
+    
+    try:
+        min_minutes = int(request.args.get('minMinutes', 30))
+    except ValueError:
+        return jsonify({"error": "minMinutes must be an integer."}), 400
+    
+    user, error = get_request_user()
+    if error:
+        return jsonify(error), 403
+    
+    result = compute_freebusy(start_date, end_date, max(1, min_minutes), user)
+    if result is None:
+        return jsonify({"error": "The calendar could not be read. Retry later."}), 502
+    if "error" in result:
+        return jsonify(result), 400
+    
+    return jsonify(result)
+
+@app.route('/search', methods=['GET'])
+def search():
+    query = request.args.get('q')
+    if not query:
+        return jsonify({"error": "q parameter is required"}), 400
+    
+    types = request.args.get('types')
+    type_list = [t.strip() for t in types.split(",")] if types else None
+    unknown = [t for t in type_list or [] if t not in SEARCH_DOCUMENT_TYPES]
+    if unknown:
+        return jsonify({"error": f"Unknown types: {', '.join(unknown)}. Valid types: {', '.join(SEARCH_DOCUMENT_TYPES)}."}), 400
+    
+    limit, error = parse_page_size(request.args.get('limit'), default=10)
+    if error:
+        return jsonify(error), 400
+    
+    user, error = get_request_user()
+    if error:
+        return jsonify(error), 403
+    
+    results = search_index(query, type_list, limit, user)
+    return jsonify([dict(result, item=result["item"].to_dict()) for result in results])
+
+@app.route('/digest', methods=['GET'])
+def digest():
+    user, error = get_request_user()
+    if error:
+        return jsonify(error), 403
+    
+    snapshot = get_digest_snapshot(user, digest_day())
+    headers = {
+        "ETag": f'"{snapshot["etag"]}"',
+        "Cache-Control": f"private, max-age={DIGEST_MAX_AGE}",
+        "Vary": "Accept-Encoding"
+    }
+    if request.if_none_match.contains(snapshot["etag"]):
+        return "", 304, headers
+    
+    try:
+        with open(snapshot["path"], 'rb') as f:
+            body = f.read()
+    except OSError:
+        # Pruned or removed since it was written; write it again
+        snapshot = rebuild_digest_snapshot(user, digest_day())
+        headers["ETag"] = f'"{snapshot["etag"]}"'
+        with open(snapshot["path"], 'rb') as f:
+            body = f.read()
+    
+    headers["Content-Type"] = "application/json"
+    if "gzip" in request.accept_encodings:
+        headers["Content-Encoding"] = "gzip"
+        return body, 200, headers
+    return gzip.decompress(body), 200, headers
+
+@app.route('/batch', methods=['POST'])
+def batch():
+    """Run several GET sub-requests in one round trip"""
+    body = request.get_json(silent=True)
+    items = body.get("requests") if isinstance(body, dict) else body
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Body must be a non-empty array of requests"}), 400
+    if len(items) > BATCH_MAX_REQUESTS:
+        return jsonify({"error": f"At most {BATCH_MAX_REQUESTS} requests per batch"}), 400
+    
+    # Identical sub-requests run once and share the result
+    futures = {}
+    results = []
+    for index, item in enumerate(items):
+        key, error = parse_batch_item(item)
+        if key is not None and key not in futures:
+            futures[key] = batch_executor.submit(run_batch_item, *key, request.remote_addr)
+        results.append((index, item, key, error))
+    
+    responses = []
+    for index, item, key, error in results:
+        if error:
+            status, response_body = 400, {"error": error}
+        else:
+            try:
+                status, response_body = futures[key].result()
+            except Exception as e:
+                logger.error("Error in batch sub-request %s: %s", key[0], e)
+                status, response_body = 500, {"error": "Internal error"}
+        item_id = item.get("id", index) if isinstance(item, dict) else index
+        responses.append({"id": item_id, "status": status, "body": response_body})
+    
+    return jsonify({"responses": responses})
+
+@app.route('/webhooks/graph', methods=['POST'])
+def graph_webhook():
+    # Subscription validation: echo the token back as plain text
+    validation_token = request.args.get('validationToken')
+    if validation_token is not None:
+        return validation_token, 200, {'Content-Type': 'text/plain'}
+    
+    payload = request.get_json(silent=True) or {}
+    notifications = payload.get("value")
+    if not isinstance(notifications, list):
+        return jsonify({"error": "Expected a list of notifications in value."}), 400
+    
+    applied = sum(1 for notification in notifications if apply_graph_notification(notification))
+    if notifications and not applied:
+        logger.warning("Rejected %s Graph notifications with an unknown clientState", len(notifications))
+        return jsonify({"error": "Unknown clientState."}), 403
+    return "", 202
+
+@app.route('/webhooks/jira', methods=['POST'])
+def jira_webhook():
+    body = request.get_data()
+    if not verify_jira_webhook(body, request.headers.get('X-Hub-Signature'), request.args.get('secret')):
+        return jsonify({"error": "Invalid webhook signature."}), 403
+    
+    try:
+        event = json.loads(body)
+    except ValueError:
+        return jsonify({"error": "Expected a JSON issue event."}), 400
+    if not isinstance(event, dict):
+        return jsonify({"error": "Expected a JSON issue event."}), 400
+    
+    if apply_jira_event(event):
+        logger.debug("Applied %s for %s", event["webhookEvent"], (event.get("issue") or {}).get("key"))
+    return "", 202
 
 # Health check endpoint
 @app.route('/health', methods=['GET'])
 def health_check():
-    jira_status = "configured" if jira_client else "not configured"
-    ms_graph_status = "configured" if ms_graph_configured else "not configured"
-    
-    # Test MS Graph token if not already checked
-    if not ms_graph_configured:
-        get_ms_graph_token()
-    
+    # Answered from the prober's last results, never by calling upstream
     return jsonify({
         "status": "ok", 
         "version": "1.0.0",
         "services": {
-            "jira": jira_status,
-            "microsoft_graph": ms_graph_status,
-            "youtube": "not configured",
-            "news": "not configured"
-        }
+            "jira": "configured" if JIRA_API_KEY and JIRA_EMAIL else "not configured",
+            "microsoft_graph": "configured" if all([MS_TENANT_ID, MS_CLIENT_ID, MS_CLIENT_SECRET]) else "not configured",
+            "youtube": "configured" if youtube_channels else "not configured",
+            "news": "configured" if news_feeds else "not configured"
+        },
+        "checks": {name: check["status"] for name, check in health_state["checks"].items()}
+    })
+
+@app.route('/health/deep', methods=['GET'])
+def deep_health_check():
+    """Latest token, Graph and Jira checks with latencies and timestamps"""
+    checks = health_state["checks"]
+    if not checks:
+        status = "unknown"
+    elif any(check["status"] == "error" for check in checks.values()):
+        status = "degraded"
+    else:
+        status = "ok"
+    return jsonify({
+        "status": status,
+        "checkedAt": health_state["checkedAt"],
+        "interval": HEALTH_CHECK_INTERVAL,
+        "checks": checks
     })
 
 if __name__ == '__main__':
-    # Try to get MS Graph token at startup
-    get_ms_graph_token()
+    # The Graph token is acquired on first use (or by the prewarm) rather than before listening
+    init_worker()
     
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('FLASK_ENV', 'development') == 'development'
@@ -0,0 +1,51 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+import app
+
+# Benchmark the /important scoring pipeline on synthetic mailboxes
+
+SUBJECT_WORDS = "project update review quarterly report team lunch plan budget notes follow up question".split()
+KEYWORDS = ["urgent", "asap", "deadline", "invoice", "action required", "meeting", "overdue"]
+SENDERS = ["boss@company.com", "colleague@company.com", "vendor@supplier.com", "news@example.org", "client@bigcorp.com"]
+
+def make_emails(count):
+    """Generate Email records like get_important_emails returns"""
+    now = datetime.now()
+    emails = []
+    for i in range(count):
+        subject = " ".join(random.choice(SUBJECT_WORDS) for _ in range(6))
+        snippet = " ".join(random.choice(SUBJECT_WORDS) for _ in range(30))
+        # Roughly one in five emails mentions a keyword
+        if random.random() < 0.2:
+            snippet += " " + random.choice(KEYWORDS)
+        emails.append(app.Email.from_dict({
+            "id": f"email{i}",
+            "subject": subject,
+            "sender": random.choice(SENDERS),
+            "receivedAt": (now - timedelta(minutes=random.randint(0, 24 * 60))).isoformat(),
+            "read": random.random() < 0.5,
+            "snippet": snippet
+        }))
+    return emails
+
+def bench_rank_emails(count, top_k=10, runs=5):
+    emails = make_emails(count)
+    tier_index = app.build_contact_index(["boss@company.com", "*@bigcorp.com"])
+    
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        top = app.rank_emails(emails, top_k, tier_index)
+        timings.append(time.perf_counter() - start)
+    
+    best = min(timings)
+    print(f"{count:>6} emails: best {best * 1000:.1f} ms "
+          f"({best / count * 1e6:.1f} us/email), top score {top[0]['score']}")
+
+if __name__ == "__main__":
+    random.seed(42)
+    print("Benchmarking importance scoring...")
+    for count in (1000, 10000):
+        bench_rank_emails(count)
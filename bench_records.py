@@ -0,0 +1,94 @@
+import gc
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import app
+
+# Compare memory per cached item and serialization speed of records against the dicts they replaced
+
+COUNT = 100000
+NOW = datetime.now(timezone.utc)
+
+def iso(minutes_ago):
+    return (NOW - timedelta(minutes=minutes_ago)).isoformat()
+
+def make_event_dict(i):
+    start = random.randint(0, 60 * 24 * 30)
+    return {
+        "id": f"AAMkAG{i:012d}",
+        "title": f"Planning session {i}",
+        "start": iso(start),
+        "end": iso(start - 30),
+        "location": "Conference Room A",
+        "attendees": ["john@company.com", "mary@company.com"],
+        "seriesId": None
+    }
+
+def make_email_dict(i):
+    return {
+        "id": f"AAMkAG{i:012d}",
+        "subject": f"Quarterly report follow up {i}",
+        "sender": "colleague@company.com",
+        "receivedAt": iso(random.randint(0, 60 * 24)),
+        "read": random.random() < 0.5,
+        "snippet": "Please review the attached numbers before the meeting on Thursday."
+    }
+
+def make_task_dict(i):
+    return {
+        "id": f"PROJ-{i}",
+        "title": f"Fix payment processing bug {i}",
+        "status": "In Progress",
+        "priority": "High",
+        "assignee": "John Smith",
+        "updated": iso(random.randint(0, 60 * 24 * 7))
+    }
+
+def measure(build):
+    """Bytes allocated by the list build() returns, per item"""
+    gc.collect()
+    tracemalloc.start()
+    items = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return items, size / len(items)
+
+def bench_memory(name, make_dict, record_type, time_field):
+    random.seed(42)
+    dicts, dict_size = measure(lambda: [make_dict(i) for i in range(COUNT)])
+    # The same items, with only the record kept once each dict is parsed
+    random.seed(42)
+    records, record_size = measure(lambda: [record_type.from_dict(make_dict(i)) for i in range(COUNT)])
+    
+    start = time.perf_counter()
+    for record in records:
+        record.to_dict()
+    serialize = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for item in dicts:
+        record_type.from_dict(item)
+    parse = time.perf_counter() - start
+    
+    # A time window filter, as the providers run on every request
+    cutoff = (NOW - timedelta(days=1)).timestamp()
+    start = time.perf_counter()
+    [item for item in dicts if datetime.fromisoformat(item[time_field]).timestamp() > cutoff]
+    dict_filter = time.perf_counter() - start
+    slot = record_type.TIMES[record_type.FIELDS[time_field]]
+    start = time.perf_counter()
+    [record for record in records if getattr(record, slot) > cutoff]
+    record_filter = time.perf_counter() - start
+    
+    print(f"{name:>6}: dict {dict_size:6.0f} B, record {record_size:6.0f} B per item "
+          f"({(1 - record_size / dict_size) * 100:.0f}% less)")
+    print(f"        {COUNT // 1000}k items: parse once {parse * 1000:.0f} ms, to_dict {serialize * 1000:.0f} ms, "
+          f"time filter {dict_filter * 1000:.0f} ms as dicts vs {record_filter * 1000:.0f} ms as records")
+
+if __name__ == "__main__":
+    print(f"Benchmarking {COUNT} records against dicts...")
+    bench_memory("Event", make_event_dict, app.Event, "start")
+    bench_memory("Email", make_email_dict, app.Email, "receivedAt")
+    bench_memory("Task", make_task_dict, app.Task, "updated")
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import time
+
+import requests
+
+# Benchmark cold start: importing the app and serving the first request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PORT = int(os.getenv('BENCH_PORT', 5099))
+
+def bench_import(runs=5):
+    """Import the app in a fresh interpreter, timed inside the child"""
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c",
+             "import time; start = time.perf_counter(); import app; print(time.perf_counter() - start)"],
+            cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    
+    eager = subprocess.run(
+        [sys.executable, "-c", "import app, sys; print(' '.join(m for m in ('atlassian', 'msal', 'requests') if m in sys.modules))"],
+        cwd=HERE, capture_output=True, text=True, check=True
+    ).stdout.strip()
+    print(f"Import: best {min(timings) * 1000:.0f} ms, median {sorted(timings)[runs // 2] * 1000:.0f} ms "
+          f"(client libraries imported eagerly: {eager or 'none'})")
+
+def bench_first_request(path="/tasks", runs=3):
+    """Start the server and poll until the first request to path is served"""
+    env = dict(os.environ, PORT=str(PORT), FLASK_ENV='production')
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        server = subprocess.Popen([sys.executable, "app.py"], cwd=HERE, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                try:
+                    response = requests.get(f"http://localhost:{PORT}{path}", timeout=5)
+                    break
+                except requests.exceptions.ConnectionError:
+                    time.sleep(0.01)
+            timings.append(time.perf_counter() - start)
+        finally:
+            server.terminate()
+            server.wait()
+    
+    print(f"First {path} response ({response.status_code}): best {min(timings) * 1000:.0f} ms "
+          f"after starting the server")
+
+if __name__ == "__main__":
+    print("Benchmarking startup...")
+    bench_import()
+    bench_first_request("/health")
+    bench_first_request("/tasks")
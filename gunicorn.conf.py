@@ -0,0 +1,15 @@
+import os
+
+# gunicorn reads this file from the working directory. The app imports cheaply and
+# without opening connections, so it is loaded once and shared by forked workers.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() in ('true', 'yes', '1')
+
+# Threaded workers, so each process serves requests concurrently and MAX_CONCURRENT_REQUESTS
+# and the wait queue in front of it apply. Keep threads above their sum so the queue can fill.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 32))
+
+def post_fork(server, worker):
+    # Start background threads and open connections in the worker, never in the master
+    import app
+    app.init_worker()
@@ -27,6 +27,25 @@ def test_health_check():
     else:
         print(f"Error getting health check: {response.status_code}")
 
+def test_deep_health_check():
+    print("\n--- Testing Deep Health Check ---")
+    
+    headers = {"X-API-Key": "deep-health-test"}
+    data = requests.get(f"{BASE_URL}/health/deep", headers=headers).json()
+    checks = data.get("checks", {})
+    if set(checks) == {"token", "microsoft_graph", "jira"}:
+        print(f"✅ Deep health reports {data['status']}: " +
+              ", ".join(f"{name} {check['status']} in {check['latencyMs']} ms" for name, check in checks.items()))
+    else:
+        print(f"❌ Unexpected deep health checks: {data}")
+    
+    # Probes only read the cached results, and a burst of them is rate limited
+    statuses = [requests.get(f"{BASE_URL}/health/deep", headers=headers).status_code for _ in range(10)]
+    if 429 in statuses:
+        print("✅ Deep health is rate limited")
+    else:
+        print(f"❌ Deep health was never rate limited: {statuses}")
+
 def test_youtube_videos():
     print("\n--- Testing YouTube Monitor API ---")
     
@@ -65,6 +84,152 @@ def test_news_headlines():
     response = requests.get(f"{BASE_URL}/headlines?topics=economy&hours=12")
     print(f"Economy news from last 12 hours: {len(response.json())} articles returned")
 
+def test_sparse_fieldsets():
+    print("\n--- Testing Sparse Fieldsets ---")
+    
+    response = requests.get(f"{BASE_URL}/videos?fields=title,publishedAt")
+    videos = response.json()
+    if videos and set(videos[0].keys()) == {"id", "title", "publishedAt"}:
+        print(f"✅ Videos trimmed to: {', '.join(videos[0].keys())}")
+    else:
+        print(f"❌ Unexpected video fields: {videos[:1]}")
+    
+    response = requests.get(f"{BASE_URL}/headlines?fields=title")
+    headlines = response.json()
+    if headlines and set(headlines[0].keys()) == {"id", "title"}:
+        print(f"✅ Headlines trimmed to: {', '.join(headlines[0].keys())}")
+    else:
+        print(f"❌ Unexpected headline fields: {headlines[:1]}")
+    
+    # Unknown fields should be rejected
+    response = requests.get(f"{BASE_URL}/tasks?fields=title,nonexistent")
+    if response.status_code == 400:
+        print(f"✅ Unknown field rejected: {response.json().get('error')}")
+    else:
+        print(f"❌ Unexpected response for unknown field: {response.status_code}")
+
+def test_search():
+    print("\n--- Testing Search API ---")
+    
+    # Fetching videos and headlines feeds them into the search index
+    requests.get(f"{BASE_URL}/videos")
+    requests.get(f"{BASE_URL}/headlines")
+    
+    response = requests.get(f"{BASE_URL}/search?q=market")
+    results = response.json()
+    print(f"Search for 'market': {len(results)} results")
+    for result in results:
+        print(f"  {result.get('type')}: {result['item'].get('title')} (score {result.get('score')})")
+    
+    if {r.get('type') for r in results} >= {"video", "headline"}:
+        print("✅ Search found matches across videos and headlines")
+    else:
+        print("❌ Expected matches from both videos and headlines")
+    
+    response = requests.get(f"{BASE_URL}/search?q=market&types=headline")
+    if all(r.get('type') == 'headline' for r in response.json()):
+        print("✅ types filter limited results to headlines")
+    else:
+        print("❌ types filter returned other document types")
+    
+    response = requests.get(f"{BASE_URL}/search")
+    if response.status_code == 400:
+        print(f"✅ Missing query rejected: {response.json().get('error')}")
+    else:
+        print(f"❌ Unexpected response without a query: {response.status_code}")
+
+def test_digest():
+    print("\n--- Testing Digest API ---")
+    
+    response = requests.get(f"{BASE_URL}/digest")
+    if response.status_code != 200:
+        print(f"❌ Error getting digest: {response.status_code}")
+        return
+    
+    digest = response.json()
+    sections = [key for key in ("tasks", "important", "events", "headlines") if key in digest]
+    print(f"Digest for {digest.get('date')}: {', '.join(sections)}")
+    if response.headers.get('Content-Encoding') == 'gzip' and response.headers.get('ETag'):
+        print("✅ Digest served precompressed with an ETag")
+    else:
+        print(f"❌ Unexpected digest headers: {dict(response.headers)}")
+    
+    # The same snapshot revalidates without a body
+    response = requests.get(f"{BASE_URL}/digest", headers={"If-None-Match": response.headers.get('ETag', '')})
+    if response.status_code == 304:
+        print("✅ Unchanged digest returns 304 Not Modified")
+    else:
+        print(f"❌ Expected 304 for a matching ETag, got {response.status_code}")
+
+def test_user_selection():
+    print("\n--- Testing User Selection ---")
+    
+    response = requests.get(f"{BASE_URL}/important?user=nobody@example.com")
+    if response.status_code == 403:
+        print(f"✅ Unknown user rejected: {response.json().get('error')}")
+    else:
+        print(f"❌ Unknown user returned {response.status_code}")
+    
+    default = requests.get(f"{BASE_URL}/tasks").json()
+    response = requests.get(f"{BASE_URL}/tasks", headers={"X-User-Email": "cory@wfpcc.com"})
+    if response.status_code == 200 and [t["id"] for t in response.json()] == [t["id"] for t in default]:
+        print("✅ X-User-Email selects the default user's tasks")
+    else:
+        print(f"❌ Unexpected tasks for the default user: {response.status_code}")
+
+def test_batch():
+    print("\n--- Testing Batch Requests ---")
+    
+    response = requests.post(f"{BASE_URL}/batch", json=[
+        {"id": "tasks", "path": "/tasks?fields=title"},
+        {"id": "same-tasks", "path": "/tasks", "params": {"fields": "title"}},
+        {"id": "headlines", "path": "/headlines?hours=12"},
+        {"id": "nested", "path": "/batch"}
+    ], headers={"X-API-Key": "batch-test"})
+    responses = {item["id"]: item for item in response.json().get("responses", [])}
+    
+    if responses.get("tasks", {}).get("status") == 200 and responses["tasks"]["body"] == responses["same-tasks"]["body"]:
+        print("✅ Identical sub-requests returned the same body")
+    else:
+        print(f"❌ Unexpected task sub-responses: {responses}")
+    if responses.get("headlines", {}).get("status") == 200:
+        print(f"✅ Headlines sub-request returned {len(responses['headlines']['body'])} items")
+    else:
+        print(f"❌ Unexpected headlines sub-response: {responses.get('headlines')}")
+    if responses.get("nested", {}).get("status") == 400:
+        print("✅ Nested batch was rejected")
+    else:
+        print(f"❌ Nested batch was not rejected: {responses.get('nested')}")
+    
+    response = requests.post(f"{BASE_URL}/batch", json={"requests": []}, headers={"X-API-Key": "batch-test"})
+    if response.status_code == 400:
+        print("✅ Empty batch was rejected")
+    else:
+        print(f"❌ Empty batch returned {response.status_code}")
+
+def test_rate_limiting():
+    print("\n--- Testing Admission Control ---")
+    
+    # A dedicated API key (listed in the server's RATE_LIMIT_API_KEYS) keeps other tests' token buckets full
+    headers = {"X-API-Key": "rate-limit-test"}
+    statuses = [requests.get(f"{BASE_URL}/videos", headers=headers) for _ in range(40)]
+    limited = [r for r in statuses if r.status_code == 429]
+    print(f"Burst of 40 requests: {len(limited)} rate limited")
+    
+    if limited:
+        retry_after = limited[0].headers.get('Retry-After')
+        if retry_after:
+            print(f"✅ Rate limited responses include Retry-After: {retry_after}")
+        else:
+            print("❌ Rate limited response is missing Retry-After")
+    
+    # The health check must never be shed
+    health_statuses = {requests.get(f"{BASE_URL}/health", headers=headers).status_code for _ in range(40)}
+    if health_statuses == {200}:
+        print("✅ Health check was never rate limited")
+    else:
+        print(f"❌ Health check returned statuses: {health_statuses}")
+
 def test_all_services():
     """Run specialized test scripts for services with detailed tests"""
     print("\n--- Running Specialized Service Tests ---")
@@ -100,10 +265,17 @@ if __name__ == "__main__":
     
     try:
         test_health_check()
+        test_deep_health_check()
         
         # Basic API tests
         test_youtube_videos()
         test_news_headlines()
+        test_sparse_fieldsets()
+        test_search()
+        test_digest()
+        test_user_selection()
+        test_batch()
+        test_rate_limiting()
         
         # Run specialized service tests
         test_all_services()
@@ -0,0 +1,27 @@
+import app
+
+# Checks /batch sub-requests run inside the batch's own concurrency slot
+
+def test_batch_items_share_the_batch_slot():
+    print("\n=== Testing Batch Admission ===")
+
+    max_concurrent = app.MAX_CONCURRENT_REQUESTS
+    app.MAX_CONCURRENT_REQUESTS = 1
+    try:
+        client = app.app.test_client()
+        response = client.post("/batch", json=[
+            {"id": "videos", "path": "/videos?fields=title"},
+            {"id": "headlines", "path": "/headlines?hours=12"}
+        ], environ_base={'REMOTE_ADDR': '10.0.0.47'})
+        assert response.status_code == 200
+        statuses = {item["id"]: item["status"] for item in response.get_json()["responses"]}
+        # With one slot, a sub-request taking a second slot would be shed with 503
+        assert statuses == {"videos": 200, "headlines": 200}, statuses
+        assert app.admission_state["active"] == 0
+    finally:
+        app.MAX_CONCURRENT_REQUESTS = max_concurrent
+
+if __name__ == "__main__":
+    print("Starting batch admission tests...")
+    test_batch_items_share_the_batch_slot()
+    print("\nAll batch admission tests completed.")
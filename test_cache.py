@@ -0,0 +1,175 @@
+import os
+import socketserver
+import tempfile
+import threading
+import time
+
+import app
+
+# Exercises the cache backends, including a Redis-protocol backend against a local stand-in
+
+class RedisStandIn(socketserver.ThreadingTCPServer):
+    """Minimal server for the GET, SET (PX, NX), INCR and DEL commands"""
+    
+    allow_reuse_address = True
+    daemon_threads = True
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), RedisHandler)
+        self.data = {}
+        self.lock = threading.Lock()
+
+class RedisHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2].decode())
+        return args
+    
+    def handle(self):
+        store = self.server
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            command = args[0].upper()
+            with store.lock:
+                now = time.time()
+                for key in [k for k, (_, expires) in store.data.items() if expires and expires <= now]:
+                    del store.data[key]
+                if command == 'GET':
+                    entry = store.data.get(args[1])
+                    if entry is None:
+                        reply = b"$-1\r\n"
+                    else:
+                        value = entry[0].encode()
+                        reply = b"$%d\r\n%s\r\n" % (len(value), value)
+                elif command == 'SET':
+                    options = [a.upper() for a in args[3:]]
+                    expires = now + int(args[4]) / 1000 if 'PX' in options else None
+                    if 'NX' in options and args[1] in store.data:
+                        reply = b"$-1\r\n"
+                    else:
+                        store.data[args[1]] = (args[2], expires)
+                        reply = b"+OK\r\n"
+                elif command == 'INCR':
+                    value, expires = store.data.get(args[1], ("0", None))
+                    store.data[args[1]] = (str(int(value) + 1), expires)
+                    reply = b":%d\r\n" % (int(value) + 1)
+                elif command == 'DEL':
+                    reply = b":%d\r\n" % (1 if store.data.pop(args[1], None) else 0)
+                else:
+                    reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+
+def check_backend(name, cache, other_node):
+    key = app.cache_key('test', name, time.time())
+    
+    cache.set(key, {"value": [1, 2]}, 0.2)
+    # The value is visible to the other node
+    assert other_node.get(key) == {"value": [1, 2]}, (name, other_node.get(key))
+    
+    time.sleep(0.3)
+    assert cache.get(key) is None, f"{name}: value still present after its TTL"
+    
+    # add only succeeds once
+    assert cache.add(key, 1, 10), name
+    assert not other_node.add(key, 2, 10), f"{name}: add was not atomic"
+    cache.delete(key)
+    
+    # Counters are shared and keep the expiry of their first increment
+    counts = [cache.incr(key, 0.2), other_node.incr(key, 0.2), cache.incr(key, 10)]
+    assert counts == [1, 2, 3], (name, counts)
+    time.sleep(0.3)
+    assert cache.incr(key, 10) == 1, f"{name}: counter outlived its TTL"
+    cache.delete(key)
+    
+    # Two nodes asking for the same missing value compute it once
+    calls = []
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"token": "abc"}
+    compute_key = app.cache_key('test', name, 'compute', time.time())
+    results = []
+    threads = [
+        threading.Thread(target=lambda node=node: results.append(node.get_or_compute(compute_key, 10, compute)))
+        for node in (cache, other_node, cache, other_node)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1, f"{name}: computed {len(calls)} times"
+    assert results == [{"token": "abc"}] * 4, (name, results)
+    print(f"✅ {name}: shared, expiring values computed once for four callers")
+
+def test_cache_backends():
+    print("\n=== Testing Cache Backends ===")
+    
+    memory = app.MemoryCache(max_entries=100)
+    check_backend("memory", memory, memory)
+    
+    lru = app.MemoryCache(max_entries=2)
+    lru.set("a", 1, 60)
+    lru.set("b", 2, 60)
+    lru.get("a")
+    lru.set("c", 3, 60)
+    # The least recently used entry is evicted
+    assert lru.get("b") is None and lru.get("a") == 1
+    print("✅ memory: least recently used entry evicted")
+    
+    # A heavy user filling the budget evicts their own entries, not a light user's
+    fair = app.MemoryCache(max_entries=1000, max_bytes=20000)
+    fair.set(app.user_cache_key("light@example.com", "events", 1), "x" * 1000, 60)
+    for i in range(100):
+        fair.set(app.user_cache_key("heavy@example.com", "events", i), "x" * 1000, 60)
+    heavy_kept = sum(1 for i in range(100) if fair.get(app.user_cache_key("heavy@example.com", "events", i)))
+    assert fair.get(app.user_cache_key("light@example.com", "events", 1)), "light user's entry was evicted"
+    assert fair.total_bytes <= 20000 and heavy_kept < 20, (heavy_kept, fair.total_bytes)
+    print(f"✅ memory: heavy user trimmed to {heavy_kept} entries, light user's entry kept")
+    
+    folder = tempfile.mkdtemp()
+    fair = None
+    try:
+        path = os.path.join(folder, "cache.db")
+        check_backend("sqlite", app.SQLiteCache(path, 100), app.SQLiteCache(path, 100))
+        
+        fair = app.SQLiteCache(os.path.join(folder, "fair.db"), 1000, max_bytes=20000)
+        fair.set(app.user_cache_key("light@example.com", "events", 1), "x" * 1000, 60)
+        for i in range(100):
+            fair.set(app.user_cache_key("heavy@example.com", "events", i), "x" * 1000, 60)
+        fair.evict(fair.connection())
+        # Eviction trims the largest user's shard first
+        assert fair.get(app.user_cache_key("light@example.com", "events", 1)), "light user's entry was evicted"
+        assert not fair.get(app.user_cache_key("heavy@example.com", "events", 0))
+        print("✅ sqlite: eviction trims the largest user's shard first")
+    finally:
+        if fair:
+            fair.connection().close()
+        for name in os.listdir(folder):
+            os.unlink(os.path.join(folder, name))
+        os.rmdir(folder)
+    
+    server = RedisStandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"redis://127.0.0.1:{server.server_address[1]}/0"
+    try:
+        check_backend("redis", app.RedisCache(url), app.RedisCache(url))
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    # An unreachable backend degrades to computing without the cache
+    down = app.RedisCache(url)
+    assert down.get_or_compute("key", 10, lambda: "computed") == "computed"
+    print("✅ redis: unreachable backend falls back to computing")
+
+if __name__ == "__main__":
+    print("Starting cache tests...")
+    test_cache_backends()
+    print("\nAll cache tests completed.")
@@ -110,6 +110,89 @@ def test_calendar_error_cases():
         print(f"Retrieved {len(events)} events (expected 0 since end date is before start date)")
     else:
         print(f"Error message: {response.json().get('error')}")
+    
+    # Test 4: Range wider than CALENDAR_MAX_RANGE_DAYS
+    print("\nTest 4: Range too wide")
+    response = requests.get(f"{BASE_URL}/events?startDate=1900-01-01&endDate=2100-01-01")
+    
+    if response.status_code == 400:
+        print(f"✓ Correctly rejected a 200-year range (Status: {response.status_code})")
+        print(f"Error message: {response.json().get('error')}")
+    else:
+        print(f"✗ Unexpected response for a 200-year range: {response.status_code}")
+
+def test_calendar_pagination():
+    """Test walking the events endpoint with cursors"""
+    print("\n=== Testing Calendar API Pagination ===")
+    
+    today = datetime.now().strftime("%Y-%m-%d")
+    future = (datetime.now() + timedelta(days=7)).strftime("%Y-%m-%d")
+    
+    events = []
+    cursor = ""
+    while cursor is not None:
+        response = requests.get(f"{BASE_URL}/events", params={
+            "startDate": today, "endDate": future, "cursor": cursor, "limit": 1
+        })
+        if response.status_code != 200:
+            print(f"✗ Failed to get page: {response.status_code}")
+            return
+        
+        page = response.json()
+        events.extend(page.get('items', []))
+        cursor = page.get('nextCursor')
+    
+    response = requests.get(f"{BASE_URL}/events?startDate={today}&endDate={future}")
+    if len(events) == len(response.json()):
+        print(f"✓ Paged through all {len(events)} events one at a time")
+    else:
+        print(f"✗ Paged {len(events)} events, expected {len(response.json())}")
+    
+    # A cursor from one date range can't be used with another
+    first = requests.get(f"{BASE_URL}/events", params={"startDate": today, "endDate": future, "cursor": "", "limit": 1}).json()
+    if first.get('nextCursor'):
+        response = requests.get(f"{BASE_URL}/events", params={
+            "startDate": future, "endDate": future, "cursor": first['nextCursor']
+        })
+        print(f"Reused cursor on another range: {response.status_code} (expected 400)")
+
+def test_freebusy():
+    """Test free/busy computation over a week"""
+    print("\n=== Testing Free/Busy API ===")
+    
+    # Start on a Monday so the range includes working days
+    monday = datetime.now() + timedelta(days=7 - datetime.now().weekday())
+    start = monday.strftime("%Y-%m-%d")
+    end = (monday + timedelta(days=5)).strftime("%Y-%m-%d")
+    
+    response = requests.get(f"{BASE_URL}/freebusy?startDate={start}&endDate={end}&minMinutes=45")
+    
+    if response.status_code == 200:
+        data = response.json()
+        busy = data.get('busy', [])
+        free = data.get('free', [])
+        print(f"Success! {len(busy)} busy blocks and {len(free)} free slots")
+        for block in busy[:3]:
+            print(f"  Busy: {block['start']} - {block['end']}")
+        for slot in free[:3]:
+            print(f"  Free: {slot['start']} - {slot['end']} ({slot['minutes']} min)")
+        
+        if all(slot['minutes'] >= 45 for slot in free):
+            print("✓ All free slots are at least minMinutes long")
+        else:
+            print("✗ Some free slots are shorter than minMinutes")
+        
+        overlaps = any(busy[i]['end'] > busy[i + 1]['start'] for i in range(len(busy) - 1))
+        print("✗ Busy blocks overlap" if overlaps else "✓ Busy blocks are merged")
+    else:
+        print(f"Error: {response.status_code}")
+        print(f"Response: {response.text}")
+    
+    response = requests.get(f"{BASE_URL}/freebusy?startDate={start}")
+    if response.status_code == 400:
+        print(f"✓ Correctly rejected missing date (Status: {response.status_code})")
+    else:
+        print(f"✗ Unexpected response for missing date: {response.status_code}")
 
 if __name__ == "__main__":
     print("Starting Calendar API tests...")
@@ -117,6 +200,8 @@ if __name__ == "__main__":
     try:
         test_calendar_valid_dates()
         test_calendar_error_cases()
+        test_calendar_pagination()
+        test_freebusy()
         
         print("\nAll calendar tests completed.")
     except requests.exceptions.ConnectionError:
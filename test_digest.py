@@ -0,0 +1,125 @@
+import os
+import tempfile
+import threading
+import time
+
+import app
+
+# Checks digest snapshots are rebuilt per user without one user's build blocking another's
+
+def test_digest_builds_per_user():
+    print("\n=== Testing Per-User Digest Builds ===")
+
+    slow, fast = "slow@example.com", "fast@example.com"
+    release = threading.Event()
+    def fake_build(user, day):
+        if user == slow:
+            release.wait(5)
+        return {"date": day, "user": user}
+
+    build_digest, users, digest_dir = app.build_digest, app.users, app.DIGEST_DIR
+    app.build_digest = fake_build
+    app.users = {slow: None, fast: None}
+    app.DIGEST_DIR = tempfile.mkdtemp()
+    day = app.digest_day()
+    try:
+        worker = threading.Thread(target=app.get_digest_snapshot, args=(slow, day))
+        worker.start()
+        time.sleep(0.1)
+
+        # The slow user's rebuild holds only its own lock
+        start = time.perf_counter()
+        snapshot = app.get_digest_snapshot(fast, day)
+        assert snapshot["etag"] and time.perf_counter() - start < 1
+        release.set()
+        worker.join()
+
+        # The builder keeps every user's snapshot warm
+        with app.digest_lock:
+            for user in app.users:
+                app.digest_snapshots.pop((user, day), None)
+        app.refresh_digests()
+        assert all((user, day) in app.digest_snapshots for user in app.users)
+        print("✅ Digests built per user without queueing behind each other")
+    finally:
+        release.set()
+        app.build_digest, app.users, app.DIGEST_DIR = build_digest, users, digest_dir
+        with app.digest_lock:
+            for user in (slow, fast):
+                app.digest_snapshots.pop((user, day), None)
+
+def test_digest_refresh_rebuilds_only_stale():
+    print("\n=== Testing Digest Refresh ===")
+
+    built = []
+    def fake_build(user, day):
+        built.append(user)
+        return {"date": day, "user": user}
+
+    first, second = "first@example.com", "second@example.com"
+    build_digest, users, digest_dir = app.build_digest, app.users, app.DIGEST_DIR
+    app.build_digest = fake_build
+    app.users = {first: None, second: None}
+    app.DIGEST_DIR = tempfile.mkdtemp()
+    day = app.digest_day()
+    try:
+        app.refresh_digests()
+        app.refresh_digests()
+        assert sorted(built) == [first, second], built
+
+        # A notification for one user rebuilds only that user's snapshot
+        app.invalidate_digests([second])
+        app.refresh_digests()
+        assert sorted(built) == [first, second, second], built
+
+        # Another worker on the host serves the builder's snapshot without building it
+        with app.digest_lock:
+            snapshot = app.digest_snapshots.pop((first, day))
+        assert app.get_digest_snapshot(first, day)["etag"] == snapshot["etag"]
+        assert built.count(first) == 1, built
+        print("✅ Only missing or stale snapshots were rebuilt")
+    finally:
+        app.build_digest, app.users, app.DIGEST_DIR = build_digest, users, digest_dir
+        with app.digest_lock:
+            for user in (first, second):
+                app.digest_snapshots.pop((user, day), None)
+
+def test_digest_file_removed_by_another_worker():
+    print("\n=== Testing Digest Snapshot Files ===")
+
+    version = {"n": 0}
+    def fake_build(user, day):
+        return {"date": day, "user": user, "version": version["n"]}
+
+    build_digest, digest_dir = app.build_digest, app.DIGEST_DIR
+    app.build_digest = fake_build
+    app.DIGEST_DIR = tempfile.mkdtemp()
+    user, day = app.MS_USER_EMAIL, app.digest_day()
+    with app.digest_lock:
+        previous = app.digest_snapshots.pop((user, day), None)
+    try:
+        # A rebuild with new content leaves the old file for workers still serving it
+        first = app.get_digest_snapshot(user, day)
+        version["n"] = 1
+        second = app.rebuild_digest_snapshot(user, day)
+        assert second["path"] != first["path"] and os.path.exists(first["path"])
+
+        # A file removed elsewhere is written again instead of failing the request
+        os.unlink(second["path"])
+        response = app.app.test_client().get("/digest", environ_base={'REMOTE_ADDR': '10.0.0.39'})
+        assert response.status_code == 200, response.status_code
+        assert response.get_json()["version"] == 1
+        print("✅ Missing snapshot file rebuilt and served")
+    finally:
+        app.build_digest, app.DIGEST_DIR = build_digest, digest_dir
+        with app.digest_lock:
+            app.digest_snapshots.pop((user, day), None)
+            if previous:
+                app.digest_snapshots[(user, day)] = previous
+
+if __name__ == "__main__":
+    print("Starting digest tests...")
+    test_digest_builds_per_user()
+    test_digest_refresh_rebuilds_only_stale()
+    test_digest_file_removed_by_another_worker()
+    print("\nAll digest tests completed.")
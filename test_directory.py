@@ -0,0 +1,89 @@
+import re
+from urllib.parse import unquote
+
+import app
+
+# Checks sender and attendee enrichment against a fake Graph $batch endpoint
+
+class FakeResponse:
+    def __init__(self, body):
+        self.status_code = 200
+        self.body = body
+        self.text = ""
+
+    def json(self):
+        return self.body
+
+class FakeDirectory:
+    """Answers $batch requests of /users?$filter=mail in (...) queries"""
+
+    def __init__(self, users):
+        self.users = users
+        self.batches = []
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        self.batches.append(json["requests"])
+        responses = []
+        for query in json["requests"]:
+            addresses = re.findall(r"'([^']+)'", unquote(query["url"]))
+            found = [self.users[a] for a in addresses if a in self.users]
+            responses.append({"id": query["id"], "status": 200, "body": {"value": found}})
+        return FakeResponse({"responses": responses})
+
+    def looked_up(self):
+        return sum(len(re.findall(r"'([^']+)'", unquote(q["url"]))) for batch in self.batches for q in batch)
+
+def user(address, name, title):
+    return {"mail": address.title(), "displayName": name, "jobTitle": title}
+
+def test_directory_enrichment():
+    print("\n=== Testing Directory Enrichment ===")
+
+    directory = FakeDirectory({
+        "boss@company.com": user("boss@company.com", "Pat Boss", "Director"),
+        "mary@company.com": user("mary@company.com", "Mary Lee", "Engineer")
+    })
+    get_token, directory_cache = app.get_ms_graph_token, app.directory_cache
+    app.get_ms_graph_token = lambda: "token"
+    app.requests.post = directory.post
+    app.directory_cache = app.MemoryCache(100)
+
+    try:
+        emails = [
+            app.Email(id="1", sender="Boss@Company.com", received=0),
+            app.Email(id="2", sender="accounting@supplier.com", received=0)
+        ]
+        app.enrich_emails(emails)
+        first, second = (email.to_dict(["sender", "senderName", "senderTitle"]) for email in emails)
+        assert first == {"sender": "Boss@Company.com", "senderName": "Pat Boss", "senderTitle": "Director"}, first
+        # An external sender is left without details
+        assert second == {"sender": "accounting@supplier.com"}, second
+
+        # Both addresses are cached now, the external one negatively
+        events = [app.Event(id="e1", attendees=["boss@company.com", "accounting@supplier.com", "mary@company.com"])]
+        app.enrich_events(events)
+        details = events[0].to_dict(["attendeeDetails"])["attendeeDetails"]
+        names = [detail["name"] for detail in details]
+        assert names == ["Pat Boss", None, "Mary Lee"], details
+        # Each address is looked up once, external addresses included
+        assert directory.looked_up() == 3, directory.looked_up()
+        print("✅ Senders and attendees enriched with one lookup per address")
+
+        # Fields that don't need the directory skip it
+        app.enrich_emails([app.Email(id="3", sender="new@company.com")], fields=["subject"])
+        assert directory.looked_up() == 3, directory.looked_up()
+
+        # Misses are grouped into $filter queries sharing one $batch
+        batches = len(directory.batches)
+        app.lookup_directory([f"person{i}@company.com" for i in range(40)])
+        queries = [len(batch) for batch in directory.batches[batches:]]
+        assert queries == [3], queries
+        print("✅ 40 addresses resolved in one $batch of 3 queries")
+    finally:
+        app.get_ms_graph_token, app.directory_cache = get_token, directory_cache
+        del app.requests.post
+
+if __name__ == "__main__":
+    print("Starting directory enrichment tests...")
+    test_directory_enrichment()
+    print("\nAll directory enrichment tests completed.")
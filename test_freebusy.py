@@ -0,0 +1,46 @@
+import app
+
+# Checks /freebusy reports a Graph failure instead of an empty, fully free calendar
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+        self.text = str(body)
+
+    def json(self):
+        return self.body
+
+def test_freebusy_upstream_failure():
+    print("\n=== Testing Free/Busy Upstream Failure ===")
+
+    status = {"code": 503}
+    def fake_get(url, headers=None, params=None, timeout=None):
+        return FakeResponse(status["code"], {"value": []})
+
+    get_token = app.get_ms_graph_token
+    app.get_ms_graph_token = lambda: "token"
+    app.requests.get = fake_get
+    try:
+        client = app.app.test_client()
+        user = app.MS_USER_EMAIL
+        app.bump_calendar_generation(user)
+        query = "/freebusy?startDate=2030-01-07T00:00:00Z&endDate=2030-01-08T00:00:00Z"
+
+        response = client.get(query)
+        assert response.status_code == 502, response.get_json()
+
+        # The failure wasn't cached: once Graph answers, the range is computed
+        status["code"] = 200
+        response = client.get(query)
+        assert response.status_code == 200
+        assert response.get_json()["busy"] == [] and response.get_json()["free"]
+        print("✅ Graph failure returned 502 and was not cached")
+    finally:
+        app.get_ms_graph_token = get_token
+        del app.requests.get
+
+if __name__ == "__main__":
+    print("Starting free/busy tests...")
+    test_freebusy_upstream_failure()
+    print("\nAll free/busy tests completed.")
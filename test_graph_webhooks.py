@@ -0,0 +1,177 @@
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import app
+
+# Posts Graph validation requests and change notifications to /webhooks/graph locally
+
+def notification(resource, change_type, item_id, client_state="webhook-secret"):
+    return {
+        "subscriptionId": "sub-1",
+        "clientState": client_state,
+        "changeType": change_type,
+        "resource": resource,
+        "resourceData": {"id": item_id}
+    }
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+        self.text = str(body)
+    
+    def json(self):
+        return self.body
+
+def test_graph_webhook():
+    print("\n=== Testing Graph Webhook ===")
+    
+    client_state = app.GRAPH_WEBHOOK_CLIENT_STATE
+    app.GRAPH_WEBHOOK_CLIENT_STATE = "webhook-secret"
+    client = app.app.test_client()
+    user = app.MS_USER_EMAIL
+    digest_key = (user, app.digest_day())
+    snapshot = app.digest_snapshots.get(digest_key)
+    try:
+        response = client.post("/webhooks/graph?validationToken=abc%20123")
+        assert response.status_code == 200 and response.mimetype == "text/plain"
+        assert response.get_data(as_text=True) == "abc 123", response.get_data(as_text=True)
+        
+        # A notification with an unknown clientState is rejected
+        response = client.post("/webhooks/graph", json={"value": [
+            notification("Users/me/Events/AAA", "updated", "AAA", client_state="forged")
+        ]})
+        assert response.status_code == 403, response.status_code
+        
+        # A calendar notification retires the cached chunks and marks digests stale
+        generation = app.calendar_generation(user)
+        app.digest_snapshots[digest_key] = {"path": "", "etag": "", "stale": False}
+        response = client.post("/webhooks/graph", json={"value": [
+            notification(f"Users/{app.MS_USER_EMAIL}/Events/AAA", "updated", "AAA")
+        ]})
+        assert response.status_code == 202, response.status_code
+        assert app.calendar_generation(user) != generation
+        assert app.digest_snapshots[digest_key]["stale"]
+        
+        # A deleted message is removed from the search index
+        app.index_documents("email", [app.Email.from_dict({"id": "msg-1", "subject": "Quarterly webhook review",
+                                                           "sender": "a@example.com", "receivedAt": datetime.now().isoformat()})], user)
+        found = [r["item"]["id"] for r in app.search_index("webhook", ["email"], user=user)]
+        client.post("/webhooks/graph", json={"value": [
+            notification(f"Users/{app.MS_USER_EMAIL}/Messages/msg-1", "deleted", "msg-1")
+        ]})
+        remaining = [r["item"]["id"] for r in app.search_index("webhook", ["email"], user=user)]
+        assert found == ["msg-1"] and remaining == [], (found, remaining)
+        print("✅ Validated, rejected forged notifications and applied changes")
+    finally:
+        app.GRAPH_WEBHOOK_CLIENT_STATE = client_state
+        if snapshot:
+            app.digest_snapshots[digest_key] = snapshot
+        else:
+            app.digest_snapshots.pop(digest_key, None)
+
+def test_graph_subscriptions():
+    print("\n=== Testing Graph Subscription Manager ===")
+    
+    calls = []
+    def fake_request(method, url, headers=None, json=None, timeout=None):
+        calls.append((method, url, json))
+        if method == 'POST':
+            return FakeResponse(201, {"id": f"sub-{len(calls)}"})
+        return FakeResponse(200, {"id": url.rsplit('/', 1)[1]})
+    
+    settings = app.get_ms_graph_token, app.GRAPH_WEBHOOK_URL, app.GRAPH_WEBHOOK_CLIENT_STATE
+    app.get_ms_graph_token = lambda: "token"
+    app.requests.request = fake_request
+    app.GRAPH_WEBHOOK_URL = "https://example.com/webhooks/graph"
+    app.GRAPH_WEBHOOK_CLIENT_STATE = "webhook-secret"
+    try:
+        user = f"subscription-test-{time.time()}@example.com"
+        resource = f"users/{user}/messages"
+        created = app.ensure_graph_subscription("mail", user)
+        assert calls and calls[0][0] == 'POST', calls
+        assert calls[0][2]["clientState"] == "webhook-secret" and calls[0][2]["resource"] == resource, calls[0]
+        
+        # A fresh subscription is left alone
+        app.ensure_graph_subscription("mail", user)
+        assert len(calls) == 1, calls[1:]
+        
+        # Close to expiry, the subscription is renewed in place
+        app.cache.set(app.cache_key('graph-subscription', user, "mail"), {"id": created["id"], "expires": time.time() + 60}, 60)
+        renewed = app.ensure_graph_subscription("mail", user)
+        assert calls[-1][0] == 'PATCH' and calls[-1][1].endswith(created["id"]), calls[1:]
+        assert renewed["id"] == created["id"]
+        
+        # The subscription maps back to its user for notifications
+        assert app.cache.get(app.cache_key('graph-subscription-user', created["id"])) == user
+        print(f"✅ Subscription created and renewed: {created['id']}")
+    finally:
+        app.get_ms_graph_token, app.GRAPH_WEBHOOK_URL, app.GRAPH_WEBHOOK_CLIENT_STATE = settings
+        del app.requests.request
+
+def test_graph_lifecycle_events():
+    print("\n=== Testing Graph Lifecycle Events ===")
+    
+    calls = []
+    def fake_request(method, url, headers=None, json=None, timeout=None):
+        calls.append((method, url))
+        if method == 'POST':
+            return FakeResponse(201, {"id": f"sub-{len(calls)}"})
+        return FakeResponse(200, {"id": url.rsplit('/', 1)[1]})
+    
+    settings = app.get_ms_graph_token, app.GRAPH_WEBHOOK_URL, app.GRAPH_WEBHOOK_CLIENT_STATE
+    app.get_ms_graph_token = lambda: "token"
+    app.requests.request = fake_request
+    app.GRAPH_WEBHOOK_URL = "https://example.com/webhooks/graph"
+    app.GRAPH_WEBHOOK_CLIENT_STATE = "webhook-secret"
+    app.graph_subscription_wakeup.clear()
+    lifecycle_dir = app.GRAPH_LIFECYCLE_DIR
+    app.GRAPH_LIFECYCLE_DIR = tempfile.mkdtemp()
+    try:
+        user = f"lifecycle-test-{time.time()}@example.com"
+        client = app.app.test_client()
+        
+        def lifecycle(subscription_id, event, managed_here):
+            app.cache.add(app.cache_key('graph-subscription-lock'), 0, 3600)  # A round that just ran
+            app.graph_subscription_state["managed_here"] = managed_here
+            response = client.post("/webhooks/graph", json={"value": [{
+                "subscriptionId": subscription_id, "clientState": "webhook-secret", "lifecycleEvent": event
+            }]})
+            assert response.status_code == 202
+            if not managed_here:
+                # Another worker received it: the managing worker picks it up from the spool
+                assert not app.graph_subscription_wakeup.is_set() and os.listdir(app.GRAPH_LIFECYCLE_DIR)
+                app.take_spooled_lifecycle_events()
+                assert not os.listdir(app.GRAPH_LIFECYCLE_DIR)
+            assert app.graph_subscription_wakeup.is_set()
+            app.graph_subscription_wakeup.clear()
+            # The woken round can take the lock and acts on the subscription
+            assert app.cache.add(app.cache_key('graph-subscription-lock'), 0, 3600)
+            app.cache.delete(app.cache_key('graph-subscription-lock'))
+            return app.ensure_graph_subscription("mail", user)
+        
+        created = app.ensure_graph_subscription("mail", user)
+        renewed = lifecycle(created["id"], "reauthorizationRequired", managed_here=True)
+        assert calls[-1] == ('PATCH', f"https://graph.microsoft.com/v1.0/subscriptions/{created['id']}")
+        assert renewed["id"] == created["id"]
+        
+        recreated = lifecycle(created["id"], "subscriptionRemoved", managed_here=False)
+        assert calls[-1] == ('POST', "https://graph.microsoft.com/v1.0/subscriptions")
+        assert recreated["id"] != created["id"]
+        print("✅ Lifecycle events renew or recreate the subscription right away")
+    finally:
+        app.get_ms_graph_token, app.GRAPH_WEBHOOK_URL, app.GRAPH_WEBHOOK_CLIENT_STATE = settings
+        del app.requests.request
+        app.graph_subscription_state["managed_here"] = False
+        shutil.rmtree(app.GRAPH_LIFECYCLE_DIR)
+        app.GRAPH_LIFECYCLE_DIR = lifecycle_dir
+
+if __name__ == "__main__":
+    print("Starting Graph webhook tests...")
+    test_graph_webhook()
+    test_graph_subscriptions()
+    test_graph_lifecycle_events()
+    print("\nAll Graph webhook tests completed.")
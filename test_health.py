@@ -0,0 +1,54 @@
+import threading
+
+import app
+
+# Checks the health prober can fetch a token whose cache key shares a lock stripe with its own
+
+class FakeResponse:
+    status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+def test_health_probe_with_colliding_keys():
+    print("\n=== Testing Health Probe Locking ===")
+
+    health_key = app.cache_key('health')
+    stripe = hash(health_key) % app.Cache.LOCK_STRIPES
+    token_key = next(key for key in (app.cache_key('health-test-token', i) for i in range(10000))
+                     if hash(key) % app.Cache.LOCK_STRIPES == stripe)
+
+    settings = (app.get_ms_graph_token, app.get_jira_client, app.MS_TENANT_ID, app.MS_CLIENT_ID,
+                app.MS_CLIENT_SECRET, dict(app.health_state))
+    app.get_ms_graph_token = lambda: app.cache.get_or_compute(token_key, 60, lambda: "token")
+    app.get_jira_client = lambda: None
+    app.MS_TENANT_ID = app.MS_CLIENT_ID = app.MS_CLIENT_SECRET = "configured"
+    app.requests.get = lambda *args, **kwargs: FakeResponse()
+    app.cache.delete(health_key)
+    app.cache.delete(f"{health_key}:lock")
+    try:
+        worker = threading.Thread(target=app.refresh_health, daemon=True)
+        worker.start()
+        worker.join(5)
+        assert not worker.is_alive(), "refresh_health blocked on its own key lock"
+        assert app.health_state["checks"]["token"]["status"] == "ok", app.health_state
+        assert app.health_state["checks"]["microsoft_graph"]["status"] == "ok", app.health_state
+
+        # The next round within the interval reads the stored result instead of probing again
+        app.get_ms_graph_token = lambda: None
+        assert app.refresh_health()["checks"]["token"]["status"] == "ok"
+        print("✅ Health probe fetched a token on the same lock stripe")
+    finally:
+        (app.get_ms_graph_token, app.get_jira_client, app.MS_TENANT_ID, app.MS_CLIENT_ID,
+         app.MS_CLIENT_SECRET, health_state) = settings
+        app.health_state.clear()
+        app.health_state.update(health_state)
+        del app.requests.get
+        app.cache.delete(token_key)
+        app.cache.delete(health_key)
+        app.cache.delete(f"{health_key}:lock")
+
+if __name__ == "__main__":
+    print("Starting health probe tests...")
+    test_health_probe_with_colliding_keys()
+    print("\nAll health probe tests completed.")
@@ -0,0 +1,20 @@
+import app
+
+# Checks keyword weights for importance ranking, including overlapping keywords
+
+def test_overlapping_keywords():
+    print("\n=== Testing Importance Keywords ===")
+
+    matcher = app.build_keyword_matcher({"action required now": 1, "now please": 2})
+    # "now please" starts at the last word of "action required now"
+    assert app.keyword_score(matcher, "Action required now please") == 3
+
+    matcher = app.build_keyword_matcher({"urgent": 5, "deadline": 3, "urgent deadline": 1})
+    assert app.keyword_score(matcher, "Urgent deadline moved") == 9
+    assert app.keyword_score(matcher, "No rush") == 0
+    print("✅ Overlapping and contained keywords each count once")
+
+if __name__ == "__main__":
+    print("Starting importance keyword tests...")
+    test_overlapping_keywords()
+    print("\nAll importance keyword tests completed.")
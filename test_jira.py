@@ -202,6 +202,38 @@ def test_jira_tasks():
         print(f"❌ Failed to get tasks: {response.status_code}")
         print(f"Response: {response.text}")
 
+def test_jira_task_pagination():
+    """Test walking the tasks endpoint with cursors"""
+    
+    print("\n=== Testing Jira Tasks Pagination ===")
+    
+    seen = []
+    cursor = ""
+    pages = 0
+    while cursor is not None and pages < 20:
+        response = requests.get(f"{BASE_URL}/tasks", params={"cursor": cursor, "limit": 2})
+        if response.status_code != 200:
+            print(f"❌ Failed to get page {pages + 1}: {response.status_code}")
+            return
+        
+        page = response.json()
+        seen.extend(task.get('id') for task in page.get('items', []))
+        cursor = page.get('nextCursor')
+        pages += 1
+    
+    print(f"Walked {pages} pages with {len(seen)} tasks")
+    if len(seen) == len(set(seen)):
+        print("✅ No task was returned twice")
+    else:
+        print("❌ Some tasks were returned on more than one page")
+    
+    # A tampered cursor should be rejected
+    response = requests.get(f"{BASE_URL}/tasks", params={"cursor": "not-a-cursor"})
+    if response.status_code == 400:
+        print(f"✅ Invalid cursor rejected: {response.json().get('error')}")
+    else:
+        print(f"❌ Unexpected response for invalid cursor: {response.status_code}")
+
 if __name__ == "__main__":
     print("Starting Jira API tests...")
     
@@ -212,6 +244,7 @@ if __name__ == "__main__":
         direct_jira_diagnostics()
         
         test_jira_tasks()
+        test_jira_task_pagination()
         
         print("\nAll tests completed.")
     except requests.exceptions.ConnectionError:
@@ -0,0 +1,66 @@
+import re
+import threading
+import time
+
+import app
+
+# Checks /tasks?projects= merges per-project Jira searches locally with a fake client
+
+class FakeJira:
+    """Serves open issues per project, newest first, with a delay per search"""
+    
+    def __init__(self, issues, delay=0.2):
+        self.issues = issues
+        self.delay = delay
+        self.limits = {}
+        self.lock = threading.Lock()
+    
+    def jql(self, jql, fields=None, start=0, limit=5):
+        project = re.match(r"project = (\w+)", jql).group(1)
+        with self.lock:
+            self.limits[project] = limit
+        time.sleep(self.delay)
+        return {"issues": self.issues.get(project, [])[start:start + limit]}
+
+def issue(key, minutes_ago):
+    updated = time.strftime('%Y-%m-%dT%H:%M:%S.000+0000', time.gmtime(time.time() - minutes_ago * 60))
+    return {"key": key, "fields": {"summary": f"Task {key}", "updated": updated}}
+
+def test_multi_project_tasks():
+    print("\n=== Testing Multi-Project Tasks ===")
+    
+    jira_client = app.jira_client
+    app.jira_client = FakeJira({
+        "ALPHA": [issue("ALPHA-1", 5), issue("ALPHA-2", 50), issue("ALPHA-3", 500)],
+        "BETA": [issue("BETA-1", 10), issue("BETA-2", 20), issue("BETA-3", 30)],
+        "GAMMA": [issue("GAMMA-1", 1)]
+    })
+    client = app.app.test_client()
+    try:
+        # Concurrent searches take about one delay, not one per project
+        start = time.perf_counter()
+        tasks = client.get("/tasks?projects=alpha,beta,gamma&limit=4&fields=title").get_json()
+        elapsed = time.perf_counter() - start
+        ids = [task["id"] for task in tasks]
+        assert ids == ["GAMMA-1", "ALPHA-1", "BETA-1", "BETA-2"], ids
+        assert elapsed < 0.5, f"searches took {elapsed * 1000:.0f} ms"
+        # Each project is asked for at most limit issues
+        assert set(app.jira_client.limits.values()) == {4}, app.jira_client.limits
+        print(f"✅ Projects searched concurrently and merged newest first ({elapsed * 1000:.0f} ms)")
+        
+        # The next page continues the same merged order
+        first = client.get("/tasks?projects=ALPHA,BETA&cursor=&limit=2").get_json()
+        second = client.get(f"/tasks?projects=ALPHA,BETA&cursor={first['nextCursor']}&limit=2").get_json()
+        pages = [task["id"] for task in first["items"] + second["items"]]
+        assert pages == ["ALPHA-1", "BETA-1", "BETA-2", "BETA-3"], pages
+        
+        response = client.get("/tasks?projects=ALPHA,X%20OR%201=1")
+        assert response.status_code == 400, response.status_code
+        print("✅ Cursor pages follow the merged order and invalid keys are rejected")
+    finally:
+        app.jira_client = jira_client
+
+if __name__ == "__main__":
+    print("Starting multi-project task tests...")
+    test_multi_project_tasks()
+    print("\nAll multi-project task tests completed.")
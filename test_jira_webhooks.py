@@ -0,0 +1,71 @@
+import hashlib
+import hmac
+import json
+
+import app
+
+# Posts Jira issue events to /webhooks/jira locally and checks cached JQL results are retired
+
+class FakeJira:
+    def __init__(self):
+        self.searches = 0
+    
+    def jql(self, jql, fields=None, start=0, limit=5):
+        self.searches += 1
+        return {"issues": [{"key": "PROJ-1", "fields": {"summary": f"Search {self.searches}"}}]}
+
+def signed_post(client, event, secret="jira-secret"):
+    body = json.dumps(event).encode()
+    signature = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return client.post("/webhooks/jira", data=body, content_type="application/json",
+                       headers={"X-Hub-Signature": signature})
+
+def issue_event(event_type, key="PROJ-1", project="PROJ"):
+    return {"webhookEvent": event_type, "issue": {"key": key, "fields": {"project": {"key": project}}}}
+
+def test_jira_webhook():
+    print("\n=== Testing Jira Webhook ===")
+    
+    settings = app.jira_client, app.users, app.JIRA_WEBHOOK_SECRET
+    app.jira_client = FakeJira()
+    app.users = {app.MS_USER_EMAIL: "PROJ", "other@example.com": "OTHER"}
+    app.JIRA_WEBHOOK_SECRET = "jira-secret"
+    client = app.app.test_client()
+    try:
+        # A repeated /tasks query is served from the cache
+        first = app.get_jira_tasks()
+        app.get_jira_tasks()
+        assert app.jira_client.searches == 1, app.jira_client.searches
+        
+        response = signed_post(client, issue_event("jira:issue_updated"), secret="wrong")
+        assert response.status_code == 403, response.status_code
+        
+        # An event for another user's project leaves this project's results cached
+        response = client.post("/webhooks/jira?secret=jira-secret", json=issue_event("jira:issue_updated", project="OTHER"))
+        app.get_jira_tasks()
+        assert response.status_code == 202 and app.jira_client.searches == 1, app.jira_client.searches
+        
+        # Projects no user maps to are still retired for /tasks?projects=
+        app.get_jira_tasks(projects=["UNMAPPED"])
+        searches = app.jira_client.searches
+        generation = app.jira_generation("UNMAPPED")
+        response = signed_post(client, issue_event("jira:issue_updated", key="UNMAPPED-1", project="UNMAPPED"))
+        app.get_jira_tasks(projects=["UNMAPPED"])
+        assert response.status_code == 202
+        assert app.jira_generation("UNMAPPED") != generation
+        assert app.jira_client.searches == searches + 1
+        
+        # An issue update retires the cached JQL result
+        searches = app.jira_client.searches
+        response = signed_post(client, issue_event("jira:issue_updated"))
+        tasks = app.get_jira_tasks()
+        assert response.status_code == 202 and app.jira_client.searches == searches + 1
+        assert tasks[0]["title"] != first[0]["title"], tasks
+        print("✅ Issue events retired only the affected projects' cached results")
+    finally:
+        app.jira_client, app.users, app.JIRA_WEBHOOK_SECRET = settings
+
+if __name__ == "__main__":
+    print("Starting Jira webhook tests...")
+    test_jira_webhook()
+    print("\nAll Jira webhook tests completed.")
@@ -0,0 +1,69 @@
+import io
+import json
+import logging
+import logging.handlers
+import queue
+import time
+
+import app
+
+# Exercises the sampling filter and the queue-backed JSON writer
+
+def make_record(message, created):
+    record = logging.LogRecord('daily-server', logging.INFO, __file__, 0, message, None, None)
+    record.created = created
+    return record
+
+def test_log_sampling():
+    print("\n=== Testing Log Sampling ===")
+    
+    sampler = app.SamplingFilter(limit=3, interval=60)
+    start = time.time()
+    passed = [sampler.filter(make_record("Using mock email data", start + i)) for i in range(10)]
+    # A repeated message is limited to 3 per interval
+    assert passed == [True] * 3 + [False] * 7, passed
+    
+    # Different messages are sampled independently
+    assert sampler.filter(make_record("Another message", start))
+    
+    # The next interval reports how many records were suppressed
+    record = make_record("Using mock email data", start + 61)
+    assert sampler.filter(record)
+    assert getattr(record, 'suppressed', 0) == 7, getattr(record, 'suppressed', None)
+    print("✅ Repeated message sampled and suppressed count reported")
+
+def test_background_writer():
+    print("\n=== Testing Background JSON Writer ===")
+    
+    output = io.StringIO()
+    stream_handler = logging.StreamHandler(output)
+    stream_handler.setFormatter(app.JsonFormatter())
+    queue_handler = app.BackgroundQueueHandler(queue.Queue(2))
+    listener = logging.handlers.QueueListener(queue_handler.queue, stream_handler)
+    
+    test_logger = logging.getLogger('daily-server-test')
+    test_logger.propagate = False
+    test_logger.addHandler(queue_handler)
+    try:
+        # With the listener stopped the queue fills and further records are dropped
+        for i in range(5):
+            test_logger.warning("Error fetching %s: %s", "emails", 500 + i)
+        assert queue_handler.dropped == 3, queue_handler.dropped
+        
+        listener.start()
+        listener.stop()
+    finally:
+        test_logger.removeHandler(queue_handler)
+    
+    # The writer thread formats queued records as JSON lines
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    messages = [r["message"] for r in records]
+    assert messages == ["Error fetching emails: 500", "Error fetching emails: 501"], output.getvalue()
+    assert records[0]["level"] == "WARNING" and records[0]["logger"] == "daily-server-test", records[0]
+    print("✅ Full queue drops records and the writer emits JSON lines")
+
+if __name__ == "__main__":
+    print("Starting logging tests...")
+    test_log_sampling()
+    test_background_writer()
+    print("\nAll logging tests completed.")
@@ -105,13 +105,92 @@ def test_calendar_endpoint():
         print(f"❌ Failed to get calendar events: {response.status_code}")
         print(f"Response: {response.text}")
 
+def test_priority_contact_wildcards():
+    """Test domain wildcards and large priority contact lists"""
+    
+    print("\n=== Testing Priority Contact Matching ===")
+    
+    response = requests.get(f"{BASE_URL}/important?priorityContacts=*@company.com")
+    
+    if response.status_code == 200:
+        emails = response.json()
+        senders = {e.get('sender') for e in emails}
+        print(f"Domain wildcard matched {len(emails)} emails from: {', '.join(sorted(senders))}")
+        if all(sender.endswith('@company.com') for sender in senders):
+            print("✅ Only senders from the wildcard domain were returned")
+        else:
+            print("❌ Senders outside the wildcard domain were returned")
+    else:
+        print(f"❌ Failed to get emails with a domain wildcard: {response.status_code}")
+    
+    # A few hundred VIPs should not be sent to Graph as one giant OR filter
+    contacts = [f"vip{i}@example.com" for i in range(300)]
+    response = requests.get(f"{BASE_URL}/important", params={"priorityContacts": ",".join(contacts)})
+    
+    if response.status_code == 200:
+        print(f"✅ Large contact list handled: {len(response.json())} emails")
+    else:
+        print(f"❌ Failed with a large contact list: {response.status_code}")
+
+def test_importance_ranking():
+    """Test ranking emails by importance score"""
+    
+    print("\n=== Testing Importance Ranking ===")
+    
+    response = requests.get(f"{BASE_URL}/important?sort=score&top=2")
+    
+    if response.status_code == 200:
+        emails = response.json()
+        scores = [e.get('score') for e in emails]
+        print(f"Top {len(emails)} emails with scores: {scores}")
+        if len(emails) <= 2 and scores == sorted(scores, reverse=True):
+            print("✅ Emails are limited to top and ordered by score")
+        else:
+            print("❌ Emails are not ranked correctly")
+        if emails:
+            print(f"  Most important: {emails[0].get('subject')}")
+    else:
+        print(f"❌ Failed to rank emails: {response.status_code}")
+
+def test_sparse_fieldsets():
+    """Test that fields= trims email and event responses"""
+    
+    print("\n=== Testing Sparse Fieldsets ===")
+    
+    response = requests.get(f"{BASE_URL}/important?fields=subject,receivedAt")
+    
+    if response.status_code == 200:
+        emails = response.json()
+        if emails and "snippet" in emails[0]:
+            print("❌ Email snippet was returned although it was not requested")
+        else:
+            print(f"✅ Retrieved {len(emails)} trimmed emails")
+    else:
+        print(f"❌ Failed to get trimmed emails: {response.status_code}")
+    
+    today = datetime.now().strftime("%Y-%m-%d")
+    future = (datetime.now() + timedelta(days=7)).strftime("%Y-%m-%d")
+    response = requests.get(f"{BASE_URL}/events?startDate={today}&endDate={future}&fields=title,start,end")
+    
+    if response.status_code == 200:
+        events = response.json()
+        if events and "attendees" in events[0]:
+            print("❌ Event attendees were returned although they were not requested")
+        else:
+            print(f"✅ Retrieved {len(events)} trimmed events")
+    else:
+        print(f"❌ Failed to get trimmed events: {response.status_code}")
+
 if __name__ == "__main__":
     print("Starting Microsoft Graph API tests...")
     
     try:
         test_ms_graph_connection()
         test_email_endpoint()
+        test_priority_contact_wildcards()
+        test_importance_ranking()
         test_calendar_endpoint()
+        test_sparse_fieldsets()
         
         print("\nAll tests completed.")
     except requests.exceptions.ConnectionError:
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import app
+
+# Exercises the headline ingestion pipeline against a local HTTP stand-in and a local Atom file
+
+def rss_feed(items):
+    entries = "".join(
+        f"<item><title>{title}</title><link>{url}</link><pubDate>{format_datetime(published)}</pubDate></item>"
+        for title, url, published in items
+    )
+    return f"<rss version='2.0'><channel><title>Local News</title>{entries}</channel></rss>".encode()
+
+def atom_feed(items):
+    entries = "".join(
+        f"<entry><title>{title}</title><link href='{url}'/><updated>{published.isoformat()}</updated></entry>"
+        for title, url, published in items
+    )
+    return f"<feed xmlns='http://www.w3.org/2005/Atom'><title>Local Atom</title>{entries}</feed>".encode()
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """Serves one RSS feed and honours If-None-Match"""
+    body = b""
+    requests_seen = []
+    
+    def do_GET(self):
+        etag = '"v1"'
+        self.requests_seen.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'application/rss+xml')
+        self.end_headers()
+        self.wfile.write(self.body)
+    
+    def log_message(self, *args):
+        pass
+
+def test_news_ingestion():
+    print("\n=== Testing News Feed Ingestion ===")
+    
+    now = datetime.now(timezone.utc)
+    FeedHandler.body = rss_feed([
+        ("Chip makers rally", "https://news.example.com/chips", now - timedelta(hours=1)),
+        ("Old story", "https://news.example.com/old", now - timedelta(hours=30)),
+    ])
+    server = HTTPServer(('127.0.0.1', 0), FeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    with tempfile.NamedTemporaryFile('wb', suffix='.xml', delete=False) as f:
+        f.write(atom_feed([
+            ("Rates held steady", "https://atom.example.com/rates", now - timedelta(hours=3)),
+            # Same story as the RSS feed, should be deduplicated by URL
+            ("Chip makers rally", "https://news.example.com/chips", now - timedelta(hours=1)),
+        ]))
+        atom_path = f.name
+    
+    feeds = [("technology", f"http://127.0.0.1:{server.server_port}/rss"), ("economy", atom_path)]
+    try:
+        added = app.poll_news_feeds(feeds)
+        print(f"First poll added {added} headlines")
+        # The story in both feeds is stored once
+        assert added == 3, added
+        
+        added = app.poll_news_feeds(feeds)
+        # The second poll is a conditional GET and adds nothing
+        assert added == 0, added
+        assert FeedHandler.requests_seen[-1] == '"v1"', FeedHandler.requests_seen
+        
+        recent = app.query_headlines(hours=24)
+        titles = [h["title"] for h in recent]
+        print(f"Last 24 hours: {titles}")
+        # Headlines are filtered by time and newest first
+        assert "Old story" not in titles and titles[0] == "Chip makers rally", titles
+        
+        economy = app.query_headlines(["economy"], hours=24)
+        assert [h["title"] for h in economy] == ["Rates held steady"], economy
+        print("✅ Feeds were ingested, deduplicated and indexed by topic")
+    finally:
+        server.shutdown()
+        os.unlink(atom_path)
+
+def test_near_duplicate_clustering():
+    print("\n=== Testing Near-Duplicate Headline Clustering ===")
+    
+    now = datetime.now(timezone.utc).timestamp()
+    stories = [
+        ("Fed holds interest rates steady amid inflation worries", "https://a.example.com/fed", "Wire A"),
+        ("Federal Reserve holds interest rates steady amid inflation worries", "https://b.example.com/fed", "Wire B"),
+        ("Fed holds rates steady amid inflation worries, says chair", "https://c.example.com/fed", "Wire C"),
+        ("Local team wins regional championship final", "https://d.example.com/sports", "Wire D"),
+    ]
+    added = app.add_headlines([
+        {"title": title, "url": url, "published": now - 60, "source": source, "topic": "clustering"}
+        for title, url, source in stories
+    ])
+    
+    headlines = app.query_headlines(["clustering"], hours=1)
+    counts = {h["title"]: h["sourceCount"] for h in headlines}
+    print(f"Stored {added} clusters: {counts}")
+    
+    assert counts.get(stories[0][0]) == 3 and counts.get(stories[3][0]) == 1, counts
+    print("✅ Same story from three sources collapsed into one headline")
+
+if __name__ == "__main__":
+    print("Starting news ingestion tests...")
+    test_news_ingestion()
+    test_near_duplicate_clustering()
+    print("\nAll news ingestion tests completed.")
@@ -0,0 +1,74 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import app
+
+# Exercises on-demand and sampled request profiling through the Flask test client
+
+def slow_calendar_events(*args, **kwargs):
+    time.sleep(0.05)
+    return []
+
+def test_request_profiling():
+    print("\n=== Testing Request Profiling ===")
+    
+    folder = tempfile.mkdtemp()
+    settings = (app.PROFILE_DIR, app.PROFILE_ADMIN_TOKEN, app.PROFILE_INTERVAL,
+                app.PROFILE_FORMAT, app.PROFILE_SAMPLE_RATE, app.get_calendar_events)
+    app.PROFILE_DIR = folder
+    app.PROFILE_ADMIN_TOKEN = "admin-secret"
+    app.PROFILE_INTERVAL = 0.001
+    client = app.app.test_client()
+    # Keep the admission limits from interfering with repeated requests
+    headers = {"X-API-Key": "profiling-test"}
+    
+    try:
+        # Profiling without the admin token is ignored
+        response = client.get("/tasks?__profile=1", headers=headers)
+        assert "X-Profile-File" not in response.headers and not os.listdir(folder)
+        
+        response = client.get("/tasks?__profile=1", headers={**headers, "X-Admin-Token": "wrong"})
+        assert "X-Profile-File" not in response.headers
+        
+        # A slow provider gives the sampler something to see
+        app.get_calendar_events = slow_calendar_events
+        response = client.get("/events?startDate=2023-12-01&endDate=2023-12-31",
+                              headers={**headers, "X-Profile": "1", "X-Admin-Token": "admin-secret"})
+        filename = response.headers.get("X-Profile-File", "")
+        assert response.status_code == 200 and filename.endswith(".speedscope.json"), (response.status_code, filename)
+        with open(os.path.join(folder, filename)) as f:
+            profile = json.load(f)
+        frames = [frame["name"] for frame in profile["shared"]["frames"]]
+        assert "slow_calendar_events" in frames, frames
+        sampled = profile["profiles"][0]
+        assert sampled["type"] == "sampled" and len(sampled["samples"]) == len(sampled["weights"])
+        print(f"✅ Speedscope profile saved with the slow provider on the stack: {filename}")
+        
+        app.PROFILE_FORMAT = "collapsed"
+        response = client.get("/tasks?__profile=1", headers={**headers, "X-Admin-Token": "admin-secret"})
+        filename = response.headers.get("X-Profile-File", "")
+        assert filename.endswith(".txt"), filename
+        
+        # The collapsed format lists frames root first with a count
+        stacks = {(("main", "app.py", 1), ("get_jira_tasks", "app.py", 10)): 3}
+        assert app.collapsed_stacks(stacks) == "main (app.py:1);get_jira_tasks (app.py:10) 3\n"
+        print(f"✅ Collapsed stacks saved: {filename}")
+        
+        # Every request is profiled at a rate of 1 in 1, without exposing the file name
+        app.PROFILE_SAMPLE_RATE = 1
+        before = len(os.listdir(folder))
+        response = client.get("/tasks", headers=headers)
+        assert len(os.listdir(folder)) == before + 1 and "X-Profile-File" not in response.headers
+        print("✅ Sampled mode saved a profile silently")
+    finally:
+        (app.PROFILE_DIR, app.PROFILE_ADMIN_TOKEN, app.PROFILE_INTERVAL,
+         app.PROFILE_FORMAT, app.PROFILE_SAMPLE_RATE, app.get_calendar_events) = settings
+        shutil.rmtree(folder)
+
+if __name__ == "__main__":
+    print("Starting profiling tests...")
+    test_request_profiling()
+    print("\nAll profiling tests completed.")
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+
+import app
+
+# Checks token buckets are keyed so unknown API keys can't be rotated past a limit
+
+def test_rotating_api_keys():
+    print("\n=== Testing Rate Limit Client Identity ===")
+
+    route_limits, max_buckets = dict(app.route_limits), app.MAX_RATE_BUCKETS
+    app.route_limits['/videos'] = (1, 3)
+    app.rate_limit_api_keys.add("trusted-key")
+    try:
+        client = app.app.test_client()
+        ip = {'REMOTE_ADDR': '10.0.26.1'}
+        statuses = [
+            client.get("/videos", headers={"X-API-Key": f"key-{i}"}, environ_base=ip).status_code
+            for i in range(6)
+        ]
+        # Unknown keys share the caller's address bucket
+        assert statuses.count(429) == 3, statuses
+
+        # A configured key has a bucket of its own
+        response = client.get("/videos", headers={"X-API-Key": "trusted-key"}, environ_base=ip)
+        assert response.status_code == 200
+
+        # Past the limit, the least recently used bucket makes room
+        app.MAX_RATE_BUCKETS = len(app.rate_buckets)
+        oldest = next(iter(app.rate_buckets))
+        client.get("/videos", environ_base={'REMOTE_ADDR': '10.0.26.2'})
+        assert len(app.rate_buckets) == app.MAX_RATE_BUCKETS and oldest not in app.rate_buckets
+        print("✅ Rotating unknown API keys doesn't reset the limit")
+    finally:
+        app.route_limits.clear()
+        app.route_limits.update(route_limits)
+        app.MAX_RATE_BUCKETS = max_buckets
+        app.rate_limit_api_keys.discard("trusted-key")
+
+def test_shared_rate_limits():
+    print("\n=== Testing Shared Rate Limits ===")
+
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, "cache.db")
+    settings = app.cache, app.CACHE_BACKEND, dict(app.route_limits)
+    # A window of 300 seconds, so the requests below all fall into one
+    app.route_limits['/videos'] = (0.01, 3)
+    app.CACHE_BACKEND = 'sqlite'
+    workers = [app.SQLiteCache(path, 100), app.SQLiteCache(path, 100)]
+    try:
+        client = app.app.test_client()
+        ip = {'REMOTE_ADDR': '10.0.26.3'}
+        statuses = []
+        # Two processes sharing the cache count against the same limit
+        for i in range(6):
+            app.cache = workers[i % 2]
+            statuses.append(client.get("/videos", environ_base=ip).status_code)
+        assert statuses == [200, 200, 200, 429, 429, 429], statuses
+        print("✅ Rate limit counted across processes sharing the cache")
+    finally:
+        app.cache, app.CACHE_BACKEND, route_limits = settings
+        app.route_limits.clear()
+        app.route_limits.update(route_limits)
+        for worker in workers:
+            worker.connection().close()
+        shutil.rmtree(folder)
+
+if __name__ == "__main__":
+    print("Starting rate limit tests...")
+    test_rotating_api_keys()
+    test_shared_rate_limits()
+    print("\nAll rate limit tests completed.")
@@ -0,0 +1,61 @@
+import threading
+import time
+
+import app
+
+# Checks BM25 ranking over the in-process search index
+
+def headline(item_id, title):
+    return app.Headline(id=item_id, title=title, source="Test", published=int(time.time()), topic="test")
+
+def test_common_terms_still_rank():
+    print("\n=== Testing Search Ranking ===")
+
+    user = f"search-test-{time.time()}@example.com"
+    items = [headline(f"common-{i}", "Weekly meeting notes") for i in range(100)]
+    items.append(headline("rare", "Budget review"))
+    app.index_documents("headline", items, user)
+
+    # An OR query: documents matching only the common term still fill the page
+    results = app.search_index("budget meeting", types=["headline"], limit=5, user=user)
+    ids = [result["item"].id for result in results]
+    assert ids[0] == "rare", ids
+    assert len(ids) == 5 and all(i.startswith("common-") for i in ids[1:]), ids
+
+    # Pruning never changes the ranking: a document matching both terms beats either alone
+    app.index_documents("headline", [headline("both", "Budget meeting")], user)
+    results = app.search_index("budget meeting", types=["headline"], limit=3, user=user)
+    assert [result["item"].id for result in results][:2] == ["both", "rare"], results
+    print("✅ Documents matching only common terms are ranked")
+
+def test_indexing_skips_unchanged_and_stored_items():
+    print("\n=== Testing Search Indexing Cost ===")
+
+    user = f"index-test-{time.time()}@example.com"
+    items = [headline(f"page-{i}", "Quarterly planning") for i in range(50)]
+    app.index_documents("headline", items, user)
+
+    # Re-indexing an unchanged page doesn't wait for the lock searches use
+    indexer = threading.Thread(target=app.index_documents, args=("headline", items, user))
+    with app.search_lock:
+        indexer.start()
+        indexer.join(2)
+        assert not indexer.is_alive(), "unchanged page waited for search_lock"
+
+    # Polled videos were indexed when stored, so /videos doesn't index them again
+    calls = []
+    index_documents, youtube_channels = app.index_documents, app.youtube_channels
+    app.index_documents = lambda *args, **kwargs: calls.append(args)
+    app.youtube_channels = [("test", "unused.xml")]
+    try:
+        response = app.app.test_client().get("/videos", environ_base={'REMOTE_ADDR': '10.0.0.34'})
+        assert response.status_code == 200 and calls == [], calls
+    finally:
+        app.index_documents, app.youtube_channels = index_documents, youtube_channels
+    print("✅ Unchanged and already stored items skip the index lock")
+
+if __name__ == "__main__":
+    print("Starting search tests...")
+    test_common_terms_still_rank()
+    test_indexing_skips_unchanged_and_stored_items()
+    print("\nAll search tests completed.")
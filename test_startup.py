@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+import app
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def test_lazy_startup():
+    """Test that importing the app skips the client libraries and starts nothing"""
+    print("\nTesting lazy startup...")
+    
+    # Checked in a fresh interpreter, since the test runner may have imported them already
+    script = (
+        "import sys, threading, app; "
+        "print(' '.join(m for m in ('atlassian', 'msal', 'requests') if m in sys.modules)); "
+        "print(' '.join(t.name for t in threading.enumerate() if t is not threading.main_thread()))"
+    )
+    output = subprocess.run([sys.executable, "-c", script], cwd=HERE, capture_output=True, text=True).stdout.splitlines()
+    modules, threads = (output + ["", ""])[:2]
+    assert not modules, f"imported eagerly: {modules}"
+    assert not threads, f"started at import: {threads}"
+    print("✅ Importing the app skips the client libraries and starts no threads")
+    
+    # The Jira client is built on first use, and the lazy module resolves on first attribute
+    assert app.get_jira_client() is app.jira_client
+    assert callable(app.requests.get)
+    
+    # init_worker runs once per process
+    pid = app.worker_state["pid"]
+    app.worker_state["pid"] = os.getpid()
+    try:
+        assert app.create_app() is app.app
+    finally:
+        app.worker_state["pid"] = pid
+    print("✅ Clients resolve on first use and create_app returns the app")
+
+if __name__ == "__main__":
+    print("Starting startup tests...")
+    test_lazy_startup()
+    print("\nAll startup tests completed.")
@@ -0,0 +1,37 @@
+import app
+
+# Checks a user's data is only served to a caller holding that user's API key
+
+def test_user_needs_their_key():
+    print("\n=== Testing User API Keys ===")
+
+    alice = "alice@example.com"
+    settings = app.users, app.user_api_keys
+    app.users = {**app.users, alice: "OPS"}
+    app.user_api_keys = app.parse_user_api_keys(f"alice-key={alice},stranger-key=nobody@example.com")
+    try:
+        assert app.user_api_keys == {"alice-key": alice}, app.user_api_keys
+        client = app.app.test_client()
+        ip = {'REMOTE_ADDR': '10.0.0.44'}
+        get = lambda path, **headers: client.get(path, headers=headers, environ_base=ip).status_code
+
+        # Naming a user without their key is refused, by parameter or header
+        assert get(f"/tasks?user={alice}") == 403
+        assert get("/tasks", **{"X-User-Email": alice}) == 403
+        assert get(f"/tasks?user={alice}", **{"X-API-Key": "someone-else"}) == 403
+
+        # The key alone selects its user, and can't be used to read someone else's data
+        assert get("/tasks", **{"X-API-Key": "alice-key"}) == 200
+        assert get(f"/tasks?user={alice}", **{"X-API-Key": "alice-key"}) == 200
+        assert get(f"/tasks?user={app.MS_USER_EMAIL}", **{"X-API-Key": "alice-key"}) == 403
+
+        # Without a key the default user is served as before
+        assert get("/tasks") == 200
+        print("✅ Users other than the default are only served to their key")
+    finally:
+        app.users, app.user_api_keys = settings
+
+if __name__ == "__main__":
+    print("Starting user API key tests...")
+    test_user_needs_their_key()
+    print("\nAll user API key tests completed.")
@@ -0,0 +1,81 @@
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import app
+
+# Exercises the YouTube channel poller and its inverted indexes against local feed files
+
+def channel_feed(channel_id, channel_name, videos):
+    entries = "".join(
+        f"""<entry>
+            <yt:videoId>{video_id}</yt:videoId>
+            <yt:channelId>{channel_id}</yt:channelId>
+            <title>{title}</title>
+            <link rel="alternate" href="https://www.youtube.com/watch?v={video_id}"/>
+            <author><name>{channel_name}</name></author>
+            <published>{published.isoformat()}</published>
+        </entry>"""
+        for video_id, title, published in videos
+    )
+    return (
+        "<feed xmlns='http://www.w3.org/2005/Atom' xmlns:yt='http://www.youtube.com/xml/schemas/2015' "
+        f"xmlns:media='http://search.yahoo.com/mrss/'>{entries}</feed>"
+    )
+
+def write_feed(path, content, version=0):
+    with open(path, 'w') as f:
+        f.write(content)
+    # Bump the modification time so the poller sees each version as changed
+    mtime = datetime.now().timestamp() + version
+    os.utime(path, (mtime, mtime))
+
+def test_youtube_ingestion():
+    print("\n=== Testing YouTube Channel Ingestion ===")
+    
+    now = datetime.now(timezone.utc)
+    folder = tempfile.mkdtemp()
+    tech_path = os.path.join(folder, "tech.xml")
+    music_path = os.path.join(folder, "music.xml")
+    
+    write_feed(tech_path, channel_feed("UCtech", "Gadget Lab", [
+        ("yt-t2", "Phone review", now - timedelta(hours=1)),
+        ("yt-t1", "Laptop review", now - timedelta(hours=5)),
+    ]))
+    write_feed(music_path, channel_feed("UCmusic", "Song Hub", [
+        ("yt-m1", "New single", now - timedelta(hours=2)),
+    ]))
+    channels = [("gadgets", tech_path), ("songs", music_path)]
+    
+    try:
+        added = app.poll_youtube_channels(channels)
+        print(f"First poll added {added} videos")
+        
+        # A new upload: only the video after the last seen one should be added
+        write_feed(tech_path, channel_feed("UCtech", "Gadget Lab", [
+            ("yt-t3", "Camera review", now - timedelta(minutes=10)),
+            ("yt-t2", "Phone review", now - timedelta(hours=1)),
+            ("yt-t1", "Laptop review", now - timedelta(hours=5)),
+        ]), version=1)
+        added = app.poll_youtube_channels(channels)
+        assert added == 1, added
+        
+        # The channel filter works by name and by channel id, newest first
+        by_channel = [v["id"] for v in app.query_videos(["Gadget Lab"])]
+        by_id = [v["id"] for v in app.query_videos(["UCtech"])]
+        assert by_channel == ["yt-t3", "yt-t2", "yt-t1"], by_channel
+        assert by_id == by_channel, by_id
+        
+        # Channel and category filters intersect
+        both = [v["id"] for v in app.query_videos(["Gadget Lab", "Song Hub"], ["songs"])]
+        assert both == ["yt-m1"], both
+        print("✅ Only new uploads were added and the channel indexes filter them")
+    finally:
+        for path in (tech_path, music_path):
+            os.unlink(path)
+        os.rmdir(folder)
+
+if __name__ == "__main__":
+    print("Starting YouTube ingestion tests...")
+    test_youtube_ingestion()
+    print("\nAll YouTube ingestion tests completed.")